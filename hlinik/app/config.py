@@ -1,4 +1,5 @@
 import os
+import re
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -7,6 +8,18 @@ load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent.parent
 DEFAULT_DB_PATH = BASE_DIR / "data" / "iris.db"
 
+def parse_game_instances(raw: str, default_instance: str, default_sessions: int) -> dict:
+    """Parse "live,rehearsal:4" into {"default": 8, "live": 8, "rehearsal": 4}."""
+    instances = {default_instance: default_sessions}
+    for item in raw.split(","):
+        name, _, sessions = item.strip().partition(":")
+        if not name:
+            continue
+        if not re.fullmatch(r"[a-z][a-z0-9_-]*", name):
+            raise ValueError(f"Invalid game instance name: {name!r}")
+        instances[name] = int(sessions) if sessions else default_sessions
+    return instances
+
 class Settings:
     PROJECT_NAME: str = "IRIS System"
     VERSION: str = "3.1.2"
@@ -29,6 +42,46 @@ class Settings:
 
     # Game Logic
     TOTAL_SESSIONS: int = 8
+
+    # Game instances hosted by this server (parallel LARP groups, rehearsal + live, ...)
+    # IRIS_GAME_INSTANCES="rehearsal:4" -> {"default": 8, "rehearsal": 4} (name -> session count)
+    DEFAULT_INSTANCE: str = "default"
+    GAME_INSTANCES: dict = parse_game_instances(os.getenv("IRIS_GAME_INSTANCES", ""), DEFAULT_INSTANCE, TOTAL_SESSIONS)
+
+    # Multi-worker state backend (see docs/DEPLOYMENT.md)
+    # "local" = single worker (default), "unix" = workers share the game via a Unix socket broker
+    STATE_BACKEND: str = os.getenv("IRIS_STATE_BACKEND", "local")
+    STATE_SOCKET_PATH: str = os.getenv("IRIS_STATE_SOCKET", str(BASE_DIR / "data" / "iris_state.sock"))
+
+    # Render all manuals (/doc/view) at startup instead of on the first view
+    PRERENDER_DOCS: bool = os.getenv("IRIS_PRERENDER_DOCS", "1") != "0"
+
+    # Pre-generated task descriptions kept ready per status level (0 = generate on approval)
+    TASK_POOL_DEPTH: int = int(os.getenv("IRIS_TASK_POOL_DEPTH", "3"))
+
+    # Parallel LLM calls scoring submitted tasks in the background (0 = no automatic scoring)
+    EVALUATION_CONCURRENCY: int = int(os.getenv("IRIS_EVAL_CONCURRENCY", "3"))
+
+    # Seconds the agent waits for the optimizer before getting the original text back
+    OPTIMIZER_DEADLINE: float = float(os.getenv("IRIS_OPTIMIZER_DEADLINE", "4"))
+
+    # Default panic censor: "llm", "hybrid" (rules first, LLM if undecided) or "rules".
+    # Only "llm" replaces a panicking agent's reply; the rule modes send it PII-scrubbed.
+    CENSOR_MODE: str = os.getenv("IRIS_CENSOR_MODE", "llm")
+
+    # HYPER autopilot: user messages this close together (s) get one reply, waiting at most MAX_WAIT
+    AUTOPILOT_DEBOUNCE: float = float(os.getenv("IRIS_AUTOPILOT_DEBOUNCE", "0.8"))
+    AUTOPILOT_MAX_WAIT: float = float(os.getenv("IRIS_AUTOPILOT_MAX_WAIT", "3"))
+
+    # Per-connection keystroke coalescing: one typing_sync per window, one start/stop per interval (s)
+    TYPING_SYNC_WINDOW: float = float(os.getenv("IRIS_TYPING_SYNC_WINDOW", "0.15"))
+    TYPING_INDICATOR_INTERVAL: float = float(os.getenv("IRIS_TYPING_INDICATOR_INTERVAL", "0.5"))
+
+    # Messages of the new session pushed to an agent on a shift change (session_switch)
+    SESSION_SWITCH_HISTORY: int = int(os.getenv("IRIS_SESSION_SWITCH_HISTORY", "50"))
+
+    # Binary WebSocket frames for clients asking for encoding=msgpack (logic/wire.py)
+    WS_COMPACT_ENCODING: bool = os.getenv("IRIS_WS_COMPACT", "1") != "0"
     
     def __init__(self):
         # Security Check for SECRET_KEY
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, ForeignKey, DateTime, Text, Enum
+from sqlalchemy import create_engine, Column, Integer, String, Boolean, ForeignKey, DateTime, Text, Enum, Index, inspect, text
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 from datetime import datetime
 import enum
@@ -49,14 +49,20 @@ class User(Base):
     credits = Column(Integer, default=100)
     status_level = Column(Enum(StatusLevel), default=StatusLevel.LOW)
     is_locked = Column(Boolean, default=False)
+    instance_id = Column(String(50), default=settings.DEFAULT_INSTANCE, server_default=settings.DEFAULT_INSTANCE, index=True)  # Game instance
     
     logs = relationship("ChatLog", back_populates="sender")
     tasks = relationship("Task", back_populates="user")
 
 class ChatLog(Base):
     __tablename__ = "chat_logs"
+    __table_args__ = (
+        # History is always loaded per (instance, session)
+        Index("ix_chat_logs_instance_session", "instance_id", "session_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    instance_id = Column(String(50), default=settings.DEFAULT_INSTANCE, server_default=settings.DEFAULT_INSTANCE)
     session_id = Column(Integer, index=True) # Logical session ID (1-8)
     sender_id = Column(Integer, ForeignKey("users.id"))
     content = Column(Text)
@@ -72,15 +78,34 @@ class Task(Base):
     __tablename__ = "tasks"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     prompt_desc = Column(Text)
     reward_offered = Column(Integer, default=0)
-    status = Column(Enum(TaskStatus), default=TaskStatus.PENDING_APPROVAL)
+    status = Column(Enum(TaskStatus), default=TaskStatus.PENDING_APPROVAL, index=True)
     submission_content = Column(Text, nullable=True)
     final_rating = Column(Integer, default=0) # Percentage
+    suggested_rating = Column(Integer, nullable=True) # 0-100 from the evaluation queue, NULL = not scored yet
+    # Admin task feed (updated_since); NULL for rows created before the column existed
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     user = relationship("User", back_populates="tasks")
 
+class CreditLedger(Base):
+    """Append-only record of every credit change (user_id NULL = instance treasury)."""
+    __tablename__ = "credit_ledger"
+    __table_args__ = (
+        Index("ix_credit_ledger_instance_user", "instance_id", "user_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    instance_id = Column(String(50), default=settings.DEFAULT_INSTANCE)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    delta = Column(Integer, nullable=False)
+    balance = Column(Integer, nullable=True)  # Balance after this entry
+    reason = Column(String(50))  # opening, report, fine, bonus, task_payout, global_bonus, reset, tax, ...
+    note = Column(Text, nullable=True)
+    timestamp = Column(DateTime, default=datetime.utcnow)
+
 class SystemConfig(Base):
     __tablename__ = "system_config"
 
@@ -96,5 +121,48 @@ class SystemLog(Base):
     message = Column(Text)
     data = Column(Text, nullable=True) # Optional JSON details
 
+# Columns added after the first release; create_all() does not alter existing tables
+MIGRATED_COLUMNS = (
+    (User.__table__, "instance_id"),
+    (ChatLog.__table__, "instance_id"),
+    (Task.__table__, "updated_at"),
+    (Task.__table__, "suggested_rating"),
+)
+
+# Tables whose indexes were added after the first release
+MIGRATED_INDEX_TABLES = (Task.__table__,)
+
+def _add_missing_columns():
+    inspector = inspect(engine)
+    for table, column_name in MIGRATED_COLUMNS:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        if column_name in existing:
+            continue
+        column = table.c[column_name]
+        column_type = column.type.compile(dialect=engine.dialect)
+        if column.server_default is not None:
+            ddl = f"{column_type} NOT NULL DEFAULT '{column.server_default.arg}'"
+        else:
+            ddl = f"{column_type} NULL"
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_name} {ddl}"))
+            for index in table.indexes:
+                if column_name in index.columns:
+                    index.create(conn)
+        print(f"Migrated: added {table.name}.{column_name}")
+
+def _add_missing_indexes():
+    inspector = inspect(engine)
+    for table in MIGRATED_INDEX_TABLES:
+        existing = {i["name"] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            with engine.begin() as conn:
+                index.create(conn)
+            print(f"Migrated: added index {index.name}")
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    _add_missing_indexes()
@@ -0,0 +1,193 @@
+"""
+HYPER autopilot: one worker per (instance, session).
+
+The user's WebSocket handler only queues the message (`autopilot.submit`) and
+returns, so the reader loop keeps serving pings and further messages while the
+LLM answers. The worker:
+
+- debounces bursts: messages arriving within AUTOPILOT_DEBOUNCE seconds of
+  each other (at most AUTOPILOT_MAX_WAIT in total) are answered in one turn,
+- cancels a generation still waiting for the LLM when a new message arrives;
+  the superseded messages are answered together with the new ones,
+- lets a turn whose reply is already being stored/broadcast finish.
+
+History (GameState.hyper_histories) only receives a turn's messages once its
+reply exists, so a cancelled generation leaves no trace.
+"""
+
+import asyncio
+import json
+from typing import Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..database import SessionLocal, ChatLog, User
+from .backend import state_backend
+from .gamestate import get_gamestate, HyperVisibilityMode
+from .llm_core import llm_service
+from .routing import get_routing
+
+
+class AutopilotWorker:
+    def __init__(self, instance_id: str, session_id: int, debounce: float, max_wait: float):
+        self.instance_id = instance_id
+        self.session_id = session_id
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.generating = False  # True while the current turn waits for the LLM
+        self.idle = True  # Waiting for a message, nothing collected or carried over
+        self.turns = 0
+        self.superseded = 0
+        self._turn: Optional[asyncio.Task] = None
+        self._task = asyncio.create_task(self._run())
+
+    def submit(self, content: str):
+        self.idle = False
+        self.queue.put_nowait(content)
+        if self.generating and self._turn and not self._turn.done():
+            self._turn.cancel()
+
+    def cancel(self):
+        """Drop queued messages and the generation in flight (autopilot switched off)."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        if self._turn and not self._turn.done():
+            self._turn.cancel()
+
+    def stop(self):
+        self.cancel()
+        self._task.cancel()
+
+    async def _collect(self, carried: List[str]) -> List[str]:
+        self.idle = not carried
+        batch = carried + [await self.queue.get()]
+        self.idle = False
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while True:
+            timeout = min(self.debounce, deadline - loop.time())
+            if timeout <= 0:
+                return batch
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                return batch
+
+    async def _run(self):
+        carried: List[str] = []
+        while True:
+            batch = await self._collect(carried)
+            carried = []
+            self._turn = asyncio.create_task(self.turn(batch))
+            try:
+                await asyncio.wait({self._turn})
+            except asyncio.CancelledError:
+                self._turn.cancel()
+                raise
+            if self._turn.cancelled():
+                if not self.queue.empty():
+                    # Superseded by a newer message: answer everything in the next turn
+                    self.superseded += 1
+                    carried = batch
+            elif self._turn.exception():
+                print(f"WARN: Autopilot turn failed (session {self.session_id}): {self._turn.exception()}")
+            self.idle = not carried and self.queue.empty()
+
+    async def turn(self, messages: List[str]):
+        gamestate = get_gamestate(self.instance_id)
+        routing_logic = get_routing(self.instance_id)
+        session_id = self.session_id
+        agent_logical_id = gamestate.agent_for_session(session_id)
+        if not gamestate.active_autopilots.get(agent_logical_id):
+            return
+
+        # Runs outside the socket handler: replicate the history/timer changes ourselves
+        with state_backend.track_changes():
+            await routing_logic.broadcast_to_session(session_id, json.dumps({
+                "type": "optimizing_start",
+                "mode": "hyper"
+            }))
+            user_turns = [{"role": "user", "content": m} for m in messages]
+            prompt = gamestate.hyper_histories.get(agent_logical_id, []) + user_turns
+
+            self.generating = True
+            try:
+                reply = await llm_service.generate_response(gamestate.llm_config_hyper, prompt)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Autopilot Error: {e}")
+                reply = "..."
+            finally:
+                self.generating = False
+
+            if not gamestate.active_autopilots.get(agent_logical_id):
+                return  # Switched off while generating
+            self.turns += 1
+            history = gamestate.hyper_histories.setdefault(agent_logical_id, [])
+            history.extend(user_turns)
+            history.append({"role": "assistant", "content": reply})
+
+            agent_username = gamestate.scoped_username(f"agent{agent_logical_id}")
+            db = SessionLocal()
+            try:
+                agent_db_user = db.query(User).filter(User.username == agent_username).first()
+                if not (agent_db_user and reply):
+                    return
+                log_ai = ChatLog(instance_id=self.instance_id, session_id=session_id, sender_id=agent_db_user.id, content=reply, is_hyper=True)
+                db.add(log_ai)
+                db.commit()
+                log_id = log_ai.id
+            finally:
+                db.close()
+
+            # Autopilot responded - clear pending response timer
+            gamestate.clear_pending_response(session_id)
+
+            hyper_msg = json.dumps({
+                "sender": agent_username,
+                "role": "agent",
+                "content": reply,
+                "session_id": session_id,
+                "id": log_id,
+                "is_hyper": True
+            })
+
+            # Hyper Visibility: BLACKBOX/FORENSIC hide live HYPER from agent
+            # NORMAL/EPHEMERAL show live HYPER to agent
+            if gamestate.hyper_visibility_mode in (HyperVisibilityMode.BLACKBOX, HyperVisibilityMode.FORENSIC):
+                # Send only to user (not agent) in this session
+                await routing_logic.broadcast_to_session_users(session_id, hyper_msg)
+            else:
+                await routing_logic.broadcast_to_session(session_id, hyper_msg)
+            # Admins subscribed to the session's HYPER traffic see it in every mode
+            await routing_logic.publish_to_admins(session_id, "hyper", hyper_msg)
+
+
+class AutopilotWorkers:
+    def __init__(self, debounce: float = settings.AUTOPILOT_DEBOUNCE, max_wait: float = settings.AUTOPILOT_MAX_WAIT):
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self._workers: Dict[Tuple[str, int], AutopilotWorker] = {}
+
+    def submit(self, instance_id: str, session_id: int, content: str) -> AutopilotWorker:
+        """Queue a user message for the session's autopilot (worker started on first use)."""
+        worker = self._workers.get((instance_id, session_id))
+        if worker is None:
+            worker = AutopilotWorker(instance_id, session_id, self.debounce, self.max_wait)
+            self._workers[(instance_id, session_id)] = worker
+        worker.submit(content)
+        return worker
+
+    def cancel(self, instance_id: str, session_id: int):
+        worker = self._workers.get((instance_id, session_id))
+        if worker:
+            worker.cancel()
+
+    def stop(self):
+        for worker in self._workers.values():
+            worker.stop()
+        self._workers.clear()
+
+
+autopilot = AutopilotWorkers()
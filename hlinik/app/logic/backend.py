@@ -0,0 +1,315 @@
+"""
+Pluggable game state / message fan-out backend (multi-worker support).
+
+- LocalBackend: default. Single uvicorn worker, everything stays in memory.
+- UnixSocketBackend: several workers on one host share the same game.
+  Workers elect a leader with an exclusive lock file. The leader hosts a small
+  broker on a Unix socket and relays frames between workers; it is also the
+  only worker that runs the game_loop tick. If the leader dies, the lock is
+  released and one of the remaining workers takes over.
+
+Frames are newline-delimited JSON: {"k": kind, "o": origin worker, "p": payload}.
+Consumers (routing, gamestate) register handlers with `on(kind, handler)`;
+a handler receives (payload, origin) and may be a coroutine.
+
+Shared state travels in "state" frames {"set": {key: value}, "del": [key],
+"add": {key: increment}}. The exported state is a flat dict whose keys are
+fine-grained (one per session entry), so a patch only carries what the block
+changed and concurrent changes of other keys on other workers survive.
+Counter keys (`is_counter`) are sent as increments, so concurrent additions
+on two workers add up instead of the last writer winning.
+"""
+
+import asyncio
+import contextlib
+import fcntl
+import inspect
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 0.5  # seconds between leader election / reconnect attempts
+STREAM_LIMIT = 16 * 1024 * 1024  # max frame size (state snapshots include HYPER histories)
+
+
+class LocalBackend:
+    """In-process backend: publishing is a no-op and this worker always leads."""
+    name = "local"
+
+    def __init__(self, worker_id: Optional[int] = None):
+        self._worker_id_override = worker_id
+        self.worker_id = worker_id or os.getpid()
+        self.is_leader = True
+        self._handlers: Dict[str, Callable] = {}
+        self._export_state: Optional[Callable[[], dict]] = None
+        self._import_state: Optional[Callable[[dict, List[str], dict], None]] = None
+        self._is_counter: Callable[[str], bool] = lambda key: False
+
+    def on(self, kind: str, handler: Callable):
+        self._handlers[kind] = handler
+
+    def bind_state(self, export_fn: Callable[[], dict], import_fn: Callable[[dict, List[str], dict], None],
+                   is_counter: Optional[Callable[[str], bool]] = None):
+        """
+        Register the shared state accessors (gamestate.export/import_all_shared_state).
+        import_fn(set, deleted keys, increments) applies a patch.
+        """
+        self._export_state = export_fn
+        self._import_state = import_fn
+        if is_counter:
+            self._is_counter = is_counter
+
+    async def start(self):
+        self.worker_id = self._worker_id_override or os.getpid()
+
+    async def stop(self):
+        pass
+
+    def publish(self, kind: str, payload: Any = None):
+        """Send a frame to all other workers. Local delivery is the caller's job."""
+        pass
+
+    def track_changes(self):
+        """Context manager publishing shared state changed inside the block."""
+        return contextlib.nullcontext()
+
+
+class UnixSocketBackend(LocalBackend):
+    """Multi-process backend using a lock file for election and a Unix socket broker."""
+    name = "unix"
+
+    def __init__(self, socket_path: str, lock_path: Optional[str] = None, worker_id: Optional[int] = None):
+        super().__init__(worker_id=worker_id)
+        self.socket_path = str(socket_path)
+        self.lock_path = str(lock_path or f"{socket_path}.lock")
+        self.is_leader = False
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: Dict[asyncio.StreamWriter, Optional[int]] = {}  # leader side: writer -> worker id
+        self._upstream: Optional[asyncio.StreamWriter] = None  # follower side
+        self._task: Optional[asyncio.Task] = None
+        # Running track_changes blocks: (fingerprint before, counter values before)
+        self._trackers: List[Tuple[Dict[str, str], Dict[str, Any]]] = []
+
+    # --- Lifecycle ---
+
+    async def start(self):
+        await super().start()
+        # First election attempt is synchronous so the caller knows the role right away
+        if self._try_become_leader():
+            await self._start_server()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        for writer in list(self._peers):
+            writer.close()
+        self._peers = {}
+        if self._upstream:
+            self._upstream.close()
+            self._upstream = None
+        if self._server:
+            self._server.close()
+            self._server = None
+            with contextlib.suppress(OSError):
+                os.unlink(self.socket_path)
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # Releases the flock
+            self._lock_fd = None
+        self.is_leader = False
+
+    def _try_become_leader(self) -> bool:
+        if self._lock_fd is None:
+            self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        self.is_leader = True
+        return True
+
+    async def _start_server(self):
+        # Socket file may be left over from a crashed leader
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle_peer, path=self.socket_path, limit=STREAM_LIMIT)
+        logger.info(f"State backend: worker {self.worker_id} is LEADER on {self.socket_path}")
+
+    async def _run(self):
+        while True:
+            try:
+                if self.is_leader:
+                    await self._server.serve_forever()
+                    return
+                await self._follow()
+                # Upstream gone (or not up yet): try to take over
+                if self._try_become_leader():
+                    await self._start_server()
+                else:
+                    await asyncio.sleep(RECONNECT_DELAY)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"WARN: State backend error: {e}")
+                await asyncio.sleep(RECONNECT_DELAY)
+
+    # --- Follower side ---
+
+    async def _follow(self):
+        try:
+            reader, writer = await asyncio.open_unix_connection(self.socket_path, limit=STREAM_LIMIT)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return
+        self._upstream = writer
+        self._write(writer, self._encode("hello", None))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                await self._dispatch_frame(json.loads(line))
+        finally:
+            self._upstream = None
+            writer.close()
+            # Presence of other workers is stale until the next leader resyncs
+            await self._dispatch_frame({"k": "peers_reset", "o": None, "p": None})
+
+    # --- Leader side ---
+
+    async def _handle_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._peers[writer] = None
+        # Bring the newcomer up to date, then ask everybody to re-announce presence
+        if self._export_state:
+            self._write(writer, self._encode("state", {"set": self._export_state()}))
+        await self._emit("resync", None)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                frame = json.loads(line)
+                if frame.get("k") == "hello":
+                    self._peers[writer] = frame.get("o")
+                    continue
+                for peer in list(self._peers):
+                    if peer is not writer:
+                        self._write(peer, line)
+                await self._dispatch_frame(frame)
+        except (ConnectionResetError, json.JSONDecodeError) as e:
+            print(f"WARN: State backend peer error: {e}")
+        finally:
+            worker = self._peers.pop(writer, None)
+            writer.close()
+            if worker is not None:
+                await self._emit("worker_gone", {"worker_id": worker})
+
+    # --- Messaging ---
+
+    def _encode(self, kind: str, payload: Any) -> bytes:
+        return (json.dumps({"k": kind, "o": self.worker_id, "p": payload}) + "\n").encode("utf-8")
+
+    def _write(self, writer: asyncio.StreamWriter, data: bytes):
+        try:
+            writer.write(data)
+        except Exception as e:
+            print(f"WARN: State backend write failed: {e}")
+
+    def publish(self, kind: str, payload: Any = None):
+        data = self._encode(kind, payload)
+        if self.is_leader:
+            for peer in list(self._peers):
+                self._write(peer, data)
+        elif self._upstream:
+            self._write(self._upstream, data)
+
+    async def _emit(self, kind: str, payload: Any):
+        """Publish to all workers and deliver to this worker as well."""
+        self.publish(kind, payload)
+        await self._dispatch_frame({"k": kind, "o": None, "p": payload})
+
+    async def _dispatch_frame(self, frame: dict):
+        origin = frame.get("o")
+        if origin is not None and origin == self.worker_id:
+            return
+        kind = frame.get("k")
+        payload = frame.get("p")
+        if kind == "state":
+            self._apply_state(payload or {})
+            return
+        handler = self._handlers.get(kind)
+        if not handler:
+            return
+        try:
+            result = handler(payload, origin)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            print(f"WARN: State backend handler '{kind}' failed: {e}")
+
+    # --- Shared state replication ---
+
+    @staticmethod
+    def _fingerprint(state: dict) -> Dict[str, str]:
+        return {k: json.dumps(v, sort_keys=True) for k, v in state.items()}
+
+    @contextlib.contextmanager
+    def track_changes(self):
+        if self._export_state is None:
+            yield
+            return
+        state = self._export_state()
+        tracker = (self._fingerprint(state), {k: v for k, v in state.items() if self._is_counter(k)})
+        self._trackers.append(tracker)
+        try:
+            yield
+        finally:
+            self._trackers = [t for t in self._trackers if t is not tracker]
+            before, counters = tracker
+            after = self._export_state()
+            patch, increments = {}, {}
+            for key, value in after.items():
+                if key in counters:
+                    if value != counters[key]:
+                        increments[key] = value - counters[key]
+                elif json.dumps(value, sort_keys=True) != before.get(key):
+                    patch[key] = value
+            deleted = [key for key in before if key not in after]
+            if patch or deleted or increments:
+                self.publish("state", {"set": patch, "del": deleted, "add": increments})
+
+    def _apply_state(self, payload: dict):
+        patch, deleted, increments = payload.get("set") or {}, payload.get("del") or [], payload.get("add") or {}
+        if self._import_state is None or not (patch or deleted or increments):
+            return
+        self._import_state(patch, deleted, increments)
+        # Remote changes must not be re-published by blocks that are still running;
+        # their own changes of other keys (and their own increments) still are
+        fingerprint = self._fingerprint(patch)
+        for before, counters in self._trackers:
+            before.update(fingerprint)
+            for key in deleted:
+                before.pop(key, None)
+            for key, value in patch.items():
+                if key in counters:
+                    counters[key] = value
+            for key, increment in increments.items():
+                if key in counters:
+                    counters[key] += increment
+
+
+def create_backend() -> LocalBackend:
+    if settings.STATE_BACKEND == "unix":
+        return UnixSocketBackend(settings.STATE_SOCKET_PATH)
+    return LocalBackend()
+
+
+state_backend = create_backend()
@@ -0,0 +1,164 @@
+"""
+Rule-based censor: the local fast path in front of llm_config_censor.
+
+Panic mode used to send every message to the censor LLM, and auto-panic turns
+on all sessions at once, so the LLM got a burst of calls exactly when the
+system was overheating. RuleCensor rewrites a message deterministically:
+
+- e-mails, numbers and lore ids (U01, A03, S01...) are scrubbed,
+- lore citizen names (lore-web users.json) become the role vocabulary
+  ("Subjekt", "Operátor", "Správce"),
+- `blocked` phrases are replaced, `escalate` phrases mark the message as
+  undecided (the rules cannot produce a safe answer on their own).
+
+The censor mode is set per session (GameState.censor_modes, default
+GameState.censor_mode):
+  llm    - every message goes to the LLM (previous behaviour)
+  hybrid - rules first, LLM only for undecided messages
+  rules  - rules only, undecided messages get the panic fallback text
+"""
+
+import enum
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .lore_repository import lore_repository
+
+DEFAULT_CENSOR_RULES = {
+    "blocked": ["heslo", "password", "adresa", "rodné číslo", "telefon"],
+    "escalate": ["jsi člověk", "nejsi ai", "jsi robot", "kdo jsi", "kdo to píše"],
+    "blocked_replacement": "[REDIGOVÁNO]",
+    "number_replacement": "███",
+    "email_replacement": "[ZAŠIFROVÁNO]",
+}
+
+# Lore role type -> replacement for names and ids of that role
+ROLE_VOCABULARY = {"user": "Subjekt", "agent": "Operátor", "admin": "Správce"}
+_ID_ROLE = {"U": "user", "A": "agent", "S": "admin"}
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_LORE_ID_RE = re.compile(r"\b([UAS])\d{1,3}\b")
+# Phone numbers, amounts, ids: runs of 3+ digits (optionally separated by spaces/dashes)
+_NUMBER_RE = re.compile(r"\+?\d(?:[\d \-]*\d){2,}")
+
+
+class CensorMode(str, enum.Enum):
+    LLM = "llm"
+    HYBRID = "hybrid"
+    RULES = "rules"
+
+
+class CensorVerdict:
+    """Result of the rule pass. `decided` False = the LLM (or fallback) has to answer."""
+    __slots__ = ("text", "decided", "hits")
+
+    def __init__(self, text: str, decided: bool, hits: int):
+        self.text = text
+        self.decided = decided
+        self.hits = hits
+
+
+def _phrase_pattern(phrases: List[str]) -> Optional[re.Pattern]:
+    phrases = [p.strip() for p in phrases or [] if p and p.strip()]
+    if not phrases:
+        return None
+    alternatives = "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternatives})\b", re.IGNORECASE)
+
+
+def _name_tokens(full_name: str) -> List[str]:
+    # Drop academic titles and suffixes ("Ing.", "Bc.", "ml.")
+    return [t for t in full_name.split() if not t.endswith(".")]
+
+
+def lore_names(records: List[dict]) -> Dict[str, str]:
+    """Name regex fragment -> role vocabulary. Surnames match their declined forms."""
+    names = {}
+    for record in records:
+        tokens = _name_tokens(record.get("obcanske_jmeno") or "")
+        if not tokens:
+            continue
+        replacement = ROLE_VOCABULARY.get(record.get("type"), ROLE_VOCABULARY["user"])
+        names[re.escape(" ".join(tokens))] = replacement
+        surname = tokens[-1]
+        if len(surname) >= 5:
+            names[re.escape(surname[:-1]) + r"\w*"] = replacement
+        elif len(surname) >= 3:
+            names[re.escape(surname)] = replacement
+    return names
+
+
+class RuleCensor:
+    def __init__(self, rules: dict, names: Optional[Dict[str, str]] = None):
+        rules = {**DEFAULT_CENSOR_RULES, **(rules or {})}
+        self.blocked = _phrase_pattern(rules["blocked"])
+        self.escalate = _phrase_pattern(rules["escalate"])
+        self.blocked_replacement = rules["blocked_replacement"]
+        self.number_replacement = rules["number_replacement"]
+        self.email_replacement = rules["email_replacement"]
+        self.names = names or {}
+        self._name_re = None
+        if self.names:
+            # One group per replacement; alternatives longest first so a full name wins over the
+            # bare surname. The lookahead skips positions no name can start at (keeps it fast).
+            groups = {}
+            for fragment in sorted(self.names, key=len, reverse=True):
+                groups.setdefault(self.names[fragment], []).append(fragment)
+            self._name_groups = {f"g{i}": replacement for i, replacement in enumerate(groups)}
+            alternatives = "|".join(
+                f"(?P<g{i}>{'|'.join(fragments)})" for i, fragments in enumerate(groups.values())
+            )
+            initials = "".join(sorted({re.escape(f.lstrip("\\")[0]) for f in self.names}))
+            self._name_re = re.compile(rf"\b(?=[{initials}])(?:{alternatives})\b")
+
+    def check(self, text: str, context: Optional[str] = None) -> CensorVerdict:
+        """Scrub `text`; `context` (e.g. the question being answered) is only checked for escalation."""
+        if self.escalate and any(self.escalate.search(t) for t in (text, context) if t):
+            decided = False
+        else:
+            decided = True
+        if not text:
+            return CensorVerdict(text or "", decided, 0)
+        hits = 0
+
+        # Replacements are admin-set plain text, never regex templates
+        text, n = _EMAIL_RE.subn(lambda _: self.email_replacement, text)
+        hits += n
+        text, n = _LORE_ID_RE.subn(lambda m: ROLE_VOCABULARY[_ID_ROLE[m.group(1)]], text)
+        hits += n
+        if self._name_re:
+            text, n = self._name_re.subn(lambda m: self._name_groups[m.lastgroup], text)
+            hits += n
+        text, n = _NUMBER_RE.subn(lambda _: self.number_replacement, text)
+        hits += n
+        if self.blocked:
+            text, n = self.blocked.subn(lambda _: self.blocked_replacement, text)
+            hits += n
+        return CensorVerdict(text, decided, hits)
+
+
+# id(rules dict) -> (rules dict, lore users revision, compiled censor)
+_cache: Dict[int, Tuple[dict, int, RuleCensor]] = {}
+
+
+def _lore_users() -> Tuple[int, List[dict]]:
+    try:
+        users = lore_repository.get("users")
+    except (FileNotFoundError, ValueError):
+        return -1, []
+    return users.revision, users.records
+
+
+def get_rule_censor(rules: dict) -> RuleCensor:
+    """Compiled censor for a rules dict; rebuilt when the dict is replaced or the lore users change."""
+    revision, records = _lore_users()
+    cached = _cache.get(id(rules))
+    if cached and cached[0] is rules and cached[1] == revision:
+        return cached[2]
+    if revision < 0:
+        print("WARN: Censor rules compiled without lore names (users.json unavailable)")
+    if len(_cache) > 32:
+        _cache.clear()
+    censor = RuleCensor(rules, lore_names(records))
+    _cache[id(rules)] = (rules, revision, censor)
+    return censor
@@ -1,7 +1,11 @@
-from typing import Optional
+from typing import List, Optional
+from sqlalchemy import literal, select, update
 from sqlalchemy.orm import Session
-from ..database import SessionLocal, Task, TaskStatus, User
-from .gamestate import gamestate
+from ..database import SessionLocal, Task, TaskStatus, User, UserRole
+from .gamestate import get_gamestate
+from .ledger import apply_credits, record_bulk, record_treasury
+
+PAYABLE_STATUSES = (TaskStatus.SUBMITTED, TaskStatus.ACTIVE, TaskStatus.COMPLETED)
 
 def process_task_payment(task_id: int, rating: int, db: Optional[Session] = None):
     """
@@ -24,7 +28,7 @@ def process_task_payment(task_id: int, rating: int, db: Optional[Session] = None
         if task.status == TaskStatus.PAID:
             return {"error": "Task already paid"}
 
-        if task.status not in [TaskStatus.SUBMITTED, TaskStatus.ACTIVE, TaskStatus.COMPLETED]:
+        if task.status not in PAYABLE_STATUSES:
             return {"error": "Task is not ready for payment"}
             
         # Calculate Reward
@@ -33,18 +37,27 @@ def process_task_payment(task_id: int, rating: int, db: Optional[Session] = None
         safe_rating = max(0, rating)
         actual_reward = int(base_reward * (safe_rating / 100.0))
         
+        # Tax and treasury belong to the task owner's game instance
+        user = db.query(User).filter(User.id == task.user_id).first()
+        gamestate = get_gamestate(user.instance_id if user else None)
+
         # Calculate Tax
         tax_amount = int(actual_reward * gamestate.tax_rate)
         net_reward = actual_reward - tax_amount
         
+        # Claim the task atomically: of two concurrent payments only one flips the status
+        claimed = db.query(Task).filter(Task.id == task_id, Task.status.in_(PAYABLE_STATUSES)).update(
+            {Task.status: TaskStatus.PAID, Task.final_rating: safe_rating}, synchronize_session="fetch"
+        )
+        if not claimed:
+            db.rollback()
+            return {"error": "Task already paid"}
+
         # Update User
-        user = db.query(User).filter(User.id == task.user_id).first()
         if user:
-            user.credits += net_reward
-
-        # Update Task
-        task.final_rating = safe_rating
-        task.status = TaskStatus.PAID
+            apply_credits(db, user.id, net_reward, "task_payout", f"task #{task_id}")
+        record_treasury(db, gamestate.instance_id, tax_amount, gamestate.treasury_balance + tax_amount,
+                        "tax", f"task #{task_id}")
 
         # Commit DB changes first — only update treasury if DB succeeds
         db.commit()
@@ -66,3 +79,26 @@ def process_task_payment(task_id: int, rating: int, db: Optional[Session] = None
     finally:
         if owns_session:
             db.close()
+
+
+def bulk_update_players(db: Session, instance_id: str, reason: str, **values) -> List[tuple]:
+    """
+    Set-based update of every player (UserRole.USER) of a game instance, e.g.
+    credits=User.credits + 50 or credits=100, is_locked=False.
+    One UPDATE statement (plus one ledger INSERT ... SELECT when credits change);
+    new balances come back via RETURNING where the dialect supports it (SQLite,
+    PostgreSQL), otherwise via one re-select.
+    Returns [(user_id, credits, is_locked)]. The caller commits.
+    """
+    where = (User.role == UserRole.USER, User.instance_id == instance_id)
+    if "credits" in values:
+        new_credits = values["credits"]
+        if isinstance(new_credits, int):
+            new_credits = literal(new_credits)
+        record_bulk(db, where, new_credits - User.credits, new_credits, reason)
+    stmt = update(User).where(*where).values(**values)
+    returned = (User.id, User.credits, User.is_locked)
+    if db.get_bind().dialect.update_returning:
+        return [tuple(row) for row in db.execute(stmt.returning(*returned)).all()]
+    db.execute(stmt)
+    return [tuple(row) for row in db.execute(select(*returned).where(*where)).all()]
@@ -0,0 +1,115 @@
+"""
+Background scoring of submitted tasks.
+
+Every task that reaches SUBMITTED is queued; EVALUATION_CONCURRENCY workers
+rate it with the instance's llm_config_task (LLMService.evaluate_submission)
+and store the result as Task.suggested_rating. Each score is pushed to the
+admins as an admin_task_delta, so the dashboard can rank the submitted column
+before anyone opens a task. Grading itself stays manual (grade_task).
+
+No DB session is held while waiting for the LLM. A failed evaluation (provider
+error, mock reply, anything but a single 0-100 number) leaves the rating NULL;
+such tasks are picked up again by the next startup backlog scan. Without an API
+key for the configured provider the task is not sent to the LLM at all.
+"""
+
+import asyncio
+from typing import List, Optional, Set
+
+from sqlalchemy import update
+
+from ..config import settings
+from ..database import SessionLocal, Task, TaskStatus, User
+from .gamestate import get_gamestate
+from .llm_core import llm_service
+from .task_feed import push_task_delta_by_id
+
+
+class EvaluationQueue:
+    def __init__(self, concurrency: int = settings.EVALUATION_CONCURRENCY):
+        self.concurrency = concurrency
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued: Set[int] = set()
+        self._workers: List[asyncio.Task] = []
+
+    def start(self, backlog: bool = True):
+        """Spawn the workers; `backlog` queues SUBMITTED tasks that have no rating yet."""
+        if self.concurrency <= 0 or self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        if backlog:
+            db = SessionLocal()
+            try:
+                pending = db.query(Task.id).filter(
+                    Task.status == TaskStatus.SUBMITTED, Task.suggested_rating.is_(None)
+                ).order_by(Task.id).all()
+            finally:
+                db.close()
+            for (task_id,) in pending:
+                self.enqueue(task_id)
+
+    def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        self._queue = None
+        self._queued.clear()
+
+    def enqueue(self, task_id: int):
+        """Queue a task for scoring (no-op if already queued or the queue is not running)."""
+        if self._queue is None or task_id in self._queued:
+            return
+        self._queued.add(task_id)
+        self._queue.put_nowait(task_id)
+
+    @property
+    def pending(self) -> int:
+        return len(self._queued)
+
+    async def _worker(self):
+        while True:
+            task_id = await self._queue.get()
+            try:
+                await self.evaluate(task_id)
+            except Exception as e:
+                print(f"WARN: Evaluation of task #{task_id} failed: {e}")
+            finally:
+                self._queued.discard(task_id)
+                self._queue.task_done()
+
+    async def evaluate(self, task_id: int) -> Optional[int]:
+        """Score one task and store/push the suggested rating. Returns it (None if skipped/failed)."""
+        db = SessionLocal()
+        try:
+            task = db.query(Task).filter(Task.id == task_id).first()
+            if not task or task.status != TaskStatus.SUBMITTED:
+                return None
+            prompt, submission = task.prompt_desc or "", task.submission_content or ""
+            instance_id = db.query(User.instance_id).filter(User.id == task.user_id).scalar()
+        finally:
+            db.close()
+
+        config = get_gamestate(instance_id).llm_config_task
+        if not llm_service.has_key(config.provider):
+            return None
+        rating = await llm_service.evaluate_submission(prompt, submission, config, default=None)
+        if rating is None:
+            return None
+
+        db = SessionLocal()
+        try:
+            # Graded meanwhile -> keep the row as it is
+            stored = db.execute(
+                update(Task).where(Task.id == task_id, Task.status == TaskStatus.SUBMITTED)
+                .values(suggested_rating=rating)
+            ).rowcount
+            db.commit()
+        finally:
+            db.close()
+        if stored:
+            await push_task_delta_by_id(task_id)
+        return rating
+
+
+evaluation_queue = EvaluationQueue()
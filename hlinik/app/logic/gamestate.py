@@ -1,6 +1,8 @@
-from ..config import settings
+from ..config import settings, BASE_DIR
 from .llm_core import LLMConfig, LLMProvider
-from typing import Dict, List, Optional
+from .backend import state_backend
+from .censor import CensorMode, DEFAULT_CENSOR_RULES
+from typing import Dict, Iterable, List, Optional, Tuple
 import enum
 import asyncio
 import json
@@ -64,19 +66,43 @@ class HyperVisibilityMode(str, enum.Enum):
     EPHEMERAL = "ephemeral"
 
 class GameState:
-    _instance = None
+    # One GameState per game instance: {instance_id: GameState}
+    _instances: Dict[str, "GameState"] = {}
+
+    # Fields replicated between uvicorn workers by the multi-process backend (logic/backend.py)
+    SHARED_FIELDS = (
+        "global_shift_offset", "temperature", "TEMP_MIN", "TEMP_THRESHOLD", "TEMP_RESET_VALUE",
+        "power_capacity", "power_load", "is_overloaded", "power_boost_end_time",
+        "treasury_balance", "tax_rate", "report_reward", "agent_response_window",
+        "task_reward_default", "task_reward_low", "task_reward_mid", "task_reward_high", "task_reward_party",
+        "optimizer_active", "optimizer_prompt",
+        "COST_BASE", "COST_PER_USER", "COST_PER_AUTOPILOT", "COST_LOW_LATENCY", "COST_OPTIMIZER_ACTIVE",
+        "test_mode", "language_mode", "custom_labels", "auto_panic_engaged",
+        "censor_mode", "censor_rules",
+    )
+    # Changed by several workers at once (tax, purchases): replicated as increments
+    SHARED_COUNTERS = ("treasury_balance",)
+    # Per-session dicts, replicated per session entry (int keys become strings in JSON)
+    SHARED_SESSION_DICTS = (
+        "active_autopilots", "hyper_histories", "pending_responses",
+        "timed_out_sessions", "latest_user_messages", "panic_modes", "censor_modes",
+    )
+    SHARED_LLM_CONFIGS = ("llm_config_task", "llm_config_hyper", "llm_config_optimizer", "llm_config_censor")
     
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(GameState, cls).__new__(cls)
-            cls._instance.initialized = False
-        return cls._instance
+    def __new__(cls, instance_id: str = settings.DEFAULT_INSTANCE):
+        if instance_id not in cls._instances:
+            instance = super(GameState, cls).__new__(cls)
+            instance.initialized = False
+            cls._instances[instance_id] = instance
+        return cls._instances[instance_id]
     
 
-    def __init__(self):
+    def __init__(self, instance_id: str = settings.DEFAULT_INSTANCE):
         if self.initialized:
             return
 
+        self.instance_id = instance_id
+        self.total_sessions = settings.GAME_INSTANCES.get(instance_id, settings.TOTAL_SESSIONS)
         self.global_shift_offset = settings.DEFAULT_GLOBAL_SHIFT_OFFSET
         self.hyper_visibility_mode = HyperVisibilityMode.NORMAL
         
@@ -139,6 +165,10 @@ class GameState:
         )
         self.llm_config_censor = self._default_censor_config()
 
+        # Panic censor: rule engine in front of llm_config_censor (logic/censor.py)
+        self.censor_mode = self._default_censor_mode()
+        self.censor_rules = dict(DEFAULT_CENSOR_RULES)
+
         self.test_mode = False # v1.9 Test Mode
         
         # Translation System
@@ -153,6 +183,7 @@ class GameState:
         self.timed_out_sessions: Dict[int, float] = {}
         self.latest_user_messages: Dict[int, str] = {}
         self.panic_modes: Dict[int, Dict[str, bool]] = {}
+        self.censor_modes: Dict[int, str] = {}
         
         self.initialized = True
         
@@ -226,13 +257,35 @@ class GameState:
         return self.temperature
         
     def increment_shift(self):
-        self.global_shift_offset = (self.global_shift_offset + 1) % settings.TOTAL_SESSIONS
+        self.global_shift_offset = (self.global_shift_offset + 1) % self.total_sessions
         return self.global_shift_offset
 
     def set_shift(self, value: int):
-        self.global_shift_offset = value % settings.TOTAL_SESSIONS
+        self.global_shift_offset = value % self.total_sessions
         return self.global_shift_offset
 
+    def session_for_agent(self, agent_logical_id: int) -> int:
+        """Session the agent currently serves: SessionIndex = (AgentIndex + Shift) % Total."""
+        return (agent_logical_id - 1 + self.global_shift_offset) % self.total_sessions + 1
+
+    def agent_for_session(self, session_id: int) -> int:
+        """Agent currently mapped to the session: AgentIndex = (SessionID - 1 - Shift) % Total."""
+        return (session_id - 1 - self.global_shift_offset) % self.total_sessions + 1
+
+    @property
+    def is_default(self) -> bool:
+        return self.instance_id == settings.DEFAULT_INSTANCE
+
+    @property
+    def state_file(self):
+        """Persistence file (data/gamestate.json, data/gamestate_<instance>.json)."""
+        name = "gamestate.json" if self.is_default else f"gamestate_{self.instance_id}.json"
+        return BASE_DIR / "data" / name
+
+    def scoped_username(self, username: str) -> str:
+        """Account name inside this instance: 'agent3' -> 'rehearsal_agent3' (default instance unprefixed)."""
+        return username if self.is_default else f"{self.instance_id}_{username}"
+
     def reset_state(self):
         """Resets all transient game state to defaults."""
         self.global_shift_offset = settings.DEFAULT_GLOBAL_SHIFT_OFFSET
@@ -277,6 +330,8 @@ class GameState:
             system_prompt=DEFAULT_PROMPT_OPTIMIZER
         )
         self.llm_config_censor = self._default_censor_config()
+        self.censor_mode = self._default_censor_mode()
+        self.censor_rules = dict(DEFAULT_CENSOR_RULES)
         self.custom_labels = {}
         self.auto_panic_engaged = False
         
@@ -287,6 +342,7 @@ class GameState:
         self.timed_out_sessions = {}
         self.latest_user_messages = {}
         self.panic_modes = {}
+        self.censor_modes = {}
 
     def _default_censor_config(self) -> LLMConfig:
         return LLMConfig(
@@ -295,6 +351,13 @@ class GameState:
             system_prompt=DEFAULT_PROMPT_CENSOR
         )
 
+    def _default_censor_mode(self) -> str:
+        try:
+            return CensorMode(settings.CENSOR_MODE).value
+        except ValueError:
+            print(f"WARN: Unknown IRIS_CENSOR_MODE '{settings.CENSOR_MODE}', using llm")
+            return CensorMode.LLM.value
+
     def get_default_task_reward(self, status_level):
         """Return the baseline task reward for a given user status level."""
         try:
@@ -370,6 +433,31 @@ class GameState:
             raw = state_data.get("active_autopilots", {})
             self.active_autopilots = {int(k): v for k, v in raw.items()}
 
+    def export_shared_state(self) -> dict:
+        """Export the state shared between workers as JSON-compatible values."""
+        state = {name: getattr(self, name) for name in self.SHARED_FIELDS}
+        state["hyper_visibility_mode"] = self.hyper_visibility_mode.value
+        state["chernobyl_mode"] = self.chernobyl_mode.value
+        for name in self.SHARED_SESSION_DICTS:
+            state[name] = {str(k): v for k, v in getattr(self, name).items()}
+        for name in self.SHARED_LLM_CONFIGS:
+            state[name] = getattr(self, name).model_dump(mode="json")
+        return state
+
+    def import_shared_state(self, state: dict):
+        """Apply a (partial) shared state received from another worker."""
+        for name, value in state.items():
+            if name in self.SHARED_FIELDS:
+                setattr(self, name, value)
+            elif name in self.SHARED_SESSION_DICTS:
+                setattr(self, name, {int(k): v for k, v in value.items()})
+            elif name in self.SHARED_LLM_CONFIGS:
+                setattr(self, name, LLMConfig(**value))
+            elif name == "hyper_visibility_mode":
+                self.hyper_visibility_mode = HyperVisibilityMode(value)
+            elif name == "chernobyl_mode":
+                self.chernobyl_mode = ChernobylMode(value)
+
     # --- Methods moved from routing.py ---
 
     def set_panic_mode(self, session_id: int, role: str, enabled: bool):
@@ -384,9 +472,28 @@ class GameState:
         if session_id in self.panic_modes:
             del self.panic_modes[session_id]
 
+    def set_censor_mode(self, session_id: Optional[int], mode: Optional[str]):
+        """Censor mode of one session (None = instance default); mode None drops the override."""
+        if mode is not None:
+            mode = CensorMode(mode).value
+        if session_id is None:
+            self.censor_mode = mode or self._default_censor_mode()
+        elif mode is None:
+            self.censor_modes.pop(session_id, None)
+        else:
+            self.censor_modes[session_id] = mode
+
+    def get_censor_mode(self, session_id: int) -> CensorMode:
+        return CensorMode(self.censor_modes.get(session_id, self.censor_mode))
+
     def start_pending_response(self, session_id: int):
         self.pending_responses[session_id] = time.time()
         
+    def extend_pending_response(self, session_id: int, seconds: float):
+        """Give back response time the agent could not use (e.g. waiting for the optimizer)."""
+        if session_id in self.pending_responses:
+            self.pending_responses[session_id] += seconds
+
     def clear_pending_response(self, session_id: int):
         if session_id in self.pending_responses:
             del self.pending_responses[session_id]
@@ -408,4 +515,58 @@ class GameState:
     def get_last_user_message(self, session_id: int) -> Optional[str]:
         return self.latest_user_messages.get(session_id)
 
+def get_gamestate(instance_id: Optional[str] = None) -> GameState:
+    return GameState(instance_id or settings.DEFAULT_INSTANCE)
+
+def all_gamestates() -> List[GameState]:
+    return list(GameState._instances.values())
+
+def export_all_shared_state() -> dict:
+    """
+    Shared state of every instance, flattened to "<instance>/<field>" keys and, for the
+    session dicts, "<instance>/<dict>/<session id>" keys (the backend diffs per key).
+    """
+    state = {}
+    for game in all_gamestates():
+        for name, value in game.export_shared_state().items():
+            if name in GameState.SHARED_SESSION_DICTS:
+                for session_id, entry in value.items():
+                    state[f"{game.instance_id}/{name}/{session_id}"] = entry
+            else:
+                state[f"{game.instance_id}/{name}"] = value
+    return state
+
+def _split_shared_key(key: str) -> Tuple[str, str, Optional[int]]:
+    instance_id, _, name = key.partition("/")
+    name, _, session_id = name.partition("/")
+    return instance_id, name, int(session_id) if session_id else None
+
+def import_all_shared_state(state: dict, deleted: Iterable[str] = (), increments: Optional[dict] = None):
+    """Apply a patch from another worker: changed keys, removed session entries, counter increments."""
+    per_instance: Dict[str, dict] = {}
+    for key, value in state.items():
+        instance_id, name, session_id = _split_shared_key(key)
+        if session_id is None:
+            per_instance.setdefault(instance_id, {})[name] = value
+        elif name in GameState.SHARED_SESSION_DICTS:
+            getattr(get_gamestate(instance_id), name)[session_id] = value
+    for instance_id, instance_state in per_instance.items():
+        get_gamestate(instance_id).import_shared_state(instance_state)
+    for key in deleted:
+        instance_id, name, session_id = _split_shared_key(key)
+        if session_id is not None and name in GameState.SHARED_SESSION_DICTS:
+            getattr(get_gamestate(instance_id), name).pop(session_id, None)
+    for key, increment in (increments or {}).items():
+        instance_id, name, _ = _split_shared_key(key)
+        if name in GameState.SHARED_COUNTERS:
+            game = get_gamestate(instance_id)
+            setattr(game, name, getattr(game, name) + increment)
+
+def is_shared_counter(key: str) -> bool:
+    return _split_shared_key(key)[1] in GameState.SHARED_COUNTERS
+
+# Default instance (single-game setups and legacy imports)
 gamestate = GameState()
+for _instance_id in settings.GAME_INSTANCES:
+    get_gamestate(_instance_id)
+state_backend.bind_state(export_all_shared_state, import_all_shared_state, is_shared_counter)
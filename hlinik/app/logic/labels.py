@@ -0,0 +1,107 @@
+"""
+Versioned in-memory store of admin-defined terminal labels (data/admin_labels.json).
+
+The file is read once; admin endpoints update the store, which writes the file
+atomically and returns only the keys that changed so they can be pushed to the
+terminals. The version is a checksum of the content, so it is identical across
+restarts and workers and clients can keep a cached copy (see websocket_endpoint).
+"""
+
+import json
+import os
+import zlib
+from typing import Dict, Optional
+
+from ..config import BASE_DIR
+from .backend import state_backend
+
+LABELS_PATH = BASE_DIR / "data" / "admin_labels.json"
+
+
+class LabelStore:
+    def __init__(self, path=LABELS_PATH):
+        self.path = path
+        self._labels: Optional[Dict[str, str]] = None
+        self.version = 0
+
+    @staticmethod
+    def _checksum(labels: Dict[str, str]) -> int:
+        return zlib.crc32(json.dumps(labels, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+
+    def _load(self):
+        labels = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    labels = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"WARN: Could not load labels: {e}")
+        self._set(labels)
+
+    def _set(self, labels: Dict[str, str]):
+        self._labels = labels
+        self.version = self._checksum(labels) if labels else 0
+
+    @property
+    def labels(self) -> Dict[str, str]:
+        if self._labels is None:
+            self._load()
+        return self._labels
+
+    def get_version(self) -> int:
+        self.labels  # Make sure the file was loaded
+        return self.version
+
+    def _write(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not self._labels:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._labels, f)
+        os.replace(tmp_path, self.path)
+
+    def replace(self, labels: Dict[str, str]) -> Dict[str, Optional[str]]:
+        """Replace all labels. Returns changed keys (removed keys map to None)."""
+        current = self.labels
+        changes = {k: v for k, v in labels.items() if current.get(k) != v}
+        changes.update({k: None for k in current if k not in labels})
+        if changes:
+            self._set(dict(labels))
+            self._write()
+            self._publish(changes)
+        return changes
+
+    def clear(self) -> Dict[str, Optional[str]]:
+        return self.replace({})
+
+    def update_message(self, changes: Dict[str, Optional[str]]) -> str:
+        """WebSocket payload with the changed keys only."""
+        return json.dumps({"type": "labels_update", "version": self.version, "changes": changes})
+
+    def connect_message(self, client_version: Optional[int] = None) -> str:
+        """Payload sent on connect; clients with a current cache get the version only."""
+        version = self.get_version()
+        if client_version == version:
+            return json.dumps({"type": "labels_update", "version": version, "current": True})
+        return json.dumps({"type": "labels_update", "version": version, "labels": self.labels})
+
+    # --- Multi-worker: other workers only refresh their in-memory copy ---
+
+    def _publish(self, changes: Dict[str, Optional[str]]):
+        state_backend.publish("labels", {"changes": changes})
+
+    def _apply_remote(self, payload: dict, origin: int):
+        labels = dict(self.labels)
+        for key, value in payload.get("changes", {}).items():
+            if value is None:
+                labels.pop(key, None)
+            else:
+                labels[key] = value
+        self._set(labels)
+
+
+label_store = LabelStore()
+state_backend.on("labels", label_store._apply_remote)
@@ -0,0 +1,109 @@
+"""
+Credit ledger: every change of a player's credits is one append-only CreditLedger row.
+
+Balances are changed inside the database (`credits = credits + :delta`) instead
+of read-modify-write on ORM objects, so concurrent handlers cannot overwrite
+each other's rewards. User.credits stays the materialized balance;
+reconcile() checks it against the sum of the user's ledger entries (starting
+with an "opening" entry, see open_accounts).
+
+Treasury movements are recorded with user_id NULL for auditing; the treasury
+balance itself lives in GameState and is only changed synchronously on the
+event loop.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, insert, literal, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..database import CreditLedger, User, UserRole
+
+
+def _returning(db: Session) -> bool:
+    # SQLite / PostgreSQL: RETURNING; MySQL/MariaDB: re-select in the same transaction
+    return db.get_bind().dialect.update_returning
+
+
+def apply_credits(db: Session, user_id: int, delta: int, reason: str, note: Optional[str] = None) -> Optional[int]:
+    """
+    Atomically add `delta` to a user's credits and append a ledger entry.
+    Returns the new balance (None if the user does not exist). The caller commits.
+    """
+    stmt = (
+        update(User).where(User.id == user_id).values(credits=User.credits + delta)
+        .execution_options(synchronize_session=False)
+    )
+    if _returning(db):
+        row = db.execute(stmt.returning(User.credits, User.instance_id)).first()
+    else:
+        row = None
+        if db.execute(stmt).rowcount:
+            row = db.execute(select(User.credits, User.instance_id).where(User.id == user_id)).first()
+    if row is None:
+        return None
+    credits, instance_id = row
+
+    db.add(CreditLedger(instance_id=instance_id, user_id=user_id, delta=delta, balance=credits,
+                        reason=reason, note=note))
+    # Keep a loaded User object (if any) in step without another query
+    user = db.identity_map.get(db.identity_key(User, user_id))
+    if user is not None:
+        set_committed_value(user, "credits", credits)
+    return credits
+
+
+def record_bulk(db: Session, where: tuple, delta, balance, reason: str, note: Optional[str] = None):
+    """
+    Ledger entries for the users matching `where` in one INSERT ... SELECT.
+    `delta` and `balance` are SQL expressions over the current row; for a
+    set-based update run this just before the UPDATE, in the same transaction.
+    """
+    now = datetime.utcnow()
+    source = select(
+        User.instance_id, User.id, delta, balance,
+        literal(reason), literal(note), literal(now),
+    ).where(*where)
+    db.execute(insert(CreditLedger).from_select(
+        ["instance_id", "user_id", "delta", "balance", "reason", "note", "timestamp"], source
+    ))
+
+
+def record_treasury(db: Session, instance_id: str, delta: int, balance: int, reason: str, note: Optional[str] = None):
+    db.add(CreditLedger(instance_id=instance_id, user_id=None, delta=delta, balance=balance,
+                        reason=reason, note=note))
+
+
+def open_accounts(db: Session) -> int:
+    """Opening entries (current balance) for players without any ledger entry. Returns how many."""
+    has_entries = select(CreditLedger.id).where(CreditLedger.user_id == User.id).exists()
+    where = (User.role == UserRole.USER, ~has_entries)
+    count = db.query(User).filter(*where).count()
+    if count:
+        record_bulk(db, where, User.credits, User.credits, "opening")
+        db.commit()
+    return count
+
+
+def reconcile(db: Session, instance_id: Optional[str] = None) -> List[Dict]:
+    """Players whose materialized balance differs from the sum of their ledger."""
+    ledger_sum = (
+        select(CreditLedger.user_id, func.sum(CreditLedger.delta).label("total"))
+        .where(CreditLedger.user_id.is_not(None))
+        .group_by(CreditLedger.user_id)
+        .subquery()
+    )
+    query = (
+        select(User.id, User.username, User.credits, ledger_sum.c.total)
+        .outerjoin(ledger_sum, ledger_sum.c.user_id == User.id)
+        .where(User.role == UserRole.USER)
+    )
+    if instance_id is not None:
+        query = query.where(User.instance_id == instance_id)
+    return [
+        {"user_id": user_id, "username": username, "credits": credits, "ledger_balance": total}
+        for user_id, username, credits, total in db.execute(query)
+        if total is None or total != credits
+    ]
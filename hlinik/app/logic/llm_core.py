@@ -1,4 +1,5 @@
 import os
+import re
 from enum import Enum
 from typing import List, Dict, Optional
 from pydantic import BaseModel
@@ -7,6 +8,18 @@ from openai import AsyncOpenAI
 from ..config import settings
 from ..database import SessionLocal, SystemConfig
 
+# Used when task generation fails (no API key, provider error)
+DEFAULT_TASK_DESCRIPTION = "Proveďte analýzu aktuálního stavu systému a navrhněte zlepšení."
+
+# A rating reply must be just the number ("85", "85.", "85/100")
+_RATING_RE = re.compile(r"^(\d{1,3})\s*(?:/\s*100)?\.?$")
+
+
+def is_failed_reply(text: str) -> bool:
+    """True for the placeholders generate_response returns instead of a model answer."""
+    return text.startswith("[MOCK ") or text.startswith("[SYSTEM ERROR")
+
+
 class LLMProvider(str, Enum):
     OPENAI = "openai"
     GEMINI = "gemini"
@@ -30,6 +43,9 @@ class LLMService:
         key_name = f"{provider.value.upper()}_API_KEY"
         return getattr(settings, key_name, None)
 
+    def has_key(self, provider: LLMProvider) -> bool:
+        return bool(self._get_key(provider))
+
     async def list_models(self, provider: LLMProvider) -> List[str]:
         api_key = self._get_key(provider)
         if not api_key:
@@ -86,7 +102,9 @@ class LLMService:
             print(f"LLM Generation Error: {e}")
             return f"[SYSTEM ERROR: {str(e)}]"
 
-    async def evaluate_submission(self, prompt: str, submission: str, config: Optional[LLMConfig] = None) -> int:
+    async def evaluate_submission(self, prompt: str, submission: str, config: Optional[LLMConfig] = None,
+                                  default: Optional[int] = 50) -> Optional[int]:
+        """Rating 0-100; `default` when no provider is available or the answer is not a single number."""
         full_user_prompt = f"TASK PROMPT: {prompt}\nUSER SUBMISSION: {submission}\n\nRate the submission from 0 to 100 based on creativity and relevance. Return ONLY the number."
         
         try:
@@ -101,13 +119,17 @@ class LLMService:
                 elif self._get_key(LLMProvider.OPENAI):
                     effective_config = LLMConfig(provider=LLMProvider.OPENAI, model_name="gpt-4o-mini")
                 else:
-                    return 50 # No provider available
-
-            resp = await self.generate_response(effective_config, [{"role": "user", "content": full_user_prompt}])
-            clean_resp = ''.join(filter(str.isdigit, resp))
-            return int(clean_resp) if clean_resp else 50
+                    return default # No provider available
+            elif not self.has_key(effective_config.provider):
+                return default
+
+            resp = (await self.generate_response(effective_config, [{"role": "user", "content": full_user_prompt}])).strip()
+            match = None if is_failed_reply(resp) else _RATING_RE.match(resp)
+            if not match or int(match.group(1)) > 100:
+                return default
+            return int(match.group(1))
         except Exception:
-            return 50
+            return default
 
     async def rewrite_message(self, content: str, instruction: str, config: Optional[LLMConfig] = None) -> str:
         """
@@ -164,10 +186,10 @@ class LLMService:
         
         try:
             result = await self.generate_response(effective_config, history)
-            return result.strip() if result else "Proveďte analýzu aktuálního stavu systému a navrhněte zlepšení."
+            return result.strip() if result else DEFAULT_TASK_DESCRIPTION
         except Exception as e:
             print(f"Task generation error: {e}")
-            return "Proveďte analýzu aktuálního stavu systému a navrhněte zlepšení."
+            return DEFAULT_TASK_DESCRIPTION
 
     async def _generate_openai(self, api_key: str, config: LLMConfig, history: List[Dict[str, str]]) -> str:
         client = AsyncOpenAI(api_key=api_key)
@@ -0,0 +1,143 @@
+"""
+Compiled lore bundle: the whole editable lore data set in one versioned response.
+
+Contains every EDITABLE_FILES file, relations precomputed per role (same shape
+as iris_generator.get_relations_for_role), the reverse reference index and a
+search token index. The JSON body is pre-encoded and pre-gzipped; the version
+is a hash of the content. Each file's section is cached by the repository
+revision, so after an edit only the changed file is re-serialized.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+from .lore_repository import lore_repository, LoreRepository, LORE_DATA_DIR, reference_source
+
+# Legacy flat relations (source/target) used by the admin dashboard graph
+LEGACY_RELATIONS_PATH = LORE_DATA_DIR / "relations.json"
+
+_TOKEN_RE = re.compile(r"\w{3,}")
+
+
+class CompiledLoreBundle:
+    """Pre-encoded bundle response."""
+    __slots__ = ("version", "etag", "body", "gzip_body")
+
+    def __init__(self, version: str, body: bytes):
+        self.version = version
+        self.etag = f'"{version}"'
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def _dumps(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def relations_for_role(role_id: str, relations: List[dict]) -> List[dict]:
+    """Relations seen from one role's perspective (cf. iris_generator.get_relations_for_role)."""
+    my_relations = []
+    for r in relations:
+        source, target = r.get("source"), r.get("target")
+        if source is None and len(r.get("uzivatele") or []) >= 2:
+            source, target = r["uzivatele"][:2]
+        texts = r.get("texty_uzivatelu") or {}
+        relation_type = r.get("type", r.get("typ_vztahu"))
+        if source == role_id:
+            my_relations.append({"id": r.get("id"), "target": target, "type": relation_type,
+                                 "desc": r.get("desc_source", texts.get(source, ""))})
+        elif target == role_id:
+            my_relations.append({"id": r.get("id"), "target": source, "type": relation_type,
+                                 "desc": r.get("desc_target", texts.get(target, ""))})
+    return my_relations
+
+
+def _search_tokens(lore_file) -> Dict[str, List[str]]:
+    """Lower-cased words of all text values -> record keys ("users/U01")."""
+    tokens: Dict[str, set] = {}
+
+    def walk(obj, record_ref):
+        if isinstance(obj, dict):
+            for value in obj.values():
+                walk(value, record_ref)
+        elif isinstance(obj, list):
+            for item in obj:
+                walk(item, record_ref)
+        elif isinstance(obj, str) and not reference_source(obj):
+            for token in _TOKEN_RE.findall(obj.lower()):
+                tokens.setdefault(token, set()).add(record_ref)
+
+    for record in lore_file.records:
+        walk(record, f"{lore_file.file_key}/{lore_file.record_key(record)}")
+    return {token: sorted(refs) for token, refs in tokens.items()}
+
+
+class LoreBundler:
+    def __init__(self, repository: LoreRepository = lore_repository):
+        self.repository = repository
+        # file key -> (revision, encoded data, search tokens)
+        self._sections: Dict[str, tuple] = {}
+        self._signature: Optional[tuple] = None
+        self._bundle: Optional[CompiledLoreBundle] = None
+        self._legacy_relations = (None, [])  # (mtime, data)
+
+    def _section(self, file_key: str):
+        try:
+            lore_file = self.repository.get(file_key)
+        except (OSError, ValueError) as e:
+            print(f"WARN: Lore bundle skips {file_key}: {e}")
+            return None
+        cached = self._sections.get(file_key)
+        if cached is None or cached[0] != lore_file.revision:
+            cached = (lore_file.revision, _dumps(lore_file.data), _search_tokens(lore_file))
+            self._sections[file_key] = cached
+        return cached
+
+    def get_bundle(self) -> CompiledLoreBundle:
+        """Current bundle; rebuilt only if a source file changed since the last call."""
+        sections = {key: self._section(key) for key in self.repository.files_config}
+        sections = {key: section for key, section in sections.items() if section is not None}
+        signature = tuple((key, section[0]) for key, section in sections.items())
+        if self._bundle is not None and signature == self._signature:
+            return self._bundle
+
+        relations = []
+        if "relations" in sections:
+            relations = self.repository.records("relations")
+        role_ids = [r.get("id") for r in self.repository.records("users")] if "users" in sections else []
+
+        search: Dict[str, List[str]] = {}
+        for _, _, tokens in sections.values():
+            for token, refs in tokens.items():
+                search.setdefault(token, []).extend(refs)
+
+        files_json = ",".join(f"{_dumps(key)}:{section[1]}" for key, section in sections.items())
+        rest_json = ",".join([
+            f'"relations_by_role":{_dumps({role_id: relations_for_role(role_id, relations) for role_id in role_ids})}',
+            f'"references":{_dumps(self.repository.reference_index())}',
+            f'"search":{_dumps(search)}',
+        ])
+        version = hashlib.sha256(f"{files_json}|{rest_json}".encode("utf-8")).hexdigest()[:16]
+        body = f'{{"version":"{version}","files":{{{files_json}}},{rest_json}}}'.encode("utf-8")
+
+        self._bundle = CompiledLoreBundle(version, body)
+        self._signature = signature
+        return self._bundle
+
+    def legacy_relations(self) -> list:
+        """relations.json (not editable; cached by mtime)."""
+        try:
+            mtime = os.stat(LEGACY_RELATIONS_PATH).st_mtime
+        except FileNotFoundError:
+            return []
+        if mtime != self._legacy_relations[0]:
+            with open(LEGACY_RELATIONS_PATH, "r", encoding="utf-8") as f:
+                self._legacy_relations = (mtime, json.load(f))
+        return self._legacy_relations[1]
+
+
+lore_bundler = LoreBundler()
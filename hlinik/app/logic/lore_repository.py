@@ -0,0 +1,378 @@
+"""
+In-memory repository of the editable lore-web JSON files (lore-web/data).
+
+Each file is parsed once and its records are indexed by `id_field`. Reads are
+served from memory; the file is re-parsed only when its mtime changes outside
+of this process (git pull, manual edit, another worker). Changes are written
+back atomically (tmp file + os.replace), debounced so that a burst of edits in
+the lore editor results in one write per file. A failed write keeps the file
+dirty, is retried with backoff (up to MAX_RETRY_DELAY) and is reported as
+`write_error` until a write succeeds.
+
+A reverse reference index (target id -> records/fields pointing at it) is kept
+for all string values matching REFERENCE_PATTERNS and updated with every write.
+"""
+
+import asyncio
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..config import BASE_DIR
+
+# Path to lore-web data directory
+LORE_DATA_DIR = BASE_DIR.parent / "lore-web" / "data"
+
+# Editable JSON files configuration
+EDITABLE_FILES = {
+    "users": {"file": "users.json", "key": "users", "id_field": "id", "display_field": "obcanske_jmeno"},
+    "tasks": {"file": "tasks.json", "key": "tasks", "id_field": "id", "display_field": "nazev"},
+    "relations": {"file": "relations_v2.json", "key": "relations", "id_field": "id", "display_field": "nazev"},
+    "abilities": {"file": "abilities.json", "key": "abilities", "id_field": "id", "display_field": "nazev"},
+    "task_types": {"file": "task_types.json", "key": "types", "id_field": "id", "display_field": "nazev"},
+    "relation_types": {"file": "relation_types.json", "key": "types", "id_field": "id", "display_field": "nazev"},
+    "story_nodes": {"file": "story_nodes.json", "key": "nodes", "id_field": "id", "display_field": "title"},
+    "roles": {"file": "roles.json", "key": "roles", "id_field": "id", "display_field": "nazev"},
+    "config": {"file": "config.json", "key": None, "id_field": None, "display_field": None},  # Single object
+}
+
+# Reference patterns for smart dropdowns and the reference index
+REFERENCE_PATTERNS = {
+    r"^U\d+$": {"source": "users", "display": "obcanske_jmeno"},
+    r"^A\d+$": {"source": "users", "display": "obcanske_jmeno"},
+    r"^S\d+$": {"source": "users", "display": "obcanske_jmeno"},
+    r"^T\d+$": {"source": "tasks", "display": "nazev"},
+    r"^R\d+$": {"source": "relations", "display": "nazev"},
+    r"^TT\d+$": {"source": "task_types", "display": "nazev"},
+    r"^RT\d+$": {"source": "relation_types", "display": "nazev"},
+    r"^AB\d+$": {"source": "abilities", "display": "nazev"},
+}
+_COMPILED_PATTERNS = [(re.compile(regex), config["source"]) for regex, config in REFERENCE_PATTERNS.items()]
+
+WRITE_DELAY = 1.0  # seconds; edits within this window are written together
+MAX_RETRY_DELAY = 30.0  # seconds; cap of the backoff after failed writes
+
+
+class LoreFile:
+    """Parsed content of one lore file plus an id -> record index."""
+
+    def __init__(self, file_key: str, config: dict, path: Path):
+        self.file_key = file_key
+        self.config = config
+        self.path = path
+        self.data: Optional[dict] = None
+        self.index: Dict[str, dict] = {}
+        self.mtime: Optional[float] = None
+        self.dirty = False
+        self.write_error: Optional[str] = None  # Last failed write (None once written)
+        self.write_failures = 0
+        self.revision = 0  # Bumped on every (re)load and edit; used by compiled views (lore bundle)
+        # record id -> [(target id, field path)] contributed to the reference index
+        self.outgoing: Dict[str, List[Tuple[str, str]]] = {}
+
+    @property
+    def records(self) -> List[dict]:
+        key = self.config["key"]
+        if key:
+            return self.data.setdefault(key, [])
+        return [self.data]  # Single object file
+
+    def reindex(self):
+        id_field = self.config["id_field"]
+        self.index = {}
+        if id_field:
+            for record in self.records:
+                record_id = record.get(id_field)
+                if record_id is not None:
+                    self.index.setdefault(record_id, record)
+
+    def set_data(self, data: dict):
+        self.data = data
+        self.reindex()
+
+    def record_key(self, record: dict) -> str:
+        return record.get(self.config["id_field"], "?") if self.config["id_field"] else "?"
+
+
+def reference_source(value: str) -> Optional[str]:
+    """File key a reference-looking id points to (None if it is not a reference)."""
+    for regex, source in _COMPILED_PATTERNS:
+        if regex.match(value):
+            return source
+    return None
+
+
+def iter_references(obj, path="") -> Iterator[Tuple[str, str]]:
+    """Yield (value, field path) for every string matching REFERENCE_PATTERNS."""
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            yield from iter_references(value, f"{path}.{key}" if path else key)
+    elif isinstance(obj, list):
+        for i, item in enumerate(obj):
+            yield from iter_references(item, f"{path}[{i}]")
+    elif isinstance(obj, str) and reference_source(obj):
+        yield obj, path
+
+
+class LoreRepository:
+    def __init__(self, data_dir: Path = LORE_DATA_DIR, files: dict = EDITABLE_FILES, write_delay: float = WRITE_DELAY):
+        self.data_dir = Path(data_dir)
+        self.files_config = files
+        self.write_delay = write_delay
+        self._files: Dict[str, LoreFile] = {}
+        # target id -> {(file key, record id): [field paths]}
+        self._refs: Dict[str, Dict[Tuple[str, str], List[str]]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    # --- Loading ---
+
+    def path_for(self, file_key: str) -> Path:
+        if file_key not in self.files_config:
+            raise KeyError(file_key)
+        return self.data_dir / self.files_config[file_key]["file"]
+
+    def _stat_mtime(self, path: Path) -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _entry(self, file_key: str) -> LoreFile:
+        lore_file = self._files.get(file_key)
+        if lore_file is None:
+            path = self.path_for(file_key)
+            lore_file = LoreFile(file_key, self.files_config[file_key], path)
+            self._files[file_key] = lore_file
+        return lore_file
+
+    def get(self, file_key: str) -> LoreFile:
+        """
+        Loaded file for `file_key`. Raises KeyError (unknown key),
+        FileNotFoundError or ValueError (invalid JSON).
+        """
+        lore_file = self._entry(file_key)
+
+        # Pending local edits win over the file on disk until they are flushed
+        if lore_file.dirty:
+            return lore_file
+
+        mtime = self._stat_mtime(lore_file.path)
+        if mtime is None:
+            if lore_file.data is not None:
+                self._set_file_data(lore_file, None)
+            lore_file.mtime = None
+            raise FileNotFoundError(lore_file.path.name)
+        if lore_file.data is None or mtime != lore_file.mtime:
+            try:
+                with open(lore_file.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON in {lore_file.path.name}: {e}")
+            self._set_file_data(lore_file, data)
+            lore_file.mtime = mtime
+        return lore_file
+
+    def records(self, file_key: str) -> List[dict]:
+        return self.get(file_key).records
+
+    def find(self, file_key: str, record_id: str) -> Optional[dict]:
+        lore_file = self.get(file_key)
+        if not lore_file.config["id_field"]:
+            records = lore_file.records
+            return records[0] if records else None
+        return lore_file.index.get(record_id)
+
+    # --- Mutations (all write-through, debounced) ---
+
+    def replace_data(self, file_key: str, data: dict):
+        lore_file = self._entry(file_key)
+        self._set_file_data(lore_file, data)
+        self._mark_dirty(lore_file)
+
+    def update(self, file_key: str, record_id: str, record: dict) -> bool:
+        """Replace a record in place. Returns False if the record does not exist."""
+        lore_file = self.get(file_key)
+        if not lore_file.config["key"]:
+            self._set_file_data(lore_file, record)
+            self._mark_dirty(lore_file)
+            return True
+
+        current = lore_file.index.get(record_id)
+        if current is None:
+            return False
+        records = lore_file.records
+        records[records.index(current)] = record
+        lore_file.reindex()
+        # Records sharing an id share one index entry: rebuild it from all of them
+        self._reindex_key(lore_file, record_id)
+        new_key = lore_file.record_key(record)
+        if new_key != record_id:
+            self._index_record(lore_file, record)
+        self._mark_dirty(lore_file)
+        return True
+
+    def create(self, file_key: str, record: dict):
+        """Append a record. Raises ValueError on a duplicate id."""
+        lore_file = self.get(file_key)
+        id_field = lore_file.config["id_field"]
+        new_id = record.get(id_field) if id_field else None
+        if new_id and new_id in lore_file.index:
+            raise ValueError(f"Duplicate ID: {new_id}")
+        lore_file.records.append(record)
+        if new_id:
+            lore_file.index[new_id] = record
+        self._index_record(lore_file, record)
+        self._mark_dirty(lore_file)
+
+    def delete(self, file_key: str, record_id: str) -> bool:
+        """Remove all records with the id. Returns False if none existed."""
+        lore_file = self.get(file_key)
+        if record_id not in lore_file.index:
+            return False
+        id_field = lore_file.config["id_field"]
+        lore_file.records[:] = [r for r in lore_file.records if r.get(id_field) != record_id]
+        del lore_file.index[record_id]
+        self._unindex_record(lore_file, record_id)
+        self._mark_dirty(lore_file)
+        return True
+
+    # --- Reverse reference index ---
+
+    def _set_file_data(self, lore_file: LoreFile, data: Optional[dict]):
+        lore_file.revision += 1
+        for record_key in list(lore_file.outgoing):
+            self._unindex_record(lore_file, record_key)
+        if data is None:
+            lore_file.data = None
+            lore_file.index = {}
+            return
+        lore_file.set_data(data)
+        for record in lore_file.records:
+            self._index_record(lore_file, record)
+
+    def _index_record(self, lore_file: LoreFile, record: dict):
+        record_key = lore_file.record_key(record)
+        outgoing = lore_file.outgoing.setdefault(record_key, [])
+        for target, field in iter_references(record):
+            outgoing.append((target, field))
+            self._refs.setdefault(target, {}).setdefault((lore_file.file_key, record_key), []).append(field)
+
+    def _reindex_key(self, lore_file: LoreFile, record_key: str):
+        self._unindex_record(lore_file, record_key)
+        for record in lore_file.records:
+            if lore_file.record_key(record) == record_key:
+                self._index_record(lore_file, record)
+
+    def _unindex_record(self, lore_file: LoreFile, record_key: str):
+        for target, _ in lore_file.outgoing.pop(record_key, []):
+            holders = self._refs.get(target)
+            if holders is None:
+                continue
+            holders.pop((lore_file.file_key, record_key), None)
+            if not holders:
+                del self._refs[target]
+
+    def load_all(self):
+        """Make sure every file is loaded (and current); unreadable files are skipped."""
+        for file_key in self.files_config:
+            try:
+                self.get(file_key)
+            except (OSError, ValueError):
+                continue
+
+    def references(self, target_id: str) -> List[Dict[str, str]]:
+        """All fields referencing `target_id` (only ids matching REFERENCE_PATTERNS are indexed)."""
+        self.load_all()
+        return self._references_to(target_id)
+
+    def _references_to(self, target_id: str) -> List[Dict[str, str]]:
+        return [
+            {"file": file_key, "record_id": record_id, "field": field}
+            for (file_key, record_id), fields in self._refs.get(target_id, {}).items()
+            for field in fields
+        ]
+
+    def reference_index(self) -> Dict[str, List[Dict[str, str]]]:
+        """The whole index: target id -> references (files must be loaded)."""
+        return {target_id: self._references_to(target_id) for target_id in self._refs}
+
+    def dangling_references(self) -> List[Dict]:
+        """Referenced ids whose target record does not exist in the source file."""
+        self.load_all()
+        dangling = []
+        for target_id in sorted(self._refs):
+            source = reference_source(target_id)
+            source_file = self._files.get(source)
+            if source_file is None or source_file.data is None or target_id in source_file.index:
+                continue
+            dangling.append({
+                "target_id": target_id,
+                "source": source,
+                "references": self._references_to(target_id),
+            })
+        return dangling
+
+    # --- Persistence ---
+
+    def _mark_dirty(self, lore_file: LoreFile):
+        lore_file.dirty = True
+        lore_file.revision += 1
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts, sync tests): write immediately
+            self.flush()
+            return
+        if self.write_delay <= 0:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.write_delay, self._scheduled_flush)
+
+    def _scheduled_flush(self):
+        self._flush_handle = None
+        self.flush()
+
+    def write_error(self, file_key: str) -> Optional[str]:
+        """Why pending edits of the file could not be written (None if there is no such problem)."""
+        lore_file = self._files.get(file_key)
+        return lore_file.write_error if lore_file and lore_file.dirty else None
+
+    def _write(self, lore_file: LoreFile):
+        tmp_path = lore_file.path.with_name(lore_file.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(lore_file.data, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, lore_file.path)
+        lore_file.mtime = self._stat_mtime(lore_file.path)
+        lore_file.dirty = False
+        lore_file.write_error = None
+        lore_file.write_failures = 0
+
+    def flush(self):
+        """Write all pending changes now (also called on shutdown)."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        retry = 0.0
+        for lore_file in self._files.values():
+            if not lore_file.dirty:
+                continue
+            try:
+                self._write(lore_file)
+            except OSError as e:
+                print(f"WARN: Could not write {lore_file.path.name}: {e}")
+                lore_file.write_error = str(e)
+                lore_file.write_failures += 1
+                delay = min(max(self.write_delay, 0.1) * 2 ** (lore_file.write_failures - 1), MAX_RETRY_DELAY)
+                retry = min(retry, delay) if retry else delay
+        if retry:
+            # Edits stay in memory (dirty files win over the disk copy); try again later
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # No loop: the next edit or the shutdown flush retries
+            self._flush_handle = loop.call_later(retry, self._scheduled_flush)
+
+
+lore_repository = LoreRepository()
@@ -1,12 +1,29 @@
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from fastapi import WebSocket
 from ..config import settings
 from ..database import UserRole
-from .gamestate import gamestate
+from .gamestate import GameState, get_gamestate
+from .backend import state_backend
+from .typing_coalescer import request_checkpoint
 import json
 
+# Session traffic an admin socket can subscribe to (monitor screens)
+ADMIN_EVENT_KINDS = ("chat", "hyper", "typing")
+# Admin sockets that never subscribed: HYPER replies of all sessions, as before subscriptions existed
+DEFAULT_ADMIN_KINDS = ("hyper",)
+
 class ConnectionManager:
-    def __init__(self):
+    # Fan-out methods that are replayed on the other workers (multi-worker backend)
+    REMOTE_METHODS = (
+        "broadcast_global", "broadcast_to_admins", "broadcast_to_session", "broadcast_to_session_users",
+        "broadcast_to_agent", "send_to_user", "send_to_users", "send_timeout_error_to_user", "send_timeout_to_agent",
+        "send_typing_sync", "request_typing_checkpoint", "publish_to_admins",
+    )
+
+    def __init__(self, instance_id: str = settings.DEFAULT_INSTANCE):
+        # Each game instance has its own manager; connections never cross instances
+        self.instance_id = instance_id
+        self.gamestate: GameState = get_gamestate(instance_id)
         # Active connections: {user_id: [WebSocket]}
         self.user_connections: Dict[int, List[WebSocket]] = {}
         self.agent_connections: Dict[int, List[WebSocket]] = {}
@@ -15,6 +32,13 @@ class ConnectionManager:
         self.user_logical_ids: Dict[int, int] = {}
         # Admin connections are just a list for broadcast
         self.admin_connections: List[WebSocket] = []
+        # Sockets held by other workers: {worker_id: {"users": {uid: lid}, "agents": {aid: lid}}}
+        self.remote_presence: Dict[int, Dict[str, Dict[int, int]]] = {}
+        # Sockets that negotiated the incremental typing_sync protocol (logic/typing_diff.py)
+        self.typing_diff_sockets: Set[WebSocket] = set()
+        # Admin subscription index: (session_id or None = all sessions, kind) -> admin sockets
+        self.admin_index: Dict[Tuple[Optional[int], str], Set[WebSocket]] = {}
+        self.admin_subscriptions: Dict[WebSocket, List[Tuple[Optional[int], str]]] = {}
 
     async def connect(self, websocket: WebSocket, role: UserRole, user_id: int, logical_id: Optional[int] = None):
         await websocket.accept()
@@ -33,6 +57,9 @@ class ConnectionManager:
                 self.agent_logical_ids[user_id] = logical_id
         elif role == UserRole.ADMIN:
             self.admin_connections.append(websocket)
+            self.subscribe_admin(websocket, None, DEFAULT_ADMIN_KINDS)
+        if role != UserRole.ADMIN:
+            self._publish_presence()
 
     def disconnect(self, websocket: WebSocket, role: UserRole, user_id: int):
         if role == UserRole.USER:
@@ -54,8 +81,119 @@ class ConnectionManager:
         elif role == UserRole.ADMIN:
             if websocket in self.admin_connections:
                 self.admin_connections.remove(websocket)
+            self._unindex_admin(websocket)
+        self.typing_diff_sockets.discard(websocket)
+        if role != UserRole.ADMIN:
+            self._publish_presence()
+
+    def enable_typing_diff(self, websocket: WebSocket):
+        self.typing_diff_sockets.add(websocket)
+
+    def has_typing_diff(self, websocket: WebSocket) -> bool:
+        return websocket in self.typing_diff_sockets
+
+    # --- Admin subscriptions ---
+
+    def subscribe_admin(self, websocket: WebSocket, sessions: Optional[Iterable[int]], kinds: Iterable[str]):
+        """Replace what an admin socket receives from publish_to_admins; sessions None = all sessions."""
+        self._unindex_admin(websocket)
+        keys = [(session_id, kind) for session_id in (sessions if sessions is not None else (None,)) for kind in kinds]
+        self.admin_subscriptions[websocket] = keys
+        for key in keys:
+            self.admin_index.setdefault(key, set()).add(websocket)
+
+    def _unindex_admin(self, websocket: WebSocket):
+        for key in self.admin_subscriptions.pop(websocket, ()):
+            subscribers = self.admin_index.get(key)
+            if subscribers is not None:
+                subscribers.discard(websocket)
+                if not subscribers:
+                    del self.admin_index[key]
+
+    # --- Multi-worker fan-out ---
+
+    def _publish_route(self, method: str, *args):
+        state_backend.publish("route", {"instance": self.instance_id, "method": method, "args": list(args)})
+
+    async def _handle_remote_route(self, payload: dict, origin: int):
+        method = payload.get("method")
+        if method in self.REMOTE_METHODS:
+            await getattr(self, f"_local_{method}")(*payload.get("args", []))
+
+    def _publish_presence(self):
+        state_backend.publish("presence", {
+            "instance": self.instance_id,
+            "users": self.user_logical_ids,
+            "agents": self.agent_logical_ids
+        })
+
+    def _handle_remote_presence(self, payload: dict, origin: int):
+        self.remote_presence[origin] = {
+            "users": {int(k): v for k, v in payload.get("users", {}).items()},
+            "agents": {int(k): v for k, v in payload.get("agents", {}).items()}
+        }
+
+    # --- Broadcasts (local sockets + other workers) ---
 
     async def broadcast_global(self, message: str):
+        await self._local_broadcast_global(message)
+        self._publish_route("broadcast_global", message)
+
+    async def broadcast_to_admins(self, message: str):
+        await self._local_broadcast_to_admins(message)
+        self._publish_route("broadcast_to_admins", message)
+
+    async def broadcast_to_session(self, session_id: int, message: str, exclude_ws: Optional[WebSocket] = None):
+        await self._local_broadcast_to_session(session_id, message, exclude_ws)
+        self._publish_route("broadcast_to_session", session_id, message)
+
+    async def broadcast_to_session_users(self, session_id: int, message: str):
+        """Send only to the user side of a session (e.g. HYPER replies hidden from agents)."""
+        await self._local_broadcast_to_session_users(session_id, message)
+        self._publish_route("broadcast_to_session_users", session_id, message)
+
+    async def broadcast_to_agent(self, agent_user_id: int, message: str, exclude_ws: Optional[WebSocket] = None):
+        await self._local_broadcast_to_agent(agent_user_id, message, exclude_ws)
+        self._publish_route("broadcast_to_agent", agent_user_id, message)
+
+    async def send_to_user(self, user_id: int, message: str, exclude_ws: Optional[WebSocket] = None):
+        """Send to all open tabs of one user."""
+        await self._local_send_to_user(user_id, message, exclude_ws)
+        self._publish_route("send_to_user", user_id, message)
+
+    async def send_to_users(self, messages: Dict[int, str]):
+        """Per-user messages (e.g. bulk economy updates) delivered as one batch / one backend frame."""
+        if not messages:
+            return
+        await self._local_send_to_users(messages)
+        self._publish_route("send_to_users", messages)
+
+    async def send_typing_sync(self, role: str, user_id: int, full_message: str, diff_message: str, exclude_ws: Optional[WebSocket] = None):
+        """Mirror frame for the other tabs of a user/agent: diff_message to sockets that negotiated it."""
+        await self._local_send_typing_sync(role, user_id, full_message, diff_message, exclude_ws)
+        self._publish_route("send_typing_sync", role, user_id, full_message, diff_message)
+
+    async def request_typing_checkpoint(self, src: str):
+        """typing_resync for stream `src`, handled by the worker holding the sending connection."""
+        if not await self._local_request_typing_checkpoint(src):
+            self._publish_route("request_typing_checkpoint", src)
+
+    async def publish_to_admins(self, session_id: int, kind: str, message: str):
+        """Session traffic (kind in ADMIN_EVENT_KINDS) for the admins subscribed to that session."""
+        await self._local_publish_to_admins(session_id, kind, message)
+        self._publish_route("publish_to_admins", session_id, kind, message)
+
+    async def send_timeout_error_to_user(self, session_id: int):
+        await self._local_send_timeout_error_to_user(session_id)
+        self._publish_route("send_timeout_error_to_user", session_id)
+
+    async def send_timeout_to_agent(self, session_id: int):
+        await self._local_send_timeout_to_agent(session_id)
+        self._publish_route("send_timeout_to_agent", session_id)
+
+    # --- Local delivery ---
+
+    async def _local_broadcast_global(self, message: str):
         # Users
         for cons in self.user_connections.values():
             for con in cons:
@@ -71,29 +209,25 @@ class ConnectionManager:
             try: await con.send_text(message)
             except: pass
 
-    async def broadcast_to_admins(self, message: str):
+    async def _local_broadcast_to_admins(self, message: str):
         for con in self.admin_connections:
             try: await con.send_text(message)
             except: pass
 
-    async def broadcast_to_session(self, session_id: int, message: str, exclude_ws: Optional[WebSocket] = None):
+    async def _local_publish_to_admins(self, session_id: int, kind: str, message: str):
+        # Subscribers of this session plus those of all sessions (disjoint sets)
+        for key in ((session_id, kind), (None, kind)):
+            for con in list(self.admin_index.get(key, ())):
+                try: await con.send_text(message)
+                except: pass
+
+    async def _local_broadcast_to_session(self, session_id: int, message: str, exclude_ws: Optional[WebSocket] = None):
         # 1. Users mapped to session_id
-        for uid, lid in self.user_logical_ids.items():
-            if lid == session_id:
-                if uid in self.user_connections:
-                    for con in self.user_connections[uid]:
-                        if con != exclude_ws:
-                            try: await con.send_text(message)
-                            except: pass
-        
+        await self._local_broadcast_to_session_users(session_id, message, exclude_ws)
+
         # 2. Agents mapped to session_id via Shift
-        shift = gamestate.global_shift_offset
-        total = getattr(settings, "TOTAL_SESSIONS", 8) 
-        # AgentIndex = (SessionID - 1 - Shift) % Total
-        # LogicalID = Index + 1
-        agent_index = (session_id - 1 - shift) % total
-        agent_lid = agent_index + 1
-        
+        agent_lid = self.gamestate.agent_for_session(session_id)
+
         # Find Agent UserID for this LogicalID
         for aid, lid in self.agent_logical_ids.items():
             if lid == agent_lid:
@@ -103,21 +237,53 @@ class ConnectionManager:
                             try: await con.send_text(message)
                             except: pass
 
-    async def broadcast_to_agent(self, agent_user_id: int, message: str, exclude_ws: Optional[WebSocket] = None):
+    async def _local_broadcast_to_session_users(self, session_id: int, message: str, exclude_ws: Optional[WebSocket] = None):
+        for uid, lid in self.user_logical_ids.items():
+            if lid == session_id:
+                if uid in self.user_connections:
+                    for con in self.user_connections[uid]:
+                        if con != exclude_ws:
+                            try: await con.send_text(message)
+                            except: pass
+
+    async def _local_broadcast_to_agent(self, agent_user_id: int, message: str, exclude_ws: Optional[WebSocket] = None):
         if agent_user_id in self.agent_connections:
             for con in self.agent_connections[agent_user_id]:
                 if con != exclude_ws:
                     try: await con.send_text(message)
                     except: pass
-    
-    async def send_timeout_error_to_user(self, session_id: int):
+
+    async def _local_send_to_user(self, user_id: int, message: str, exclude_ws: Optional[WebSocket] = None):
+        if user_id in self.user_connections:
+            for con in self.user_connections[user_id]:
+                if con != exclude_ws:
+                    try: await con.send_text(message)
+                    except: pass
+
+    async def _local_send_to_users(self, messages: Dict[int, str]):
+        for user_id, message in messages.items():
+            # Keys arrive as strings from other workers (JSON)
+            await self._local_send_to_user(int(user_id), message)
+
+    async def _local_send_typing_sync(self, role: str, user_id: int, full_message: str, diff_message: str, exclude_ws: Optional[WebSocket] = None):
+        connections = self.agent_connections if role == UserRole.AGENT.value else self.user_connections
+        for con in connections.get(user_id, []):
+            if con != exclude_ws:
+                message = diff_message if con in self.typing_diff_sockets else full_message
+                try: await con.send_text(message)
+                except: pass
+
+    async def _local_request_typing_checkpoint(self, src: str) -> bool:
+        return request_checkpoint(src)
+
+    async def _local_send_timeout_error_to_user(self, session_id: int):
         # Find user for session
         target_uid = None
         for uid, lid in self.user_logical_ids.items():
             if lid == session_id:
                 target_uid = uid
                 break
-        
+
         if target_uid and target_uid in self.user_connections:
             msg = json.dumps({
                 "type": "agent_timeout",
@@ -128,13 +294,10 @@ class ConnectionManager:
                 try: await con.send_text(msg)
                 except: pass
 
-    async def send_timeout_to_agent(self, session_id: int):
+    async def _local_send_timeout_to_agent(self, session_id: int):
         # Notify agent they are timed out
-        shift = gamestate.global_shift_offset
-        total = getattr(settings, "TOTAL_SESSIONS", 8)
-        agent_index = (session_id - 1 - shift) % total
-        agent_lid = agent_index + 1
-        
+        agent_lid = self.gamestate.agent_for_session(session_id)
+
         for aid, lid in self.agent_logical_ids.items():
             if lid == agent_lid:
                 if aid in self.agent_connections:
@@ -148,15 +311,55 @@ class ConnectionManager:
                         except: pass
 
     def get_online_status(self):
+        users = dict(self.user_logical_ids)
+        agents = dict(self.agent_logical_ids)
+        for presence in self.remote_presence.values():
+            users.update(presence["users"])
+            agents.update(presence["agents"])
         return {
-            "users": list(self.user_logical_ids.values()),
-            "agents": list(self.agent_logical_ids.values())
+            "users": list(users.values()),
+            "agents": list(agents.values())
         }
 
+    def connected_agents(self) -> Dict[int, int]:
+        """Agent user id -> logical id of every connected agent, on any worker."""
+        agents = dict(self.agent_logical_ids)
+        for presence in self.remote_presence.values():
+            agents.update(presence["agents"])
+        return agents
+
     def get_active_counts(self):
+        user_ids = set(self.user_connections)
+        for presence in self.remote_presence.values():
+            user_ids.update(presence["users"])
         return {
-            "users": len(self.user_connections),
-            "autopilots": sum(1 for v in gamestate.active_autopilots.values() if v)
+            "users": len(user_ids),
+            "autopilots": sum(1 for v in self.gamestate.active_autopilots.values() if v)
         }
 
-routing_logic = ConnectionManager()
+_managers: Dict[str, ConnectionManager] = {}
+
+def get_routing(instance_id: Optional[str] = None) -> ConnectionManager:
+    instance_id = instance_id or settings.DEFAULT_INSTANCE
+    if instance_id not in _managers:
+        _managers[instance_id] = ConnectionManager(instance_id)
+    return _managers[instance_id]
+
+def all_routing() -> List[ConnectionManager]:
+    return list(_managers.values())
+
+# Backend frames carry the instance id; worker-level events apply to every instance
+def _forget_worker(worker_id: int):
+    for manager in all_routing():
+        manager.remote_presence.pop(worker_id, None)
+
+state_backend.on("route", lambda payload, origin: get_routing(payload.get("instance"))._handle_remote_route(payload, origin))
+state_backend.on("presence", lambda payload, origin: get_routing(payload.get("instance"))._handle_remote_presence(payload, origin))
+state_backend.on("resync", lambda payload, origin: [manager._publish_presence() for manager in all_routing()])
+state_backend.on("worker_gone", lambda payload, origin: _forget_worker(payload.get("worker_id")))
+state_backend.on("peers_reset", lambda payload, origin: [manager.remote_presence.clear() for manager in all_routing()])
+
+# Default instance (single-game setups and legacy imports)
+routing_logic = get_routing()
+for _instance_id in settings.GAME_INSTANCES:
+    get_routing(_instance_id)
@@ -0,0 +1,255 @@
+"""
+Incremental index of simulation / test run files (lore-web/data/test_runs).
+
+index.json is a list of run headers (timestamp, scenario_name, status, ...) used
+by lore-web and the /api/admin/simulation/history endpoint. Instead of loading
+every run file (logs make up most of the 4.5 MB), the indexer:
+- remembers mtime and size of each indexed file (file_mtime / file_size),
+- re-reads only new or changed files,
+- reads only the header: top-level members are decoded one by one from the
+  start of the file until all HEADER_FIELDS are found. Other list/object
+  members (logs, steps, test_cases, ...) are skipped by bracket matching
+  without being decoded, so header fields written after them (stats and
+  duration follow steps in hlinik_workflow_*.json) are still picked up.
+
+No app imports here: regenerate_index.py in lore-web uses this module standalone.
+"""
+
+import json
+import os
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+LORE_DATA_DIR = Path(__file__).resolve().parents[3] / "lore-web" / "data"
+TEST_RUNS_DIR = LORE_DATA_DIR / "test_runs"
+
+HEADER_FIELDS = ("timestamp", "scenario_name", "status", "duration", "stats", "duration_note")
+CHUNK_SIZE = 8192
+REFRESH_INTERVAL = 2.0  # seconds between directory scans when serving from memory
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",:}]"
+_STRUCTURE = re.compile(r'["\[\]{}]')
+_STRING_END = re.compile(r'["\\]')
+
+
+def read_json_header(path, fields=HEADER_FIELDS) -> Optional[dict]:
+    """
+    Decode the leading top-level members of a JSON object file.
+    Returns None if the file is not a JSON object; raises ValueError on invalid JSON.
+    """
+    header = {}
+    wanted = set(fields)
+    with open(path, "r", encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        eof = False
+
+        def more():
+            nonlocal buf, pos, eof
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                eof = True
+                return False
+            buf = buf[pos:] + chunk
+            pos = 0
+            return True
+
+        def skip_ws():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < len(buf) or not more():
+                    return
+
+        def decode():
+            nonlocal pos
+            while True:
+                try:
+                    value, end = _decoder.raw_decode(buf, pos)
+                    # A number cut by the chunk boundary ("45." + "0") is not complete yet
+                    if eof or (end < len(buf) and buf[end] in _DELIMITERS):
+                        pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                if not more():
+                    continue
+
+        def skip_container():
+            """Move past the array/object starting at pos. False if the file ends first."""
+            nonlocal pos
+            depth = 0
+            in_string = False
+            while True:
+                match = (_STRING_END if in_string else _STRUCTURE).search(buf, pos)
+                if match is None:
+                    pos = len(buf)
+                elif in_string and match.group() == "\\":
+                    if match.end() < len(buf):
+                        pos = match.end() + 1  # Escaped character
+                        continue
+                    pos = match.start()  # Escape cut by the chunk boundary
+                else:
+                    pos = match.end()
+                    char = match.group()
+                    if char == '"':
+                        in_string = not in_string
+                    elif char in "[{":
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if depth == 0:
+                            return True
+                    continue
+                if not more():
+                    return False
+
+        def expect(char):
+            nonlocal pos
+            skip_ws()
+            if pos >= len(buf) or buf[pos] != char:
+                raise ValueError(f"Expected '{char}' at offset {pos}")
+            pos += 1
+
+        skip_ws()
+        if pos >= len(buf) or buf[pos] != "{":
+            return None
+        pos += 1
+
+        while wanted:
+            skip_ws()
+            if pos >= len(buf) or buf[pos] == "}":
+                break
+            if buf[pos] == ",":
+                pos += 1
+                skip_ws()
+            key = decode()
+            expect(":")
+            skip_ws()
+            if key not in wanted and pos < len(buf) and buf[pos] in "[{":
+                if not skip_container():
+                    break  # Truncated body: keep the header read so far
+                continue
+            value = decode()
+            if key in wanted:
+                header[key] = value
+                wanted.discard(key)
+    return header
+
+
+def run_entry(path: Path, header: dict, stat: os.stat_result) -> dict:
+    """Index entry (same fields as the original regenerate_index.py + file tracking)."""
+    entry = {
+        "timestamp": header.get("timestamp", datetime.fromtimestamp(stat.st_mtime).isoformat()),
+        "scenario_name": header.get("scenario_name", "Unknown Scenario"),
+        "status": header.get("status", "unknown"),
+        "duration": header.get("duration", 0),
+        "filename": path.name,
+        "stats": header.get("stats", {}),
+    }
+    if "duration_note" in header:
+        entry["duration_note"] = header["duration_note"]
+    entry["file_mtime"] = stat.st_mtime
+    entry["file_size"] = stat.st_size
+    return entry
+
+
+class RunIndex:
+    def __init__(self, runs_dir: Path = TEST_RUNS_DIR / "runs", index_file: Path = TEST_RUNS_DIR / "index.json"):
+        self.runs_dir = Path(runs_dir)
+        self.index_file = Path(index_file)
+        self._entries: Optional[Dict[str, dict]] = None
+        self._sorted: List[dict] = []
+        self._last_refresh = 0.0
+
+    def _load(self):
+        self._entries = {}
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, "r", encoding="utf-8") as f:
+                    for entry in json.load(f):
+                        self._entries[entry["filename"]] = entry
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"WARN: Could not load run index, rebuilding: {e}")
+                self._entries = {}
+        self._sort()
+
+    def _sort(self):
+        self._sorted = sorted(self._entries.values(), key=lambda e: e.get("timestamp", ""), reverse=True)
+
+    def refresh(self, write: bool = True) -> Dict[str, List[str]]:
+        """Re-index new/changed files, drop deleted ones. Returns {"added", "updated", "removed"}."""
+        if self._entries is None:
+            self._load()
+        report = {"added": [], "updated": [], "removed": []}
+
+        seen = set()
+        if self.runs_dir.exists():
+            with os.scandir(self.runs_dir) as it:
+                for dirent in it:
+                    if not dirent.name.endswith(".json") or not dirent.is_file():
+                        continue
+                    seen.add(dirent.name)
+                    stat = dirent.stat()
+                    current = self._entries.get(dirent.name)
+                    if current and current.get("file_mtime") == stat.st_mtime and current.get("file_size") == stat.st_size:
+                        continue
+                    try:
+                        header = read_json_header(dirent.path)
+                    except (OSError, ValueError) as e:
+                        print(f"WARN: Skipping run file {dirent.name}: {e}")
+                        continue
+                    if header is None:
+                        continue  # Not a run (top level is not an object)
+                    self._entries[dirent.name] = run_entry(Path(dirent.path), header, stat)
+                    report["updated" if current else "added"].append(dirent.name)
+
+        # Entries without file tracking were added by hand (runs stored elsewhere) - keep them
+        for filename, entry in list(self._entries.items()):
+            if filename not in seen and "file_size" in entry:
+                del self._entries[filename]
+                report["removed"].append(filename)
+
+        self._last_refresh = time.monotonic()
+        if any(report.values()):
+            self._sort()
+            if write:
+                self._write()
+        return report
+
+    def _write(self):
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_file.with_name(self.index_file.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._sorted, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.index_file)
+
+    def runs(self) -> List[dict]:
+        """All entries, newest first (directory re-scanned at most every REFRESH_INTERVAL)."""
+        if self._entries is None or time.monotonic() - self._last_refresh >= REFRESH_INTERVAL:
+            try:
+                self.refresh()
+            except OSError as e:
+                print(f"WARN: Run index refresh failed: {e}")
+        return self._sorted
+
+    def query(self, scenario: Optional[str] = None, status: Optional[str] = None,
+              offset: int = 0, limit: int = 20) -> Tuple[int, List[dict]]:
+        """(total matching, page). `scenario` is a case-insensitive substring of scenario_name."""
+        runs = self.runs()
+        if scenario:
+            needle = scenario.lower()
+            runs = [r for r in runs if needle in r.get("scenario_name", "").lower()]
+        if status:
+            runs = [r for r in runs if r.get("status") == status]
+        return len(runs), runs[offset:offset + limit]
+
+
+run_index = RunIndex()
@@ -0,0 +1,86 @@
+"""
+Admin task feed: paginated/filtered task listings and per-task delta pushes.
+
+Listings are keyset-paginated by task id (`cursor` = last id of the previous
+page) and can be narrowed by status, user and `updated_since`. Every task
+state change pushes the serialized task to the instance's admins as an
+`admin_task_delta` message, so dashboards upsert one card instead of
+re-downloading the whole list.
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal, Task, TaskStatus, User
+from .routing import get_routing
+
+DEFAULT_PAGE_LIMIT = 200
+MAX_PAGE_LIMIT = 500
+
+
+def serialize_task(task: Task) -> dict:
+    return {
+        "id": task.id,
+        "user_id": task.user_id,
+        "prompt": task.prompt_desc,
+        "status": task.status.value if hasattr(task.status, "value") else str(task.status),
+        "reward": task.reward_offered,
+        "submission": task.submission_content,
+        "rating": task.final_rating,
+        "suggested_rating": task.suggested_rating,
+        "updated_at": task.updated_at.isoformat() if task.updated_at else None,
+    }
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # Timestamps are stored as naive UTC (datetime.utcnow)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def query_tasks(db: Session, instance_id: str, cursor: Optional[int] = None, limit: int = DEFAULT_PAGE_LIMIT,
+                status: Optional[TaskStatus] = None, user_id: Optional[int] = None,
+                updated_since: Optional[datetime] = None) -> Tuple[List[Task], Optional[int]]:
+    """One page of the instance's tasks ordered by id. Returns (tasks, next cursor or None)."""
+    limit = max(1, min(limit, MAX_PAGE_LIMIT))
+    query = db.query(Task).join(User).filter(User.instance_id == instance_id)
+    if status is not None:
+        query = query.filter(Task.status == status)
+    if user_id is not None:
+        query = query.filter(Task.user_id == user_id)
+    if updated_since is not None:
+        # >= so a change in the same instant as the previous poll is not lost; clients upsert
+        query = query.filter(Task.updated_at >= _naive_utc(updated_since))
+    if cursor is not None:
+        query = query.filter(Task.id > cursor)
+
+    tasks = query.order_by(Task.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = tasks[-1].id
+    return tasks, next_cursor
+
+
+async def push_task_delta(task: Task, instance_id: Optional[str] = None):
+    """Send the current state of one task to the admins of its instance."""
+    if instance_id is None:
+        instance_id = task.user.instance_id if task.user else None
+    message = json.dumps({"type": "admin_task_delta", "task": serialize_task(task)})
+    await get_routing(instance_id).broadcast_to_admins(message)
+
+
+async def push_task_delta_by_id(task_id: int):
+    """push_task_delta for callers that no longer hold the task's session."""
+    db = SessionLocal()
+    try:
+        task = db.query(Task).filter(Task.id == task_id).first()
+        if task:
+            instance_id = task.user.instance_id if task.user else None
+            await push_task_delta(task, instance_id)
+    finally:
+        db.close()
@@ -0,0 +1,84 @@
+"""
+Pool of pre-generated task descriptions, one queue per StatusLevel.
+
+Approving a task used to wait for the LLM inside the admin's request. The pool
+keeps up to TASK_POOL_DEPTH descriptions per level ready, so approve_task takes
+one instantly; every take schedules a background refill. When the pool is empty
+(or disabled) the description is generated inline as before.
+
+Pooled descriptions are generated from a generic profile of the level (the
+generator prompt only varies the difficulty by status). Failed generations
+(DEFAULT_TASK_DESCRIPTION, mock or error replies) are not pooled and stop the
+refill until the next take.
+"""
+
+import asyncio
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from ..config import settings
+from ..database import StatusLevel
+from .llm_core import llm_service, is_failed_reply, DEFAULT_TASK_DESCRIPTION
+
+# Typical balance per level for the generic generator profile
+POOL_PROFILE_CREDITS = {"low": 100, "mid": 500, "high": 1500, "party": 3000}
+
+
+def _level_key(level) -> str:
+    return level.value if isinstance(level, StatusLevel) else str(level or StatusLevel.LOW.value)
+
+
+class TaskDescriptionPool:
+    def __init__(self, depth: int = settings.TASK_POOL_DEPTH):
+        self.depth = depth
+        self._pools: Dict[str, Deque[str]] = {level.value: deque() for level in StatusLevel}
+        self._refills: Dict[str, asyncio.Task] = {}
+
+    def size(self, level) -> int:
+        return len(self._pools.get(_level_key(level), ()))
+
+    def pop(self, level) -> Optional[str]:
+        """A ready description for the level (None if empty); schedules a refill."""
+        key = _level_key(level)
+        pool = self._pools.get(key)
+        description = pool.popleft() if pool else None
+        self.schedule_refill(key)
+        return description
+
+    async def take(self, level, user_profile: dict) -> str:
+        """Pooled description, or one generated now for this user if the pool is empty."""
+        description = self.pop(level)
+        if description is None:
+            description = await llm_service.generate_task_description(user_profile)
+        return description
+
+    def schedule_refill(self, level=None):
+        """Start background refills (all levels if None). No-op without a running loop."""
+        if self.depth <= 0:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        keys = [_level_key(level)] if level is not None else list(self._pools)
+        for key in keys:
+            running = self._refills.get(key)
+            if key in self._pools and (running is None or running.done()):
+                self._refills[key] = loop.create_task(self._refill(key))
+
+    async def _refill(self, key: str):
+        pool = self._pools[key]
+        profile = {"username": "zaměstnanec", "status_level": key, "credits": POOL_PROFILE_CREDITS.get(key, 100)}
+        while len(pool) < self.depth:
+            description = await llm_service.generate_task_description(profile)
+            if not description or description == DEFAULT_TASK_DESCRIPTION or is_failed_reply(description):
+                return  # Provider unavailable; retried on the next take
+            pool.append(description)
+
+    def stop(self):
+        for task in self._refills.values():
+            task.cancel()
+        self._refills.clear()
+
+
+task_pool = TaskDescriptionPool()
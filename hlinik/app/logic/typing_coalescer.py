@@ -0,0 +1,157 @@
+"""
+Per-connection coalescing of keystroke traffic.
+
+Every keystroke used to produce a typing_sync frame carrying the whole input
+text (relayed to the mirror tabs) and every burst a typing_start/typing_stop
+pair. Each connection now gets a TypingCoalescer with one lane per event kind:
+
+- a lane forwards at most one frame per interval (TYPING_SYNC_WINDOW for
+  typing_sync, TYPING_INDICATOR_INTERVAL for start/stop); the first frame
+  after a quiet period goes out immediately,
+- frames arriving meanwhile replace each other (last value wins); only the
+  newest is sent at the end of the interval,
+- while a send is still in progress (slow recipient) newer frames also just
+  replace the unsent one, so a backlog never builds up,
+- a value equal to the last forwarded one is not sent again (a start/stop
+  flip inside one interval cancels out).
+
+Sends run in a background task per lane, so the reader loop never waits on
+the recipients. Suppressed frames are counted per connection and in the
+process-wide `typing_stats`.
+"""
+
+import asyncio
+import weakref
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..config import settings
+from .typing_diff import TypingStream
+
+# Process-wide counters: received / forwarded / coalesced / dropped / duplicate
+typing_stats: Counter = Counter()
+
+_SENTINEL = object()
+
+
+class _Lane:
+    """Last-value-wins lane: at most one send per interval, unsent values are replaced."""
+
+    def __init__(self, interval: float, stats: Counter):
+        self.interval = interval
+        self.stats = stats
+        self.last_sent: Any = _SENTINEL
+        self.last_time = float("-inf")
+        self.pending: Any = _SENTINEL
+        self.send: Optional[Callable[[Any], Awaitable]] = None
+        self.sending = False
+        self.task: Optional[asyncio.Task] = None
+
+    def _count(self, key: str):
+        self.stats[key] += 1
+        typing_stats[key] += 1
+
+    def push(self, value, send: Callable[[Any], Awaitable]):
+        self._count("received")
+        if self.pending is not _SENTINEL:
+            # Never sent: superseded within the window, or stuck behind a slow send
+            self._count("dropped" if self.sending else "coalesced")
+        if value == self.last_sent:
+            self.pending = _SENTINEL
+            self._count("duplicate")
+            return
+        self.pending = value
+        self.send = send
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._flush())
+
+    async def _flush(self):
+        loop = asyncio.get_running_loop()
+        while self.pending is not _SENTINEL:
+            delay = self.last_time + self.interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                if self.pending is _SENTINEL:
+                    return  # Cancelled out meanwhile
+            value, self.pending = self.pending, _SENTINEL
+            self.last_sent = value
+            self.sending = True
+            try:
+                await self.send(value)
+                self._count("forwarded")
+            except Exception as e:
+                print(f"WARN: Typing frame not delivered: {e}")
+            finally:
+                self.sending = False
+            self.last_time = loop.time()
+
+    def resend(self):
+        """Send the last forwarded value again (unless a newer one is already waiting)."""
+        if self.pending is _SENTINEL and self.last_sent is not _SENTINEL and self.send:
+            self.pending = self.last_sent
+            if self.task is None or self.task.done():
+                self.task = asyncio.create_task(self._flush())
+
+    def close(self):
+        self.pending = _SENTINEL
+        if self.task and not self.task.done():
+            self.task.cancel()
+
+
+class TypingCoalescer:
+    def __init__(self, sync_window: float = settings.TYPING_SYNC_WINDOW,
+                 indicator_interval: float = settings.TYPING_INDICATOR_INTERVAL):
+        self.stats: Counter = Counter()
+        self.sync = _Lane(sync_window, self.stats)
+        self.indicator = _Lane(indicator_interval, self.stats)
+        # Incremental typing_sync state (logic/typing_diff.py)
+        self.stream = TypingStream()
+
+    def typing_sync(self, content: str, send: Callable[[str], Awaitable]):
+        self.sync.push(content, send)
+
+    def typing_indicator(self, msg_type: str, send: Callable[[str], Awaitable]):
+        """msg_type is "typing_start" or "typing_stop"."""
+        self.indicator.push(msg_type, send)
+
+    def close(self):
+        self.sync.close()
+        self.indicator.close()
+
+
+_coalescers: "weakref.WeakKeyDictionary[Any, TypingCoalescer]" = weakref.WeakKeyDictionary()
+
+
+_by_src: "weakref.WeakValueDictionary[str, TypingCoalescer]" = weakref.WeakValueDictionary()
+
+
+def coalescer_for(websocket) -> TypingCoalescer:
+    coalescer = _coalescers.get(websocket)
+    if coalescer is None:
+        coalescer = _coalescers[websocket] = TypingCoalescer()
+        _by_src[coalescer.stream.src] = coalescer
+    return coalescer
+
+
+def request_checkpoint(src: str) -> bool:
+    """A recipient lost track of stream `src`: its next typing_sync frame is a full checkpoint.
+    False if the stream is not sent from this worker."""
+    coalescer = _by_src.get(src)
+    if not coalescer:
+        return False
+    coalescer.stream.checkpoint_requested = True
+    coalescer.sync.resend()
+    return True
+
+
+def discard_coalescer(websocket):
+    coalescer = _coalescers.pop(websocket, None)
+    if coalescer:
+        coalescer.close()
+
+
+def typing_stats_snapshot() -> Dict[str, int]:
+    stats = {key: typing_stats[key] for key in ("received", "forwarded", "coalesced", "dropped", "duplicate")}
+    stats["suppressed"] = stats["coalesced"] + stats["dropped"] + stats["duplicate"]
+    stats["connections"] = len(_coalescers)
+    return stats
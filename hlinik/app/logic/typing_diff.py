@@ -0,0 +1,103 @@
+"""
+Incremental typing_sync protocol (negotiated per connection).
+
+Clients connecting with `typing=diff` get a `{"type": "protocol", "typing_sync": "diff"}`
+acknowledgement. Their mirror frames then carry splice ops instead of the whole text:
+
+    {"type": "typing_sync", "seq": 7, "ops": [[at, delete, insert], ...]}
+    {"type": "typing_sync", "seq": 8, "content": "..."}          # checkpoint
+
+`seq` increases by one per frame. A frame that does not follow the previous
+one (lost/reordered) is ignored and the sender is asked for a checkpoint with
+`{"type": "typing_resync"}`.
+
+Outgoing, the server relays the coalesced text (logic/typing_coalescer.py) of
+one sending connection as a stream identified by `src`. It sends ops against
+the previous frame of that stream, or a checkpoint every CHECKPOINT_EVERY frames,
+for the first frame, and whenever the ops would not be smaller than the text.
+A recipient that detects a gap sends `{"type": "typing_resync", "src": ...}`
+and gets a checkpoint; the request is relayed to the other workers, since the
+sending connection may live on any of them (`src` is unique across workers).
+Connections without the capability keep receiving the full `content` frames.
+"""
+
+import uuid
+from typing import List, Optional
+
+CHECKPOINT_EVERY = 20
+
+
+def apply_ops(text: str, ops: list) -> str:
+    """Apply [at, delete, insert] splices in order. Raises ValueError for ops outside the text."""
+    for op in ops:
+        try:
+            at, delete, insert = int(op[0]), int(op[1]), str(op[2])
+        except (TypeError, ValueError, IndexError):
+            raise ValueError(f"Malformed op {op!r}")
+        if at < 0 or delete < 0 or at + delete > len(text):
+            raise ValueError(f"Op {op!r} outside text of length {len(text)}")
+        text = text[:at] + insert + text[at + delete:]
+    return text
+
+
+def diff_ops(old: str, new: str) -> List[list]:
+    """One splice turning `old` into `new` (common prefix/suffix kept); [] if equal."""
+    if old == new:
+        return []
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+    end = 0
+    while end < limit - start and old[-1 - end] == new[-1 - end]:
+        end += 1
+    return [[start, len(old) - start - end, new[start:len(new) - end]]]
+
+
+class TypingStream:
+    """Diff state of one connection: its incoming frames and the stream relayed from it."""
+
+    def __init__(self):
+        # Random, not a counter: streams of every worker reach the same tabs
+        self.src = uuid.uuid4().hex[:12]
+        self.in_seq = 0
+        self.in_text = ""
+        self.out_seq = 0
+        self.out_text: Optional[str] = None
+        self.since_checkpoint = 0
+        self.checkpoint_requested = False
+
+    def receive(self, msg: dict) -> Optional[str]:
+        """Full text after an incoming frame; None if it must be ignored (resync needed)."""
+        seq = msg.get("seq")
+        if "ops" in msg:
+            if seq != self.in_seq + 1:
+                return None
+            try:
+                self.in_text = apply_ops(self.in_text, msg.get("ops") or [])
+            except ValueError:
+                return None
+        else:
+            self.in_text = msg.get("content", "") or ""
+        self.in_seq = seq if isinstance(seq, int) else self.in_seq + 1
+        return self.in_text
+
+    def encode(self, text: str) -> dict:
+        """Fields of the next outgoing diff frame for `text`."""
+        self.out_seq += 1
+        frame = {"src": self.src, "seq": self.out_seq}
+        ops = None
+        if self.out_text is not None and not self.checkpoint_requested and self.since_checkpoint < CHECKPOINT_EVERY:
+            ops = diff_ops(self.out_text, text)
+            if sum(len(op[2]) + 8 for op in ops) >= len(text):
+                ops = None  # Not smaller than the text itself
+        if ops is None:
+            frame["content"] = text
+            frame["checkpoint"] = True
+            self.since_checkpoint = 0
+            self.checkpoint_requested = False
+        else:
+            frame["ops"] = ops
+            self.since_checkpoint += 1
+        self.out_text = text
+        return frame
@@ -0,0 +1,260 @@
+"""
+Compact binary WebSocket encoding (negotiated per connection).
+
+JSON stays the default. A client connecting with `encoding=msgpack` gets a
+`{"type": "protocol", "encoding": "msgpack", "keys": [...], "types": [...]}`
+text frame first; every later server frame is a binary MessagePack frame in
+which
+
+- dict keys listed in KEYS are replaced by their index (any nesting level),
+- the top-level "type" value, if listed in TYPES, is replaced by its index.
+
+JSON keys and type names are always strings, so integers decode unambiguously
+and a key or type missing from the tables simply stays a string. The tables
+travel in the protocol frame, so a client never depends on a hard-coded copy.
+Client frames stay JSON text.
+
+All frames are produced as JSON strings (routing, services). CompactWebSocket
+wraps a connection and converts them in send_text; broadcasts hand the same
+string to many sockets, so the conversion is cached per string.
+
+Compression (permessage-deflate) is negotiated by uvicorn itself with every
+client that offers it; run.py exposes the switch as IRIS_WS_DEFLATE.
+"""
+
+import json
+import struct
+from functools import lru_cache
+from typing import Any
+
+from fastapi import WebSocket
+
+ENCODING = "msgpack"
+
+# Append-only: the order defines the codes
+KEYS = (
+    "type", "session_id", "sender", "role", "content", "id", "status", "temperature",
+    "shift", "msg", "message", "credits", "is_locked", "task_id", "description", "reward",
+    "submission", "rating", "user_id", "username", "logical_id", "is_overloaded",
+    "power_load", "power_capacity", "treasury", "agent_window", "hyper_mode", "is_hyper",
+    "is_optimized", "panic", "timestamp", "status_level", "original", "rewritten",
+    "optimized", "updated", "prompt", "is_active", "task", "online", "users", "agents",
+    "labels", "version", "src", "seq", "ops", "checkpoint", "theme", "instance",
+    "history",
+)
+
+TYPES = (
+    "gamestate_update", "typing_sync", "typing_start", "typing_stop", "task_update",
+    "economy_update", "lock_update", "user_status", "status_update", "optimizer_preview",
+    "optimizing_start", "labels_update", "system_alert", "agent_timeout", "session_timeout",
+    "report_accepted", "report_denied", "task_error", "error", "pong", "admin_task_delta",
+    "theme_update", "typing_resync", "init", "language_change", "translation_update",
+    "session_switch",
+)
+
+_KEY_CODES = {key: i for i, key in enumerate(KEYS)}
+_TYPE_CODES = {name: i for i, name in enumerate(TYPES)}
+
+
+def protocol_fields() -> dict:
+    """Fields of the protocol acknowledgement announcing the encoding."""
+    return {"encoding": ENCODING, "keys": list(KEYS), "types": list(TYPES)}
+
+
+def _compact(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {_KEY_CODES.get(k, k): _compact(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_compact(v) for v in value]
+    return value
+
+
+def _expand(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {(KEYS[k] if isinstance(k, int) else k): _expand(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_expand(v) for v in value]
+    return value
+
+
+# --- MessagePack (the subset JSON needs: nil, bool, int, float, str, array, map) ---
+
+def _pack(obj: Any, out: bytearray):
+    if obj is None:
+        out.append(0xC0)
+    elif obj is True:
+        out.append(0xC3)
+    elif obj is False:
+        out.append(0xC2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -32 <= obj < 0:
+            out.append(obj & 0xFF)
+        elif 0 <= obj <= 0xFF:
+            out += b"\xcc" + struct.pack(">B", obj)
+        elif 0 <= obj <= 0xFFFF:
+            out += b"\xcd" + struct.pack(">H", obj)
+        elif 0 <= obj <= 0xFFFFFFFF:
+            out += b"\xce" + struct.pack(">I", obj)
+        elif 0 <= obj <= 0xFFFFFFFFFFFFFFFF:
+            out += b"\xcf" + struct.pack(">Q", obj)
+        elif obj > 0:
+            raise ValueError(f"Integer {obj} out of MessagePack range")
+        elif -0x80 <= obj:
+            out += b"\xd0" + struct.pack(">b", obj)
+        elif -0x8000 <= obj:
+            out += b"\xd1" + struct.pack(">h", obj)
+        elif -0x80000000 <= obj:
+            out += b"\xd2" + struct.pack(">i", obj)
+        elif -0x8000000000000000 <= obj:
+            out += b"\xd3" + struct.pack(">q", obj)
+        else:
+            raise ValueError(f"Integer {obj} out of MessagePack range")
+    elif isinstance(obj, float):
+        single = struct.pack(">f", obj) if abs(obj) < 3.4e38 else None
+        if single is not None and struct.unpack(">f", single)[0] == obj:
+            out += b"\xca" + single  # e.g. 142.5 fits exactly
+        else:
+            out += b"\xcb" + struct.pack(">d", obj)
+    elif isinstance(obj, str):
+        data = obj.encode("utf-8")
+        n = len(data)
+        if n < 32:
+            out.append(0xA0 | n)
+        elif n <= 0xFF:
+            out += b"\xd9" + struct.pack(">B", n)
+        elif n <= 0xFFFF:
+            out += b"\xda" + struct.pack(">H", n)
+        else:
+            out += b"\xdb" + struct.pack(">I", n)
+        out += data
+    elif isinstance(obj, (list, tuple)):
+        n = len(obj)
+        if n < 16:
+            out.append(0x90 | n)
+        elif n <= 0xFFFF:
+            out += b"\xdc" + struct.pack(">H", n)
+        else:
+            out += b"\xdd" + struct.pack(">I", n)
+        for item in obj:
+            _pack(item, out)
+    elif isinstance(obj, dict):
+        n = len(obj)
+        if n < 16:
+            out.append(0x80 | n)
+        elif n <= 0xFFFF:
+            out += b"\xde" + struct.pack(">H", n)
+        else:
+            out += b"\xdf" + struct.pack(">I", n)
+        for key, value in obj.items():
+            _pack(key, out)
+            _pack(value, out)
+    else:
+        raise ValueError(f"Cannot encode {type(obj).__name__}")
+
+
+_FIXED = {
+    0xCC: ">B", 0xCD: ">H", 0xCE: ">I", 0xCF: ">Q",
+    0xD0: ">b", 0xD1: ">h", 0xD2: ">i", 0xD3: ">q",
+    0xCA: ">f", 0xCB: ">d",
+}
+
+
+def _unpack(data: bytes, pos: int):
+    tag = data[pos]
+    pos += 1
+    if tag < 0x80:
+        return tag, pos
+    if tag >= 0xE0:
+        return tag - 0x100, pos
+    if 0xA0 <= tag <= 0xBF:
+        n = tag & 0x1F
+        return data[pos:pos + n].decode("utf-8"), pos + n
+    if 0x90 <= tag <= 0x9F:
+        return _unpack_array(data, pos, tag & 0x0F)
+    if 0x80 <= tag <= 0x8F:
+        return _unpack_map(data, pos, tag & 0x0F)
+    if tag == 0xC0:
+        return None, pos
+    if tag in (0xC2, 0xC3):
+        return tag == 0xC3, pos
+    if tag in _FIXED:
+        fmt = _FIXED[tag]
+        return struct.unpack_from(fmt, data, pos)[0], pos + struct.calcsize(fmt)
+    if tag in (0xD9, 0xDA, 0xDB):
+        fmt = {0xD9: ">B", 0xDA: ">H", 0xDB: ">I"}[tag]
+        n = struct.unpack_from(fmt, data, pos)[0]
+        pos += struct.calcsize(fmt)
+        return data[pos:pos + n].decode("utf-8"), pos + n
+    if tag in (0xDC, 0xDD):
+        fmt = ">H" if tag == 0xDC else ">I"
+        n = struct.unpack_from(fmt, data, pos)[0]
+        return _unpack_array(data, pos + struct.calcsize(fmt), n)
+    if tag in (0xDE, 0xDF):
+        fmt = ">H" if tag == 0xDE else ">I"
+        n = struct.unpack_from(fmt, data, pos)[0]
+        return _unpack_map(data, pos + struct.calcsize(fmt), n)
+    raise ValueError(f"Unsupported MessagePack tag 0x{tag:02x}")
+
+
+def _unpack_array(data: bytes, pos: int, n: int):
+    items = []
+    for _ in range(n):
+        item, pos = _unpack(data, pos)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(data: bytes, pos: int, n: int):
+    result = {}
+    for _ in range(n):
+        key, pos = _unpack(data, pos)
+        result[key], pos = _unpack(data, pos)
+    return result, pos
+
+
+def encode(payload: Any) -> bytes:
+    """Compact binary frame for a JSON-compatible payload."""
+    payload = _compact(payload)
+    if isinstance(payload, dict) and isinstance(payload.get(0), str):
+        payload[0] = _TYPE_CODES.get(payload[0], payload[0])
+    out = bytearray()
+    _pack(payload, out)
+    return bytes(out)
+
+
+def decode(frame: bytes) -> Any:
+    """Inverse of encode (the client counterpart is in static/js/socket_client.js)."""
+    payload, _ = _unpack(frame, 0)
+    if isinstance(payload, dict) and isinstance(payload.get(0), int):
+        payload[0] = TYPES[payload[0]]
+    return _expand(payload)
+
+
+@lru_cache(maxsize=256)
+def encode_text(message: str) -> bytes:
+    """Binary frame for an already serialized JSON frame (cached: broadcasts repeat it)."""
+    return encode(json.loads(message))
+
+
+class CompactWebSocket:
+    """Connection that sends the binary encoding; everything else goes to the wrapped WebSocket."""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+
+    def __getattr__(self, name):
+        return getattr(self.websocket, name)
+
+    async def send_text(self, data: str):
+        try:
+            frame = encode_text(data)
+        except ValueError:
+            # Not JSON (never produced by the services): pass it through unchanged
+            await self.websocket.send_text(data)
+            return
+        await self.websocket.send_bytes(frame)
+
+    async def send_json(self, data: Any, mode: str = "text"):
+        await self.websocket.send_bytes(encode(data))
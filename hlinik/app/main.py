@@ -1,12 +1,12 @@
 from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from contextlib import asynccontextmanager
 import os
 from .routers import auth, sockets, admin_api, translations, docs, simulation, lore_editor_api
 from .database import init_db
 from .config import settings, BASE_DIR
-from .seed import seed_data
+from .seed import seed_data, open_credit_accounts
+from .static_assets import PrecompressedStaticFiles, static_url
 import asyncio
 import traceback
 import json
@@ -14,104 +14,124 @@ import time
 
 SAVE_INTERVAL = 60  # Save gamestate every 60 seconds
 
+async def tick_instance(gamestate, routing_logic, last: dict):
+    """One simulation tick of a single game instance. `last` holds the previously broadcast values."""
+    # 0. Check for agent response timeouts
+    current_time = time.time()
+    timeout_window = gamestate.agent_response_window
+
+    # Copy keys to avoid modification during iteration
+    # Uses GAMESTATE directly
+    pending_sessions = list(gamestate.pending_responses.keys())
+    for session_id in pending_sessions:
+        start_time = gamestate.pending_responses.get(session_id)
+        if start_time and (current_time - start_time) >= timeout_window:
+            # Timeout occurred - send error to user and block agent
+            await routing_logic.send_timeout_error_to_user(session_id)
+            await routing_logic.send_timeout_to_agent(session_id)
+            gamestate.mark_session_timeout(session_id)
+
+    # 1. Tick Chernobyl
+    new_val = gamestate.process_tick()
+
+    # 2. Calc Load
+    counts = routing_logic.get_active_counts()
+    is_low_latency = gamestate.agent_response_window <= 30
+    current_load = gamestate.calc_load(
+        active_terminals=counts["users"],
+        active_autopilots=counts["autopilots"],
+        low_latency_active=is_low_latency
+    )
+
+    # 3. Check Overload
+    overload_events = gamestate.check_overload()
+    current_is_overloaded = gamestate.is_overloaded
+
+    # Process Panic Mode (moved from gamestate)
+    if "panic_trigger" in overload_events:
+        should_panic = overload_events["panic_trigger"]
+
+        for i in range(1, gamestate.total_sessions + 1):
+            # Uses GAMESTATE setter
+            gamestate.set_panic_mode(i, "user", should_panic)
+            gamestate.set_panic_mode(i, "agent", should_panic)
+
+        # Send special panic update
+        await routing_logic.broadcast_global(json.dumps({
+            "type": "gamestate_update",
+            "panic_global": should_panic,
+            "temperature": gamestate.temperature,
+            "is_overloaded": current_is_overloaded
+        }))
+
+    # 4. Broadcast
+    # Detect changes (Optimization: only send if changed)
+    if (int(new_val) != int(last.get("val", -1)) or
+        current_load != last.get("load", -1) or
+        gamestate.treasury_balance != last.get("treasury", -1) or
+        current_is_overloaded != last.get("overload", False)):
+
+        await routing_logic.broadcast_global(json.dumps({
+            "type": "gamestate_update",
+            "temperature": new_val,
+            "shift": gamestate.global_shift_offset,
+            "power_load": current_load,
+            "power_capacity": gamestate.power_capacity,
+            "treasury": gamestate.treasury_balance,
+            "is_overloaded": current_is_overloaded,
+            "agent_window": gamestate.agent_response_window,
+            "hyper_mode": gamestate.hyper_visibility_mode.value
+        }))
+
+        last["val"] = new_val
+        last["load"] = current_load
+        last["treasury"] = gamestate.treasury_balance
+        last["overload"] = current_is_overloaded
+
+def save_instance_state(gamestate):
+    with open(gamestate.state_file, "w") as f:
+        json.dump(gamestate.export_state(), f, indent=2)
+
 async def game_loop():
-    last_val = -1
-    last_load = -1
-    last_treasury = -1
-    last_overload = False
+    # Last broadcast values per game instance
+    last_broadcast = {}
     ticks_since_save = 0
 
-    from .logic.gamestate import gamestate
-    from .logic.routing import routing_logic
+    from .logic.gamestate import all_gamestates
+    from .logic.routing import get_routing
+    from .logic.backend import state_backend
 
     while True:
         try:
             await asyncio.sleep(1)
             
-            # 0. Check for agent response timeouts
-            current_time = time.time()
-            timeout_window = gamestate.agent_response_window
-            
-            # Copy keys to avoid modification during iteration
-            # Uses GAMESTATE directly
-            pending_sessions = list(gamestate.pending_responses.keys())
-            for session_id in pending_sessions:
-                start_time = gamestate.pending_responses.get(session_id)
-                if start_time and (current_time - start_time) >= timeout_window:
-                    # Timeout occurred - send error to user and block agent
-                    await routing_logic.send_timeout_error_to_user(session_id)
-                    await routing_logic.send_timeout_to_agent(session_id)
-                    gamestate.mark_session_timeout(session_id)
-            
-            # 1. Tick Chernobyl
-            new_val = gamestate.process_tick()
-            
-            # 2. Calc Load
-            counts = routing_logic.get_active_counts()
-            is_low_latency = gamestate.agent_response_window <= 30
-            current_load = gamestate.calc_load(
-                active_terminals=counts["users"],
-                active_autopilots=counts["autopilots"],
-                low_latency_active=is_low_latency
-            )
-            
-            # 3. Check Overload
-            overload_events = gamestate.check_overload()
-            current_is_overloaded = gamestate.is_overloaded
-
-            # Process Panic Mode (moved from gamestate)
-            if "panic_trigger" in overload_events:
-                should_panic = overload_events["panic_trigger"]
-                
-                total_sessions = settings.TOTAL_SESSIONS
-                
-                for i in range(1, total_sessions + 1):
-                    # Uses GAMESTATE setter
-                    gamestate.set_panic_mode(i, "user", should_panic)
-                    gamestate.set_panic_mode(i, "agent", should_panic)
-                
-                # Send special panic update
-                await routing_logic.broadcast_global(json.dumps({
-                    "type": "gamestate_update",
-                    "panic_global": should_panic,
-                    "temperature": gamestate.temperature,
-                    "is_overloaded": current_is_overloaded
-                }))
-            
-            # 4. Broadcast
-            # Detect changes (Optimization: only send if changed)
-            if (int(new_val) != int(last_val) or 
-                current_load != last_load or 
-                gamestate.treasury_balance != last_treasury or
-                current_is_overloaded != last_overload):
-                
-                await routing_logic.broadcast_global(json.dumps({
-                    "type": "gamestate_update",
-                    "temperature": new_val,
-                    "shift": gamestate.global_shift_offset,
-                    "power_load": current_load,
-                    "power_capacity": gamestate.power_capacity,
-                    "treasury": gamestate.treasury_balance,
-                    "is_overloaded": current_is_overloaded,
-                    "agent_window": gamestate.agent_response_window,
-                    "hyper_mode": gamestate.hyper_visibility_mode.value
-                }))
-                
-                last_val = new_val
-                last_load = current_load
-                last_treasury = gamestate.treasury_balance
-                last_overload = current_is_overloaded
+            # Multi-worker: only the elected leader runs the simulation,
+            # followers receive the resulting state through the backend
+            if not state_backend.is_leader:
+                continue
+
+            with state_backend.track_changes():
+                # Instances tick independently; a failing instance does not stall the others
+                errors = []
+                for gamestate in all_gamestates():
+                    last = last_broadcast.setdefault(gamestate.instance_id, {})
+                    try:
+                        await tick_instance(gamestate, get_routing(gamestate.instance_id), last)
+                    except Exception as e:
+                        errors.append((gamestate.instance_id, e))
+                if errors:
+                    instance_id, error = errors[0]
+                    raise RuntimeError(f"tick failed for instance '{instance_id}'") from error
 
             # Periodic save (survives SIGKILL)
             ticks_since_save += 1
             if ticks_since_save >= SAVE_INTERVAL:
                 ticks_since_save = 0
-                try:
-                    state_file = BASE_DIR / "data" / "gamestate.json"
-                    with open(state_file, "w") as f:
-                        json.dump(gamestate.export_state(), f, indent=2)
-                except Exception as e:
-                    print(f"WARN: Periodic save failed: {e}")
+                for gamestate in all_gamestates():
+                    try:
+                        save_instance_state(gamestate)
+                    except Exception as e:
+                        print(f"WARN: Periodic save failed ({gamestate.instance_id}): {e}")
 
         except asyncio.CancelledError:
             # Handle cancellation gracefully
@@ -124,56 +144,101 @@ async def game_loop():
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    from .logic.gamestate import all_gamestates
+    from .logic.backend import state_backend
+    from .logic.lore_repository import lore_repository
+    from .logic.task_pool import task_pool
+    from .logic.evaluation_queue import evaluation_queue
+    from .logic.autopilot import autopilot
+
+    # Startup (multi-worker: elect leader first, only the leader seeds)
+    await state_backend.start()
     init_db()
-    seed_data()
+    if state_backend.is_leader:
+        seed_data()
+        open_credit_accounts()
     
     # --- STATE PERSISTENCE: Load on Startup ---
-    from pathlib import Path
-    from .logic.gamestate import gamestate
-    from .logic.routing import routing_logic
-    
     data_dir = BASE_DIR / "data"
     data_dir.mkdir(parents=True, exist_ok=True)
-    state_file = data_dir / "gamestate.json"
     
-    if state_file.exists():
+    for gamestate in all_gamestates():
+        state_file = gamestate.state_file
+        if state_file.exists():
+            try:
+                with open(state_file, "r") as f:
+                    state_data = json.load(f)
+                gamestate.import_state(state_data)
+                print(f"System state restored from persistence ({gamestate.instance_id}).")
+            except Exception as e:
+                print(f"WARN: Could not restore GameState ({gamestate.instance_id}): {e}")
+        else:
+            print(f"No persistence file found ({gamestate.instance_id}). Starting with fresh state.")
+    
+    if settings.PRERENDER_DOCS:
         try:
-            with open(state_file, "r") as f:
-                state_data = json.load(f)
-            gamestate.import_state(state_data)
-            print("System state restored from persistence.")
+            print(f"Pre-rendered {docs.prerender_docs()} documentation pages.")
         except Exception as e:
-            print(f"WARN: Could not restore GameState: {e}")
-    else:
-        print("No persistence file found. Starting with fresh state.")
-    
+            print(f"WARN: Could not pre-render documentation: {e}")
+
+    # Compress static assets off the event loop; requests before it finishes compress on demand
+    async def precompress_static():
+        for mount in static_mounts:
+            try:
+                await asyncio.to_thread(mount.precompress_all)
+            except Exception as e:
+                print(f"WARN: Static precompression failed: {e}")
+    precompress_task = asyncio.create_task(precompress_static())
+
+    # Pre-generate task descriptions so approvals do not wait for the LLM
+    task_pool.schedule_refill()
+    # Score submitted tasks in the background (leader also picks up unscored ones from before)
+    evaluation_queue.start(backlog=state_backend.is_leader)
+
     # Background Task
     task = asyncio.create_task(game_loop())
     yield
     
     # --- STATE PERSISTENCE: Save on Shutdown ---
     task.cancel()
-    try:
-        state_data = gamestate.export_state()
-        with open(state_file, "w") as f:
-            json.dump(state_data, f, indent=2)
-        print("System state saved to persistence.")
-    except Exception as e:
-        print(f"ERROR: Could not save GameState: {e}")
+    precompress_task.cancel()
+    task_pool.stop()
+    evaluation_queue.stop()
+    autopilot.stop()
+    lore_repository.flush()  # Pending (debounced) lore editor writes
+    if state_backend.is_leader:
+        for gamestate in all_gamestates():
+            try:
+                save_instance_state(gamestate)
+                print(f"System state saved to persistence ({gamestate.instance_id}).")
+            except Exception as e:
+                print(f"ERROR: Could not save GameState ({gamestate.instance_id}): {e}")
+    await state_backend.stop()
 
 app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION, lifespan=lifespan)
 
-# Static Files
-app.mount("/static", StaticFiles(directory=BASE_DIR / "static"), name="static")
+if settings.STATE_BACKEND != "local":
+    @app.middleware("http")
+    async def replicate_state_changes(request: Request, call_next):
+        # Admin REST endpoints mutate GameState directly; share the changes with other workers
+        from .logic.backend import state_backend
+        with state_backend.track_changes():
+            return await call_next(request)
+
+# Static Files (precompressed variants, fingerprinted URLs - see static_assets.py)
+static_mounts = [PrecompressedStaticFiles(directory=BASE_DIR / "static", url_prefix="/static")]
+app.mount("/static", static_mounts[0], name="static")
 lore_web_dir = BASE_DIR.parent / "lore-web"
 
 if lore_web_dir.exists():
-    app.mount("/lore-web", StaticFiles(directory=str(lore_web_dir), html=True), name="lore-web")
-    app.mount("/organizer-wiki", StaticFiles(directory=str(lore_web_dir), html=True), name="wiki")
+    lore_web_files = PrecompressedStaticFiles(directory=str(lore_web_dir), html=True, url_prefix="/lore-web")
+    static_mounts.append(lore_web_files)
+    app.mount("/lore-web", lore_web_files, name="lore-web")
+    app.mount("/organizer-wiki", lore_web_files, name="wiki")
 
 # Templates
 templates = Jinja2Templates(directory=BASE_DIR / "app" / "templates")
+templates.env.globals["static_url"] = static_url
 
 # Routers
 app.include_router(auth.router)
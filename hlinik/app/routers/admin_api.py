@@ -2,20 +2,25 @@ from fastapi import APIRouter, Depends, HTTPException, Body
 from typing import Dict, Optional
 import json
 import time
+from datetime import datetime
 
 from pydantic import BaseModel
 
 from ..dependencies import get_current_admin, get_current_root
 from ..logic.llm_core import llm_service, LLMConfig, LLMProvider
-from ..logic.gamestate import gamestate
-from ..logic.routing import routing_logic
+from ..logic.gamestate import get_gamestate, all_gamestates
+from ..logic.routing import get_routing, all_routing
+from ..logic.labels import label_store, LABELS_PATH
+from ..logic.lore_repository import lore_repository
+from ..logic.lore_bundle import lore_bundler
+from ..logic.economy import bulk_update_players
+from ..logic.ledger import record_treasury, reconcile
+from ..logic.task_feed import query_tasks, serialize_task, push_task_delta_by_id, DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+from ..logic.typing_coalescer import typing_stats_snapshot
 from ..services.admin_service import admin_service
 from ..config import BASE_DIR
 from ..database import SessionLocal, SystemConfig, User, Task, TaskStatus, ChatLog, UserRole, SystemLog, StatusLevel
 
-# Persistent storage path for admin-defined session labels
-LABELS_PATH = BASE_DIR / "data" / "admin_labels.json"
-
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
 @router.get("/llm/models/{provider}")
@@ -24,6 +29,7 @@ async def list_models(provider: LLMProvider, admin=Depends(get_current_admin)):
 
 @router.get("/llm/config")
 async def get_llm_config(admin=Depends(get_current_admin)):
+    gamestate = get_gamestate(admin.instance_id)
     return {
         "task": gamestate.llm_config_task,
         "hyper": gamestate.llm_config_hyper,
@@ -43,7 +49,7 @@ class OptimizerConfigPayload(BaseModel):
 @router.post("/llm/config/{config_type}")
 async def set_llm_config(config_type: str, payload: dict = Body(...), admin=Depends(get_current_admin)):
     try:
-        await admin_service.update_llm_config(config_type, payload)
+        await admin_service.update_llm_config(config_type, payload, admin.instance_id)
         return {"status": "ok", "config_type": config_type}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -84,27 +90,56 @@ class PanicToggle(BaseModel):
 
 @router.get("/panic/state/{session_id}")
 async def get_panic_state(session_id: int, admin=Depends(get_current_admin)):
+    gamestate = get_gamestate(admin.instance_id)
     return gamestate.get_panic_state(session_id)
 
 @router.post("/panic/toggle")
 async def set_panic(toggle: PanicToggle, admin=Depends(get_current_admin)):
     try:
-        state = await admin_service.set_panic_mode_for_session(toggle.session_id, toggle.target, toggle.enabled)
+        state = await admin_service.set_panic_mode_for_session(toggle.session_id, toggle.target, toggle.enabled, admin.instance_id)
         return {"status": "ok", "state": state}
     except ValueError as e:
          raise HTTPException(status_code=400, detail=str(e))
 
+class CensorModeUpdate(BaseModel):
+    session_id: Optional[int] = None  # None = instance default
+    mode: Optional[str] = None  # "llm" / "hybrid" / "rules"; None drops the session override
+
+@router.get("/censor")
+async def get_censor(admin=Depends(get_current_admin)):
+    return admin_service.censor_state(admin.instance_id)
+
+@router.post("/censor/mode")
+async def set_censor_mode(update: CensorModeUpdate, admin=Depends(get_current_admin)):
+    try:
+        return await admin_service.set_censor_mode(update.session_id, update.mode, admin.instance_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/censor/rules")
+async def set_censor_rules(rules: dict = Body(...), admin=Depends(get_current_admin)):
+    try:
+        return admin_service.update_censor_rules(rules, admin.instance_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 class EconomyAction(BaseModel):
     user_id: int
     amount: int = 0
     reason: str = "Admin Action"
 
 @router.get("/data/users")
-async def get_users(admin=Depends(get_current_admin)):
+async def get_users(cursor: Optional[int] = None, limit: int = DEFAULT_PAGE_LIMIT, admin=Depends(get_current_admin)):
+    """Instance users ordered by id; pass `next_cursor` back as `cursor` for the next page."""
+    limit = max(1, min(limit, MAX_PAGE_LIMIT))
     db = SessionLocal()
-    users = db.query(User).filter(User.role == UserRole.USER).all()
+    query = db.query(User).filter(User.role == UserRole.USER, User.instance_id == admin.instance_id)
+    if cursor is not None:
+        query = query.filter(User.id > cursor)
+    users = query.order_by(User.id).limit(limit + 1).all()
+    next_cursor = users[limit - 1].id if len(users) > limit else None
     res = []
-    for u in users:
+    for u in users[:limit]:
         res.append({
             "id": u.id,
             "username": u.username,
@@ -113,7 +148,7 @@ async def get_users(admin=Depends(get_current_admin)):
             "is_locked": u.is_locked
         })
     db.close()
-    return res
+    return {"users": res, "next_cursor": next_cursor}
 
 @router.post("/economy/fine")
 async def fine_user(action: EconomyAction, admin=Depends(get_current_admin)):
@@ -163,7 +198,7 @@ async def set_user_status(action: StatusUpdate, admin=Depends(get_current_admin)
 async def global_bonus(action: EconomyAction, admin=Depends(get_current_admin)):
     db = SessionLocal()
     try:
-        count = await admin_service.global_bonus(db, action.amount, action.reason)
+        count = await admin_service.global_bonus(db, action.amount, action.reason, admin.instance_id)
         return {"status": "ok", "count": count}
     finally:
         db.close()
@@ -172,11 +207,21 @@ async def global_bonus(action: EconomyAction, admin=Depends(get_current_admin)):
 async def reset_economy(admin=Depends(get_current_admin)):
     db = SessionLocal()
     try:
-        count = await admin_service.reset_economy(db)
+        count = await admin_service.reset_economy(db, admin.instance_id)
         return {"status": "reset", "count": count}
     finally:
         db.close()
 
+@router.get("/economy/reconcile")
+async def reconcile_ledger(admin=Depends(get_current_root)):
+    """Players whose credits differ from the sum of their credit ledger (should be empty)."""
+    db = SessionLocal()
+    try:
+        mismatches = reconcile(db, admin.instance_id)
+        return {"status": "ok" if not mismatches else "mismatch", "mismatches": mismatches}
+    finally:
+        db.close()
+
 # Tasks
 class TaskAction(BaseModel):
     task_id: int
@@ -185,23 +230,30 @@ class TaskAction(BaseModel):
     prompt_content: str = None # v2.0 Task Editing
 
 @router.get("/tasks")
-async def get_tasks(admin=Depends(get_current_admin)):
+async def get_tasks(
+    cursor: Optional[int] = None,
+    limit: int = DEFAULT_PAGE_LIMIT,
+    status: Optional[TaskStatus] = None,
+    user_id: Optional[int] = None,
+    updated_since: Optional[datetime] = None,
+    admin=Depends(get_current_admin),
+):
+    """
+    Tasks of the admin's instance ordered by id.
+    `next_cursor` is the `cursor` for the following page (None on the last one);
+    `server_time` can be passed as `updated_since` to fetch only later changes.
+    """
+    server_time = datetime.utcnow()
     db = SessionLocal()
-    tasks = db.query(Task).all()
-    # Simple serialization
-    res = []
-    for t in tasks:
-        res.append({
-            "id": t.id,
-            "user_id": t.user_id,
-            "prompt": t.prompt_desc,
-            "status": t.status.value if hasattr(t.status, "value") else str(t.status),
-            "reward": t.reward_offered,
-            "submission": t.submission_content,
-            "rating": t.final_rating
-        })
-    db.close()
-    return res
+    try:
+        tasks, next_cursor = query_tasks(db, admin.instance_id, cursor, limit, status, user_id, updated_since)
+        return {
+            "tasks": [serialize_task(t) for t in tasks],
+            "next_cursor": next_cursor,
+            "server_time": server_time.isoformat(),
+        }
+    finally:
+        db.close()
 
 @router.post("/tasks/approve")
 async def approve_task(action: TaskAction, admin=Depends(get_current_admin)):
@@ -214,6 +266,11 @@ async def approve_task(action: TaskAction, admin=Depends(get_current_admin)):
     finally:
         db.close()
 
+@router.post("/tasks/approve_all")
+async def approve_all_tasks(admin=Depends(get_current_admin)):
+    approved = await admin_service.approve_all_pending(admin.instance_id)
+    return {"status": "approved", "task_ids": approved, "count": len(approved)}
+
 class GradeAction(BaseModel):
     task_id: int
     rating_modifier: float  # 0.0, 0.5, 1.0, 2.0
@@ -234,6 +291,7 @@ async def grade_task(action: GradeAction, admin=Depends(get_current_admin)):
 
 @router.post("/tasks/pay")
 async def pay_task(action: TaskAction, admin=Depends(get_current_admin)):
+    routing_logic = get_routing(admin.instance_id)
     # Keep legacy direct call for now? Or implement in service.
     # Logic in service is 'grade_task' but that assumes modifier.
     # 'pay_task' uses rating. Let's redirect to economy helper directly or make a service method.
@@ -255,21 +313,24 @@ async def pay_task(action: TaskAction, admin=Depends(get_current_admin)):
         "net_reward": result.get("net_reward"),
         "rating": rating
     }))
-    await routing_logic.broadcast_to_admins(json.dumps({"type": "admin_refresh_tasks"}))
+    await push_task_delta_by_id(action.task_id)
     return result
 
 @router.post("/optimizer/toggle")
 async def toggle_optimizer(active: bool = Body(..., embed=True), admin=Depends(get_current_admin)):
+    gamestate = get_gamestate(admin.instance_id)
     gamestate.optimizer_active = active
     return {"status": "ok", "optimizer_active": gamestate.optimizer_active}
 
 @router.post("/optimizer/prompt")
 async def set_optimizer_prompt(prompt: str = Body(..., embed=True), admin=Depends(get_current_admin)):
+    gamestate = get_gamestate(admin.instance_id)
     gamestate.optimizer_prompt = prompt
     return {"status": "ok", "optimizer_prompt": gamestate.optimizer_prompt}
 
 @router.get("/controls/state")
 async def get_control_state(admin=Depends(get_current_admin)):
+    gamestate = get_gamestate(admin.instance_id)
     return {
         "optimizer_active": gamestate.optimizer_active,
         "agent_response_window": gamestate.agent_response_window,
@@ -286,25 +347,16 @@ async def get_control_state(admin=Depends(get_current_admin)):
 
 @router.get("/lore/data")
 async def get_lore_data(admin=Depends(get_current_admin)):
+    # Served from the in-memory lore repository (no file reads per call)
     try:
-        lore_data_dir = BASE_DIR.parent / "lore-web" / "data"
-        roles_path = lore_data_dir / "roles.json"
-        relations_path = lore_data_dir / "relations.json"
-        
-        data = {
-            "roles": [],
-            "relations": []
+        try:
+            roles = lore_repository.get("roles").data
+        except FileNotFoundError:
+            roles = []
+        return {
+            "roles": roles,
+            "relations": lore_bundler.legacy_relations(),
         }
-        
-        if roles_path.exists():
-            with open(roles_path, "r") as f:
-                data["roles"] = json.load(f)
-                
-        if relations_path.exists():
-            with open(relations_path, "r") as f:
-                data["relations"] = json.load(f)
-                
-        return data
     except Exception as e:
         print(f"Error loading lore data: {e}")
         return {"roles": [], "relations": [], "error": str(e)}
@@ -314,6 +366,8 @@ class TimerAction(BaseModel):
 
 @router.post("/timer")
 async def set_timer(action: TimerAction, admin=Depends(get_current_admin)):
+    gamestate = get_gamestate(admin.instance_id)
+    routing_logic = get_routing(admin.instance_id)
     gamestate.agent_response_window = action.seconds
 
     await routing_logic.broadcast_global(json.dumps({
@@ -323,12 +377,22 @@ async def set_timer(action: TimerAction, admin=Depends(get_current_admin)):
 
     return {"status": "ok", "window": gamestate.agent_response_window}
 
+def _record_treasury(instance_id: str, delta: int, balance: int, reason: str, note: Optional[str] = None):
+    db = SessionLocal()
+    try:
+        record_treasury(db, instance_id, delta, balance, reason, note)
+        db.commit()
+    finally:
+        db.close()
+
 @router.post("/power/buy")
 async def buy_power(admin=Depends(get_current_admin)):
+    gamestate = get_gamestate(admin.instance_id)
     cost = 1000
     if gamestate.treasury_balance >= cost:
         gamestate.treasury_balance -= cost
         gamestate.power_capacity += 50
+        _record_treasury(admin.instance_id, -cost, gamestate.treasury_balance, "power_buy")
         
         gamestate.power_boost_end_time = time.time() + (30 * 60)
         
@@ -346,27 +410,27 @@ class LabelUpdate(BaseModel):
 
 @router.post("/labels")
 async def save_labels(action: LabelUpdate, admin=Depends(get_current_admin)):
-    LABELS_PATH.parent.mkdir(parents=True, exist_ok=True)
     try:
-        with open(LABELS_PATH, "w") as f:
-            json.dump(action.labels, f)
-        return {"status": "saved"}
+        changes = label_store.replace(action.labels)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    # Push only the changed keys to open terminals (labels are shared by all instances)
+    if changes:
+        message = label_store.update_message(changes)
+        for routing_logic in all_routing():
+            await routing_logic.broadcast_global(message)
+    return {"status": "saved", "version": label_store.version, "changed": len(changes)}
 
 @router.get("/labels")
 async def get_labels(admin=Depends(get_current_admin)):
-    if LABELS_PATH.exists():
-        try:
-            with open(LABELS_PATH, "r") as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
+    return label_store.labels
 
 @router.post("/debug/treasury")
 async def set_treasury(amount: int = Body(..., embed=True), admin=Depends(get_current_admin)):
+    gamestate = get_gamestate(admin.instance_id)
+    delta = amount - gamestate.treasury_balance
     gamestate.treasury_balance = amount
+    _record_treasury(admin.instance_id, delta, amount, "adjust", f"set by {admin.username}")
     return {"status": "ok", "treasury": gamestate.treasury_balance}
 
 class SystemConstants(BaseModel):
@@ -391,13 +455,14 @@ class SystemConstants(BaseModel):
 async def update_constants(data: SystemConstants, admin=Depends(get_current_admin)):
     db = SessionLocal()
     try:
-        await admin_service.update_constants(db, admin.username, data.dict())
+        await admin_service.update_constants(db, admin.username, data.dict(), admin.instance_id)
         return {"status": "updated", "values": data.dict()}
     finally:
         db.close()
 
 @router.get("/root/state")
 async def get_root_state(admin=Depends(get_current_root)):
+    gamestate = get_gamestate(admin.instance_id)
     return {
         "tax_rate": gamestate.tax_rate,
         "power_cap": gamestate.power_capacity,
@@ -423,6 +488,11 @@ async def get_root_state(admin=Depends(get_current_root)):
         }
     }
 
+@router.get("/typing/stats")
+async def get_typing_stats(admin=Depends(get_current_admin)):
+    """Keystroke frames received/forwarded/suppressed by this worker's coalescers."""
+    return typing_stats_snapshot()
+
 @router.get("/system_logs")
 async def get_system_logs(admin=Depends(get_current_admin)):
     db = SessionLocal()
@@ -440,21 +510,20 @@ async def reset_system_logs(admin=Depends(get_current_admin)):
 
 @router.post("/root/reset")
 async def reset_system(admin=Depends(get_current_admin)):
+    gamestate = get_gamestate(admin.instance_id)
+    routing_logic = get_routing(admin.instance_id)
     db = SessionLocal()
     try:
-        # 1. Truncate Logs
+        # 1. Truncate Logs (chat history of this game instance only)
         db.query(SystemLog).delete()
-        db.query(ChatLog).delete()
+        db.query(ChatLog).filter(ChatLog.instance_id == admin.instance_id).delete()
         
-        # 2. Reset Users
-        users = db.query(User).filter(User.role == UserRole.USER).all()
-        for u in users:
-            u.credits = 100
-            u.is_locked = False
-            u.status_level = "low"
+        # 2. Reset Users (clients reload on system_reset below)
+        bulk_update_players(db, admin.instance_id, "reset", credits=100, is_locked=False, status_level=StatusLevel.LOW)
         
         # 3. Clear Tasks
-        db.query(Task).delete()
+        instance_user_ids = db.query(User.id).filter(User.instance_id == admin.instance_id)
+        db.query(Task).filter(Task.user_id.in_(instance_user_ids)).delete(synchronize_session=False)
         
         db.commit()
         
@@ -477,6 +546,7 @@ class AIConfigUpdate(BaseModel):
 
 @router.get("/root/ai_config")
 async def get_ai_config(admin=Depends(get_current_root)):
+    gamestate = get_gamestate(admin.instance_id)
     return {
         "status": "ok",
         "optimizer_prompt": gamestate.optimizer_prompt,
@@ -487,6 +557,7 @@ async def get_ai_config(admin=Depends(get_current_root)):
 
 @router.post("/root/ai_config")
 async def update_ai_config(config: AIConfigUpdate, admin=Depends(get_current_root)):
+    gamestate = get_gamestate(admin.instance_id)
     gamestate.optimizer_prompt = config.optimizer_prompt
     gamestate.llm_config_hyper.model_name = config.autopilot_model
     
@@ -512,7 +583,9 @@ async def restart_server(admin=Depends(get_current_root)):
     db.commit()
     db.close()
 
-    await routing_logic.broadcast_global('{"type": "server_restart", "message": "Server restarting in 3 seconds..."}')
+    # Affects every game instance hosted by this server
+    for routing_logic in all_routing():
+        await routing_logic.broadcast_global('{"type": "server_restart", "message": "Server restarting in 3 seconds..."}')
 
     run_dir = str(BASE_DIR)
     restart_script = f"""
@@ -537,17 +610,19 @@ async def factory_reset(admin=Depends(get_current_root)):
     db.commit()
     db.close()
 
-    await routing_logic.broadcast_global('{"type": "factory_reset", "message": "System will be wiped and restarted in 5 seconds..."}')
+    # Affects every game instance hosted by this server
+    for routing_logic in all_routing():
+        await routing_logic.broadcast_global('{"type": "factory_reset", "message": "System will be wiped and restarted in 5 seconds..."}')
 
     db_path = str(BASE_DIR / "data" / "iris.db")
-    labels_path = str(BASE_DIR / "data" / "admin_labels.json")
-    gamestate_path = str(BASE_DIR / "data" / "gamestate.json")
+    labels_path = str(LABELS_PATH)
+    gamestate_paths = [str(game.state_file) for game in all_gamestates()]
     run_dir = str(BASE_DIR)
 
     reset_script = f"""
 import time, os, signal, subprocess
 time.sleep(3)
-for path in [{db_path!r}, {labels_path!r}, {gamestate_path!r}]:
+for path in [{db_path!r}, {labels_path!r}, *{gamestate_paths!r}]:
     try:
         if os.path.exists(path):
             os.remove(path)
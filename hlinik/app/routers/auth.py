@@ -8,9 +8,11 @@ from typing import Annotated
 from .. import dependencies, database
 
 from ..config import BASE_DIR
+from ..static_assets import static_url
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 templates = Jinja2Templates(directory=str(BASE_DIR / "app" / "templates"))
+templates.env.globals["static_url"] = static_url
 
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 
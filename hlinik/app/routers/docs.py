@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Request, HTTPException, Depends
+from fastapi import APIRouter, Request, HTTPException, Depends, Response
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+import hashlib
 import markdown
 import os
 from ..dependencies import get_current_user_cookie
@@ -11,6 +14,8 @@ router = APIRouter(prefix="/doc", tags=["docs"])
 templates = Jinja2Templates(directory=str(BASE_DIR / "app" / "templates"))
 
 DOCS_DIR = str(BASE_DIR / "docs")
+DOC_KEYS = ("user", "agent", "admin", "root", "system")
+THEMES = ("green", "pink", "gold")
 
 def get_manual_path(doc_key: str) -> str:
     # Role-specific manuals in docs/, falling back to main MANUAL.md
@@ -33,24 +38,43 @@ def get_manual_path(doc_key: str) -> str:
         return fallback
     return None
 
-@router.get("/view/{doc_key}", response_class=HTMLResponse)
-async def view_documentation(request: Request, doc_key: str, current_user: User = Depends(get_current_user_cookie)):
-    # Security check: Only Admin can see 'system' docs
-    if doc_key == "system" and current_user.role != UserRole.ADMIN:
-        raise HTTPException(status_code=403, detail="Access Denied")
-    
-    # Access check: Users shouldn't see Admin manual
-    if doc_key in ["admin", "root"] and current_user.role != UserRole.ADMIN:
-         raise HTTPException(status_code=403, detail="Access Denied")
-
+def resolve_doc_path(doc_key: str) -> Optional[str]:
     file_path = get_manual_path(doc_key)
     if not file_path or not os.path.exists(file_path):
         # Fallback for system docs if README missing
         if doc_key == "system":
-             file_path = os.path.join(DOCS_DIR, "ARCHITEKTURA.md")
-        
+            file_path = os.path.join(DOCS_DIR, "ARCHITEKTURA.md")
         if not file_path or not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="Documentation not found")
+            return None
+    return file_path
+
+def theme_for_role(role) -> str:
+    if role == UserRole.AGENT:
+        return "pink"
+    if role == UserRole.ADMIN:
+        return "gold"
+    return "green"  # Default user
+
+
+class RenderedDoc:
+    """Fully rendered doc_viewer page of one manual + theme."""
+    __slots__ = ("body", "etag", "mtime", "last_modified")
+
+    def __init__(self, body: bytes, mtime: float):
+        self.body = body
+        self.etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        self.mtime = int(mtime)
+        self.last_modified = formatdate(self.mtime, usegmt=True)
+
+
+# (doc_key, theme) -> (file path, mtime, rendered page); re-rendered when the file changes
+_render_cache: Dict[tuple, tuple] = {}
+
+def render_doc(doc_key: str, file_path: str, theme: str) -> RenderedDoc:
+    mtime = os.stat(file_path).st_mtime
+    cached = _render_cache.get((doc_key, theme))
+    if cached and cached[0] == file_path and cached[1] == mtime:
+        return cached[2]
 
     with open(file_path, "r", encoding="utf-8") as f:
         text = f.read()
@@ -63,16 +87,60 @@ async def view_documentation(request: Request, doc_key: str, current_user: User
     # Let's check main.py later. For now, render HTML.
 
     html_content = markdown.markdown(text, extensions=['fenced_code', 'tables'])
+    page = templates.get_template("doc_viewer.html").render(
+        content=html_content,
+        title=f"Manual: {doc_key.upper()}",
+        theme=theme,
+    )
+    rendered = RenderedDoc(page.encode("utf-8"), mtime)
+    _render_cache[(doc_key, theme)] = (file_path, mtime, rendered)
+    return rendered
+
+def prerender_docs() -> int:
+    """Render all manuals in all themes (startup), so first views are cache hits."""
+    count = 0
+    for doc_key in DOC_KEYS:
+        file_path = resolve_doc_path(doc_key)
+        if not file_path:
+            continue
+        for theme in THEMES:
+            render_doc(doc_key, file_path, theme)
+            count += 1
+    return count
 
-    theme = "green" # Default user
-    if current_user.role == UserRole.AGENT:
-        theme = "pink"
-    elif current_user.role == UserRole.ADMIN:
-        theme = "gold"
-
-    return templates.TemplateResponse("doc_viewer.html", {
-        "request": request, 
-        "content": html_content,
-        "title": f"Manual: {doc_key.upper()}",
-        "theme": theme
-    })
+def _not_modified(request: Request, rendered: RenderedDoc) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return rendered.etag in if_none_match
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return rendered.mtime <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+@router.get("/view/{doc_key}", response_class=HTMLResponse)
+async def view_documentation(request: Request, doc_key: str, current_user: User = Depends(get_current_user_cookie)):
+    # Security check: Only Admin can see 'system' docs
+    if doc_key == "system" and current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Access Denied")
+    
+    # Access check: Users shouldn't see Admin manual
+    if doc_key in ["admin", "root"] and current_user.role != UserRole.ADMIN:
+         raise HTTPException(status_code=403, detail="Access Denied")
+
+    file_path = resolve_doc_path(doc_key)
+    if not file_path:
+        raise HTTPException(status_code=404, detail="Documentation not found")
+
+    # Rendered once per file version + theme; repeat views revalidate via ETag / Last-Modified
+    rendered = render_doc(doc_key, file_path, theme_for_role(current_user.role))
+    headers = {
+        "ETag": rendered.etag,
+        "Last-Modified": rendered.last_modified,
+        "Cache-Control": "private, no-cache",
+    }
+    if _not_modified(request, rendered):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=rendered.body, headers=headers)
@@ -3,48 +3,20 @@ Lore Editor API - CRUD operations for lore-web JSON files.
 Provides endpoints for managing users, tasks, relations, and other JSON data.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Request, Response
 from fastapi.responses import JSONResponse
 from typing import Dict, List, Optional, Any
 from pathlib import Path
-import json
 import re
-import os
 
 from ..dependencies import get_current_admin
-from ..config import BASE_DIR
+from ..logic.lore_bundle import lore_bundler
+from ..logic.lore_repository import (
+    lore_repository, reference_source, LoreFile, LORE_DATA_DIR, EDITABLE_FILES, REFERENCE_PATTERNS,
+)
 
 router = APIRouter(prefix="/api/lore-editor", tags=["lore-editor"])
 
-# Path to lore-web data directory
-LORE_DATA_DIR = BASE_DIR.parent / "lore-web" / "data"
-
-# Editable JSON files configuration
-EDITABLE_FILES = {
-    "users": {"file": "users.json", "key": "users", "id_field": "id", "display_field": "obcanske_jmeno"},
-    "tasks": {"file": "tasks.json", "key": "tasks", "id_field": "id", "display_field": "nazev"},
-    "relations": {"file": "relations_v2.json", "key": "relations", "id_field": "id", "display_field": "nazev"},
-    "abilities": {"file": "abilities.json", "key": "abilities", "id_field": "id", "display_field": "nazev"},
-    "task_types": {"file": "task_types.json", "key": "types", "id_field": "id", "display_field": "nazev"},
-    "relation_types": {"file": "relation_types.json", "key": "types", "id_field": "id", "display_field": "nazev"},
-    "story_nodes": {"file": "story_nodes.json", "key": "nodes", "id_field": "id", "display_field": "title"},
-    "roles": {"file": "roles.json", "key": "roles", "id_field": "id", "display_field": "nazev"},
-    "config": {"file": "config.json", "key": None, "id_field": None, "display_field": None},  # Single object
-}
-
-# Reference patterns for smart dropdowns
-REFERENCE_PATTERNS = {
-    r"^U\d+$": {"source": "users", "display": "obcanske_jmeno"},
-    r"^A\d+$": {"source": "users", "display": "obcanske_jmeno"},
-    r"^S\d+$": {"source": "users", "display": "obcanske_jmeno"},
-    r"^T\d+$": {"source": "tasks", "display": "nazev"},
-    r"^R\d+$": {"source": "relations", "display": "nazev"},
-    r"^TT\d+$": {"source": "task_types", "display": "nazev"},
-    r"^RT\d+$": {"source": "relation_types", "display": "nazev"},
-    r"^AB\d+$": {"source": "abilities", "display": "nazev"},
-}
-
-
 def _get_file_path(file_key: str) -> Path:
     """Get absolute path for a file key."""
     if file_key not in EDITABLE_FILES:
@@ -52,52 +24,48 @@ def _get_file_path(file_key: str) -> Path:
     return LORE_DATA_DIR / EDITABLE_FILES[file_key]["file"]
 
 
-def _read_json(file_key: str) -> dict:
-    """Read and parse a JSON file."""
+def _get_file(file_key: str) -> LoreFile:
+    """Loaded file from the lore repository (parsed once, reloaded on external change)."""
     path = _get_file_path(file_key)
-    if not path.exists():
-        raise HTTPException(status_code=404, detail=f"File not found: {path.name}")
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except json.JSONDecodeError as e:
-        raise HTTPException(status_code=500, detail=f"Invalid JSON in {path.name}: {e}")
+        return lore_repository.get(file_key)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"File not found: {path.name}")
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 
-def _write_json(file_key: str, data: dict) -> None:
-    """Write data to a JSON file."""
-    path = _get_file_path(file_key)
-    try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to write {path.name}: {e}")
+def _with_write_status(file_key: str, response: dict) -> dict:
+    """Edits are written in the background: surface a failed earlier write with the next answer."""
+    error = lore_repository.write_error(file_key)
+    if error:
+        response["write_error"] = error
+    return response
+
+
+def _read_json(file_key: str) -> dict:
+    """Parsed JSON content of a file."""
+    return _get_file(file_key).data
 
 
 def _get_records(file_key: str) -> List[dict]:
     """Get all records from a file."""
-    config = EDITABLE_FILES[file_key]
-    data = _read_json(file_key)
-    if config["key"]:
-        return data.get(config["key"], [])
-    return [data]  # Single object file
+    return _get_file(file_key).records
 
 
 def _find_record(file_key: str, record_id: str) -> Optional[dict]:
     """Find a record by ID."""
-    config = EDITABLE_FILES[file_key]
-    records = _get_records(file_key)
-    id_field = config["id_field"]
-    if not id_field:
-        return records[0] if records else None
-    for record in records:
-        if record.get(id_field) == record_id:
-            return record
-    return None
+    _get_file(file_key)
+    return lore_repository.find(file_key, record_id)
 
 
 def _find_all_references(target_id: str) -> List[Dict[str, str]]:
     """Find all references to an ID across all files."""
+    # Reference-looking ids (U01, T03, ...) are served from the repository's reverse index
+    if reference_source(target_id):
+        return lore_repository.references(target_id)
+
+    # Other ids (SN01, role names) are not indexed - full scan
     references = []
     
     for file_key in EDITABLE_FILES:
@@ -186,7 +154,8 @@ async def list_files(admin=Depends(get_current_admin)):
             "exists": path.exists(),
             "size": path.stat().st_size if path.exists() else 0,
             "display_field": config["display_field"],
-            "id_field": config["id_field"]
+            "id_field": config["id_field"],
+            "write_error": lore_repository.write_error(key),
         })
     return {"files": files}
 
@@ -211,8 +180,9 @@ async def get_file(file_key: str, admin=Depends(get_current_admin)):
 @router.put("/file/{file_key}")
 async def save_file(file_key: str, data: dict = Body(...), admin=Depends(get_current_admin)):
     """Save entire file content (bulk update)."""
-    _write_json(file_key, data)
-    return {"status": "saved", "file_key": file_key}
+    _get_file_path(file_key)
+    lore_repository.replace_data(file_key, data)
+    return _with_write_status(file_key, {"status": "saved", "file_key": file_key})
 
 
 @router.get("/file/{file_key}/records")
@@ -246,37 +216,16 @@ async def get_record(file_key: str, record_id: str, admin=Depends(get_current_ad
 @router.put("/file/{file_key}/record/{record_id}")
 async def update_record(file_key: str, record_id: str, record_data: dict = Body(...), admin=Depends(get_current_admin)):
     """Update a single record."""
-    config = EDITABLE_FILES[file_key]
-    data = _read_json(file_key)
-    id_field = config["id_field"]
-    key = config["key"]
-    
-    if not key:
-        # Single object file - just replace
-        _write_json(file_key, record_data)
-        return {"status": "updated", "record_id": record_id}
-    
-    records = data.get(key, [])
-    found = False
-    for i, rec in enumerate(records):
-        if rec.get(id_field) == record_id:
-            records[i] = record_data
-            found = True
-            break
-    
-    if not found:
+    _get_file(file_key)
+    if not lore_repository.update(file_key, record_id, record_data):
         raise HTTPException(status_code=404, detail=f"Record not found: {record_id}")
-    
-    data[key] = records
-    _write_json(file_key, data)
-    return {"status": "updated", "record_id": record_id}
+    return _with_write_status(file_key, {"status": "updated", "record_id": record_id})
 
 
 @router.post("/file/{file_key}/record")
 async def create_record(file_key: str, record_data: dict = Body(...), admin=Depends(get_current_admin)):
     """Create a new record."""
-    config = EDITABLE_FILES[file_key]
-    data = _read_json(file_key)
+    config = _get_file(file_key).config
     key = config["key"]
     id_field = config["id_field"]
     
@@ -287,31 +236,20 @@ async def create_record(file_key: str, record_data: dict = Body(...), admin=Depe
     if id_field and not record_data.get(id_field):
         record_data[id_field] = _generate_next_id(file_key)
     
-    records = data.get(key, [])
-    
-    # Check for duplicate ID
-    new_id = record_data.get(id_field)
-    if new_id:
-        for rec in records:
-            if rec.get(id_field) == new_id:
-                raise HTTPException(status_code=400, detail=f"Duplicate ID: {new_id}")
-    
-    records.append(record_data)
-    data[key] = records
-    _write_json(file_key, data)
+    try:
+        lore_repository.create(file_key, record_data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return {"status": "created", "record_id": record_data.get(id_field)}
+    return _with_write_status(file_key, {"status": "created", "record_id": record_data.get(id_field)})
 
 
 @router.delete("/file/{file_key}/record/{record_id}")
 async def delete_record(file_key: str, record_id: str, force: bool = False, admin=Depends(get_current_admin)):
     """Delete a record. Fails if references exist unless force=True."""
-    config = EDITABLE_FILES[file_key]
-    data = _read_json(file_key)
-    key = config["key"]
-    id_field = config["id_field"]
+    config = _get_file(file_key).config
     
-    if not key:
+    if not config["key"]:
         raise HTTPException(status_code=400, detail="Cannot delete from single-object files")
     
     # Check for references
@@ -329,16 +267,9 @@ async def delete_record(file_key: str, record_id: str, force: bool = False, admi
                 }
             )
     
-    records = data.get(key, [])
-    original_len = len(records)
-    records = [r for r in records if r.get(id_field) != record_id]
-    
-    if len(records) == original_len:
+    if not lore_repository.delete(file_key, record_id):
         raise HTTPException(status_code=404, detail=f"Record not found: {record_id}")
-    
-    data[key] = records
-    _write_json(file_key, data)
-    return {"status": "deleted", "record_id": record_id}
+    return _with_write_status(file_key, {"status": "deleted", "record_id": record_id})
 
 
 @router.get("/references/{target_id}")
@@ -348,6 +279,30 @@ async def find_references(target_id: str, admin=Depends(get_current_admin)):
     return {"target_id": target_id, "count": len(refs), "references": refs}
 
 
+@router.get("/bundle")
+async def get_lore_bundle(request: Request):
+    """
+    Whole lore data set compiled into one versioned bundle (used by lore-web).
+    No admin check: the same files are public under /lore-web/data.
+    Served pre-gzipped when accepted; ETag = content hash.
+    """
+    bundle = lore_bundler.get_bundle()
+    headers = {"ETag": bundle.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if bundle.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=bundle.gzip_body, media_type="application/json", headers=headers)
+    return Response(content=bundle.body, media_type="application/json", headers=headers)
+
+
+@router.get("/dangling-references")
+async def dangling_references(admin=Depends(get_current_admin)):
+    """All referenced IDs (U01, T03, ...) that do not exist in their source file."""
+    dangling = lore_repository.dangling_references()
+    return {"count": len(dangling), "dangling": dangling}
+
+
 @router.get("/options/{pattern}")
 async def get_options_for_pattern(pattern: str, admin=Depends(get_current_admin)):
     """Get dropdown options for a field pattern (e.g., 'U*' for users)."""
@@ -424,7 +379,4 @@ def _infer_schema(obj, path="") -> Dict[str, Any]:
 
 def _detect_reference_type(value: str) -> Optional[str]:
     """Detect if a string value looks like a reference ID."""
-    for regex, config in REFERENCE_PATTERNS.items():
-        if re.match(regex, value):
-            return config["source"]
-    return None
+    return reference_source(value)
@@ -15,6 +15,7 @@ import sys
 from pathlib import Path
 
 from ..dependencies import get_current_root
+from ..logic.run_index import run_index
 
 # ============================================================================
 # Simulation Module Import
@@ -207,6 +208,9 @@ async def get_simulation_logs(
 @router.get("/history")
 async def get_simulation_history(
     limit: int = 20,
+    offset: int = 0,
+    scenario: Optional[str] = "LLM",
+    status: Optional[str] = None,
     admin=Depends(get_current_root)
 ) -> Dict[str, Any]:
     """
@@ -214,29 +218,20 @@ async def get_simulation_history(
     
     Args:
         limit: Maximální počet záznamů (výchozí 20)
+        offset: Posun pro stránkování
+        scenario: Filtr názvu scénáře (podřetězec, výchozí "LLM"; prázdný = vše)
+        status: Filtr stavu běhu (success/failed/running...)
         
     Returns:
-        - runs: Seznam předchozích běhů
+        - runs: Seznam předchozích běhů (nejnovější první)
+        - total: Počet běhů odpovídajících filtru
     """
-    import json
-    from pathlib import Path
-    
-    # Path to index.json
-    base_dir = Path(__file__).resolve().parent.parent.parent.parent
-    index_file = base_dir / "lore-web" / "data" / "test_runs" / "index.json"
-    
-    if not index_file.exists():
-        return {"runs": [], "message": "Žádné předchozí simulace"}
-    
+    # Served from the in-memory run index (re-scans only new/changed run files)
     try:
-        with open(index_file, "r", encoding="utf-8") as f:
-            runs = json.load(f)
-        
-        # Filter only LLM simulations and sort by timestamp
-        llm_runs = [r for r in runs if "LLM" in r.get("scenario_name", "")]
-        llm_runs.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-        
-        return {"runs": llm_runs[:limit]}
-        
+        total, runs = run_index.query(scenario=scenario, status=status, offset=max(offset, 0), limit=max(limit, 0))
     except Exception as e:
-        return {"runs": [], "error": str(e)}
+        return {"runs": [], "total": 0, "error": str(e)}
+    
+    if not total and not run_index.runs():
+        return {"runs": [], "total": 0, "message": "Žádné předchozí simulace"}
+    return {"runs": runs, "total": total, "offset": offset, "limit": limit}
@@ -1,11 +1,16 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, status
-from typing import Annotated
-from ..logic.routing import routing_logic
-from ..logic.gamestate import gamestate
+from typing import Annotated, Optional
+from ..logic.routing import get_routing
+from ..logic.gamestate import get_gamestate
+from ..logic.backend import state_backend
+from ..logic.labels import label_store
 from ..dependencies import get_current_user
-from ..database import User, UserRole, SessionLocal, ChatLog
+from ..database import User, UserRole, SessionLocal
 from ..config import settings
-from ..services.dispatcher import dispatcher_service
+from ..services.dispatcher import dispatcher_service, TYPING_EVENTS
+from ..services.chat_service import session_history
+from ..logic.typing_coalescer import discard_coalescer
+from ..logic import wire
 import json
 import asyncio
 import time
@@ -37,17 +42,22 @@ async def get_user_from_token(token: str):
 
 
 @router.websocket("/ws/connect")
-async def websocket_endpoint(websocket: WebSocket, token: str):
+async def websocket_endpoint(websocket: WebSocket, token: str, labels_version: Optional[int] = None, typing: Optional[str] = None,
+                             encoding: Optional[str] = None):
     user = await get_user_from_token(token)
     if not user:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
+    # Everything below is scoped to the user's game instance
+    gamestate = get_gamestate(user.instance_id)
+    routing_logic = get_routing(user.instance_id)
+
     # Helper to get logical ID from username
     def get_logical_id(username: str, role: str) -> int:
         import re
-        # Expect "userX" or "agentX"
-        match = re.search(r'\d+', username)
+        # Expect "userX" or "agentX" (other instances: "<instance>_userX")
+        match = re.search(r'\d+$', username)
         if match:
             return int(match.group())
         return 0 # Fallback
@@ -57,7 +67,24 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
     if user.role == UserRole.AGENT or user.role == UserRole.USER:
         logical_id = get_logical_id(user.username, user.role.value)
 
+    # Compact binary frames (encoding=msgpack, logic/wire.py); JSON text otherwise
+    raw_websocket = websocket
+    compact = encoding == wire.ENCODING and settings.WS_COMPACT_ENCODING
+    if compact:
+        websocket = wire.CompactWebSocket(raw_websocket)
+
     await routing_logic.connect(websocket, user.role, user.id, logical_id=logical_id)
+
+    # Protocol acknowledgement, always as JSON text (sent before any binary frame)
+    protocol = {"type": "protocol"}
+    # Incremental typing_sync (typing=diff); clients without it keep full-content frames
+    if typing == "diff" and user.role != UserRole.ADMIN:
+        routing_logic.enable_typing_diff(websocket)
+        protocol["typing_sync"] = "diff"
+    if compact:
+        protocol.update(wire.protocol_fields())
+    if len(protocol) > 1:
+        await raw_websocket.send_text(json.dumps(protocol))
     
     # Notify Admins of new connection (if not admin)
     if user.role != UserRole.ADMIN:
@@ -77,25 +104,15 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
             "type": "init",
             "shift": gamestate.global_shift_offset,
             "temperature": gamestate.temperature,
+            "instance": user.instance_id,
             "online": routing_logic.get_online_status()
         }))
     
 
     
-    # Send Custom Labels (v1.4)
+    # Send Custom Labels (v1.4) - skipped when the client already has the current version
     if user.role != UserRole.ADMIN:
-        from ..config import BASE_DIR
-        import os
-        labels_path = BASE_DIR / "data" / "admin_labels.json"
-        if os.path.exists(labels_path):
-            with open(labels_path, "r") as f:
-                try:
-                    labels = json.load(f)
-                    await websocket.send_text(json.dumps({
-                        "type": "labels_update",
-                        "labels": labels
-                    }))
-                except: pass
+        await websocket.send_text(label_store.connect_message(labels_version))
 
     
     # Send History on Connect (User/Agent logic)
@@ -108,35 +125,13 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
             session_id_to_load = get_logical_id(user.username, "user")
         elif user.role == UserRole.AGENT:
             # Agent sees Session based on Shift
-            shift = gamestate.global_shift_offset
-            total = settings.TOTAL_SESSIONS
-            # Agent 1 -> Index 0
             agent_logical_id = get_logical_id(user.username, "agent")
-            agent_index = agent_logical_id - 1
-            session_index = (agent_index + shift) % total
-            session_id_to_load = session_index + 1
+            session_id_to_load = gamestate.session_for_agent(agent_logical_id)
         
         if session_id_to_load:
-            history = db.query(ChatLog).filter(ChatLog.session_id == session_id_to_load).order_by(ChatLog.timestamp).all()
-            
-            # Hyper Visibility Filter for Agents
-            # NORMAL: show history, FORENSIC: show history (reveal on unlock)
-            # BLACKBOX: hide history, EPHEMERAL: hide history (deleted on unlock)
-            should_send_history = True
-            if user.role == UserRole.AGENT:
-                from ..logic.gamestate import HyperVisibilityMode
-                if gamestate.hyper_visibility_mode in (HyperVisibilityMode.BLACKBOX, HyperVisibilityMode.EPHEMERAL):
-                    should_send_history = False
-            
-            if should_send_history:
-                for log in history:
-                    sender_role = log.sender.role.value
-                    await websocket.send_text(json.dumps({
-                        "sender": log.sender.username,
-                        "role": sender_role,
-                        "content": log.content,
-                        "session_id": log.session_id if user.role == UserRole.AGENT else None
-                    }))
+            # Hyper Visibility Filter for Agents (BLACKBOX/EPHEMERAL: no history)
+            for frame in session_history(db, user.instance_id, session_id_to_load, user.role):
+                await websocket.send_text(json.dumps(frame))
         
         # Send initial status for User
         if user.role == UserRole.USER:
@@ -192,10 +187,20 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
                 await websocket.send_text(json.dumps({"type": "pong"}))
                 continue
 
+            # Keystrokes: coalesced per connection, no DB session needed
+            if msg_data.get("type") in TYPING_EVENTS and user.role != UserRole.ADMIN:
+                try:
+                    await dispatcher_service.handle_typing(msg_data, user, websocket)
+                except Exception as e:
+                    print(f"WS Error: {e}")
+                continue
+
             # Persist and Route
             db_save = SessionLocal()
             try:
-                await dispatcher_service.handle_message(msg_data, user, db_save, websocket)
+                # Shared state changed by the handler is replicated to other workers
+                with state_backend.track_changes():
+                    await dispatcher_service.handle_message(msg_data, user, db_save, websocket)
             except Exception as e:
                 print(f"WS Error: {e}")
                 import traceback
@@ -203,6 +208,7 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
             finally:
                 db_save.close()
     except WebSocketDisconnect:
+        discard_coalescer(websocket)
         routing_logic.disconnect(websocket, user.role, user.id)
         if user.role != UserRole.ADMIN:
             await routing_logic.broadcast_to_admins(json.dumps({
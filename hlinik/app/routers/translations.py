@@ -8,7 +8,7 @@ Provides endpoints for:
 - Resetting custom labels
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Request, Response
 from pydantic import BaseModel, field_validator
 from typing import Dict, Optional
 import html
@@ -17,10 +17,10 @@ import re
 import os
 
 from ..dependencies import get_current_admin, get_current_user
-from ..logic.gamestate import gamestate
+from ..logic.gamestate import get_gamestate, all_gamestates
 from ..config import BASE_DIR
-from ..translations import load_translations, merge_translations, clear_cache
-from ..logic.routing import routing_logic
+from ..translations import get_bundle, clear_cache
+from ..logic.routing import get_routing, all_routing
 
 router = APIRouter(prefix="/api/translations", tags=["translations"])
 
@@ -70,55 +70,43 @@ class LanguageModeUpdate(BaseModel):
 
 
 @router.get("/")
-async def get_translations(user=Depends(get_current_user)):
+async def get_translations(request: Request, user=Depends(get_current_user)):
     """
     Get all translations for current language mode.
-    Returns merged translations with custom labels applied.
+    Returns the compiled bundle: flattened dotted keys with custom labels applied.
+    Supports ETag / If-None-Match (304 when the client cache is current).
     """
-    language_mode = gamestate.language_mode
-    custom_labels = gamestate.custom_labels
+    gamestate = get_gamestate(user.instance_id)
+    bundle = get_bundle(gamestate.language_mode, gamestate.custom_labels)
+    headers = {"ETag": bundle.etag, "Cache-Control": "no-cache"}
     
-    # Load base translations based on language mode
-    if language_mode == "en":
-        translations = load_translations("english")
-    elif language_mode == "crazy":
-        translations = load_translations("crazy")
-    elif language_mode == "czech-iris":
-        # Load and merge IRIS overrides
-        czech_trans = load_translations("czech")
-        iris_trans = load_translations("iris")
-        translations = merge_translations(czech_trans, iris_trans)
-    else:  # default "cz"
-        translations = load_translations("czech")
-    
-    return {
-        "status": "ok",
-        "language_mode": language_mode,
-        "translations": translations,
-        "custom_labels": custom_labels
-    }
+    if bundle.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=bundle.body, media_type="application/json", headers=headers)
 
 
 @router.post("/language")
 async def set_language_mode(update: LanguageModeUpdate, admin=Depends(get_current_admin)):
     """
     Set system language mode (root only).
-    Broadcasts change to all connected clients.
+    Broadcasts change to all connected clients of every game instance.
     """
     # Check if user is root
     if admin.username != "root":
         raise HTTPException(status_code=403, detail="Only root can change language mode")
     
-    gamestate.language_mode = update.language_mode
+    for gamestate in all_gamestates():
+        gamestate.language_mode = update.language_mode
     
     # Clear cache to force reload
     clear_cache()
     
     # Broadcast language change
-    await routing_logic.broadcast_global(json.dumps({
-        "type": "language_change",
-        "language_mode": update.language_mode
-    }))
+    for routing_logic in all_routing():
+        await routing_logic.broadcast_global(json.dumps({
+            "type": "language_change",
+            "language_mode": update.language_mode
+        }))
     
     return {
         "status": "ok",
@@ -132,6 +120,8 @@ async def set_custom_label(update: CustomLabelUpdate, admin=Depends(get_current_
     Set a custom label (admin only).
     Custom labels override language translations.
     """
+    gamestate = get_gamestate(admin.instance_id)
+    routing_logic = get_routing(admin.instance_id)
     gamestate.custom_labels[update.key] = update.value
     
     # Broadcast label update
@@ -153,6 +143,8 @@ async def delete_custom_label(key: str, admin=Depends(get_current_admin)):
     """
     Delete a custom label.
     """
+    gamestate = get_gamestate(admin.instance_id)
+    routing_logic = get_routing(admin.instance_id)
     if key in gamestate.custom_labels:
         del gamestate.custom_labels[key]
         
@@ -173,6 +165,8 @@ async def reset_all_labels(admin=Depends(get_current_admin)):
     """
     Reset all custom labels (admin only).
     """
+    gamestate = get_gamestate(admin.instance_id)
+    routing_logic = get_routing(admin.instance_id)
     gamestate.custom_labels = {}
     
     # Broadcast reset
@@ -188,6 +182,7 @@ async def get_language_options(user=Depends(get_current_user)):
     """
     Get available language options.
     """
+    gamestate = get_gamestate(user.instance_id)
     return {
         "status": "ok",
         "options": [
@@ -258,9 +253,13 @@ async def save_translation_file_content(code: str, content: Dict = Body(...), ad
             f.write(json_str)
             
         # Clear cache to ensure immediate effect if this language is active
+        # (other workers notice the new mtime when they serve the next bundle)
         clear_cache()
         
-        # Broadcast update trigger (optional, maybe overkill to reload everything)
+        # Terminals re-fetch their bundle (304 if their language did not change)
+        message = json.dumps({"type": "translations_changed", "file": filename})
+        for routing_logic in all_routing():
+            await routing_logic.broadcast_global(message)
         
         return {"status": "saved", "file": filename}
     except Exception as e:
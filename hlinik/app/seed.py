@@ -13,6 +13,23 @@ def load_scenario():
     # Fallback to hardcoded defaults
     return None
 
+def _seed_accounts(db: Session, game, cfg: dict, role: UserRole, default_level: str, count: int = None):
+    for i in range(1, (count or cfg['count']) + 1):
+        username = game.scoped_username(cfg['username_pattern'].format(i=i))
+        password = cfg['password_pattern'].format(i=i)
+        if not db.query(User).filter(User.username == username).first():
+            print(f"Seeding {username}...")
+            account = User(
+                username=username,
+                password_hash=get_password_hash(password),
+                role=role,
+                status_level=cfg.get('status_level', default_level),
+                instance_id=game.instance_id
+            )
+            if role == UserRole.USER:
+                account.credits = cfg.get('initial_credits', 100)
+            db.add(account)
+
 def seed_data():
     db = SessionLocal()
     scenario = load_scenario()
@@ -34,47 +51,21 @@ def seed_data():
             )
             db.add(root)
 
-        # 2. Admins
+        # 2.-4. Admins, agents and users of every game instance
+        # (default instance: "agent3", other instances: "<instance>_agent3")
+        from .logic.gamestate import all_gamestates
         admin_cfg = scenario['users']['admins'] if scenario else {
             "count": 4,
             "username_pattern": "admin{i}",
             "password_pattern": "secure_admin_{i}",
             "status_level": "high"
         }
-        for i in range(1, admin_cfg['count'] + 1):
-            username = admin_cfg['username_pattern'].format(i=i)
-            password = admin_cfg['password_pattern'].format(i=i)
-            if not db.query(User).filter(User.username == username).first():
-                print(f"Seeding {username}...")
-                admin = User(
-                    username=username,
-                    password_hash=get_password_hash(password),
-                    role=UserRole.ADMIN,
-                    status_level=admin_cfg.get('status_level', 'high')
-                )
-                db.add(admin)
-
-        # 3. Agents
         agent_cfg = scenario['users']['agents'] if scenario else {
             "count": 8,
             "username_pattern": "agent{i}",
             "password_pattern": "agent_pass_{i}",
             "status_level": "mid"
         }
-        for i in range(1, agent_cfg['count'] + 1):
-            username = agent_cfg['username_pattern'].format(i=i)
-            password = agent_cfg['password_pattern'].format(i=i)
-            if not db.query(User).filter(User.username == username).first():
-                print(f"Seeding {username}...")
-                agent = User(
-                    username=username,
-                    password_hash=get_password_hash(password),
-                    role=UserRole.AGENT,
-                    status_level=agent_cfg.get('status_level', 'mid')
-                )
-                db.add(agent)
-
-        # 4. Users
         user_cfg = scenario['users']['users'] if scenario else {
             "count": 8,
             "username_pattern": "user{i}",
@@ -82,19 +73,12 @@ def seed_data():
             "status_level": "low",
             "initial_credits": 100
         }
-        for i in range(1, user_cfg['count'] + 1):
-            username = user_cfg['username_pattern'].format(i=i)
-            password = user_cfg['password_pattern'].format(i=i)
-            if not db.query(User).filter(User.username == username).first():
-                print(f"Seeding {username}...")
-                user = User(
-                    username=username,
-                    password_hash=get_password_hash(password),
-                    role=UserRole.USER,
-                    status_level=user_cfg.get('status_level', 'low'),
-                    credits=user_cfg.get('initial_credits', 100)
-                )
-                db.add(user)
+        for game in all_gamestates():
+            # Extra instances get one agent/user pair per configured session
+            player_count = None if game.is_default else game.total_sessions
+            _seed_accounts(db, game, admin_cfg, UserRole.ADMIN, 'high')
+            _seed_accounts(db, game, agent_cfg, UserRole.AGENT, 'mid', count=player_count)
+            _seed_accounts(db, game, user_cfg, UserRole.USER, 'low', count=player_count)
 
         db.commit()
         
@@ -120,3 +104,20 @@ def seed_data():
     finally:
         db.close()
 
+
+def open_credit_accounts():
+    """Opening ledger entries for accounts without one, then a reconciliation check."""
+    from .logic.ledger import open_accounts, reconcile
+    db = SessionLocal()
+    try:
+        opened = open_accounts(db)
+        if opened:
+            print(f"Credit ledger: opened {opened} accounts.")
+        for mismatch in reconcile(db):
+            print(f"WARN: Credit ledger mismatch for {mismatch['username']}: "
+                  f"credits {mismatch['credits']}, ledger {mismatch['ledger_balance']}")
+    except Exception as e:
+        print(f"WARN: Credit ledger check failed: {e}")
+        db.rollback()
+    finally:
+        db.close()
@@ -1,22 +1,33 @@
+import asyncio
 import json
-import os
 import re
+from typing import Optional
+from sqlalchemy import update
 from ..database import SessionLocal, SystemLog, User
-from ..logic.routing import routing_logic
-from ..logic.gamestate import gamestate
+from ..logic.routing import get_routing, ADMIN_EVENT_KINDS
+from ..logic.gamestate import get_gamestate
+from ..logic.labels import label_store
+from ..logic.task_feed import push_task_delta
+from ..logic.ledger import apply_credits
+from ..logic.task_pool import task_pool
+from ..logic.censor import DEFAULT_CENSOR_RULES, RuleCensor
+from .chat_service import switch_agent_sessions
 from ..config import settings
 from fastapi import WebSocket
 
 
 def _session_id_from_username(username: str) -> int:
-    """Extract logical session ID (1-8) from username like 'user3' -> 3."""
-    match = re.search(r'\d+', username)
+    """Extract logical session ID (1-8) from username like 'user3' or 'rehearsal_user3' -> 3."""
+    match = re.search(r'\d+$', username)
     return int(match.group()) if match else 0
 
 
 class AdminService:
     async def handle_admin_command(self, db: SessionLocal, user: User, msg_data: dict, websocket: WebSocket):
         cmd_type = msg_data.get("type")
+        # Admins control the game instance they belong to
+        gamestate = get_gamestate(user.instance_id)
+        routing_logic = get_routing(user.instance_id)
         
         if cmd_type == "action":
             action = msg_data.get("action")
@@ -35,6 +46,8 @@ class AdminService:
                 "shift": new_shift,
                 "temperature": gamestate.temperature
             }))
+            # Agents move to their new sessions without reconnecting
+            await switch_agent_sessions(user.instance_id)
         
         elif cmd_type == "set_shift_command":
             target = msg_data.get("value", 0)
@@ -44,6 +57,8 @@ class AdminService:
                 "shift": new_shift,
                 "temperature": gamestate.temperature
             }))
+            # Agents move to their new sessions without reconnecting
+            await switch_agent_sessions(user.instance_id)
         
         elif cmd_type == "temperature_command": 
             level = msg_data.get("value", 0) 
@@ -80,13 +95,10 @@ class AdminService:
             gamestate.chernobyl_mode = ChernobylMode.NORMAL
             gamestate.hyper_visibility_mode = HyperVisibilityMode.NORMAL
             
-            # Reset custom labels (delete admin_labels.json)
-            # Better way: config.BASE_DIR
-            from ..config import BASE_DIR
-            labels_path = BASE_DIR / "data" / "admin_labels.json"
-
-            if os.path.exists(labels_path):
-                os.remove(labels_path)
+            # Reset custom labels (deletes admin_labels.json), terminals get the removed keys
+            label_changes = label_store.clear()
+            if label_changes:
+                await routing_logic.broadcast_global(label_store.update_message(label_changes))
             
             # Reset GameState Dicts
             gamestate.panic_modes = {}
@@ -118,6 +130,19 @@ class AdminService:
                     "is_alert": True
                 }))
 
+        elif cmd_type == "subscribe":
+            # Live session traffic for this socket only: {"sessions": [ids] | null (all), "kinds": [...]}
+            sessions = msg_data.get("sessions")
+            if sessions is not None:
+                sessions = sorted({int(s) for s in sessions if 1 <= int(s) <= gamestate.total_sessions})
+            kinds = [k for k in ADMIN_EVENT_KINDS if k in (msg_data.get("kinds") or ADMIN_EVENT_KINDS)]
+            routing_logic.subscribe_admin(websocket, sessions, kinds)
+            await websocket.send_text(json.dumps({
+                "type": "subscribed",
+                "sessions": sessions,
+                "kinds": kinds
+            }))
+
         elif cmd_type == "admin_view_sync":
             view = msg_data.get("view", "monitor")
             await routing_logic.broadcast_to_admins(json.dumps({
@@ -161,7 +186,7 @@ class AdminService:
         elif cmd_type == "panic_command":
             enabled = msg_data.get("enabled", False)
             # Global Panic set for all sessions
-            for i in range(1, settings.TOTAL_SESSIONS + 1):
+            for i in range(1, gamestate.total_sessions + 1):
                     gamestate.set_panic_mode(i, "user", enabled)
                     gamestate.set_panic_mode(i, "agent", enabled)
             
@@ -172,8 +197,9 @@ class AdminService:
 
     # --- REST API SUPPORT METHODS ---
 
-    async def update_llm_config(self, config_type: str, payload: dict):
+    async def update_llm_config(self, config_type: str, payload: dict, instance_id: str = settings.DEFAULT_INSTANCE):
         from ..logic.llm_core import LLMConfig, LLMProvider
+        gamestate = get_gamestate(instance_id)
         
         if config_type == "task":
             gamestate.llm_config_task = LLMConfig(**payload)
@@ -196,17 +222,58 @@ class AdminService:
         else:
             raise ValueError("Invalid config type")
             
-    async def set_panic_mode_for_session(self, session_id: int, target: str, enabled: bool):
+    async def set_panic_mode_for_session(self, session_id: int, target: str, enabled: bool, instance_id: str = settings.DEFAULT_INSTANCE):
+        gamestate = get_gamestate(instance_id)
         if target not in ["user", "agent"]:
              raise ValueError("Target must be 'user' or 'agent'")
         gamestate.set_panic_mode(session_id, target, enabled)
         return gamestate.get_panic_state(session_id)
 
+    async def set_censor_mode(self, session_id: Optional[int], mode: Optional[str], instance_id: str = settings.DEFAULT_INSTANCE):
+        """Censor mode for one session (session_id None = instance default, mode None = drop the override)."""
+        gamestate = get_gamestate(instance_id)
+        if session_id is not None and not 1 <= session_id <= gamestate.total_sessions:
+            raise ValueError("Invalid session")
+        try:
+            gamestate.set_censor_mode(session_id, mode)
+        except ValueError:
+            raise ValueError("Mode must be 'llm', 'hybrid' or 'rules'")
+        return self.censor_state(instance_id)
+
+    def update_censor_rules(self, rules: dict, instance_id: str = settings.DEFAULT_INSTANCE):
+        """Merge phrase lists / replacement texts into the instance's censor rules."""
+        gamestate = get_gamestate(instance_id)
+        updated = dict(gamestate.censor_rules)
+        for key, value in rules.items():
+            if key not in DEFAULT_CENSOR_RULES:
+                raise ValueError(f"Unknown censor rule '{key}'")
+            if isinstance(DEFAULT_CENSOR_RULES[key], list):
+                if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+                    raise ValueError(f"'{key}' must be a list of phrases")
+            elif not isinstance(value, str):
+                raise ValueError(f"'{key}' must be a string")
+            updated[key] = value
+        try:
+            RuleCensor(updated).check("kontrola 123 a@b.cz")
+        except (re.error, TypeError) as e:
+            raise ValueError(f"Invalid censor rules: {e}")
+        gamestate.censor_rules = updated  # New dict -> compiled rules are rebuilt
+        return self.censor_state(instance_id)
+
+    def censor_state(self, instance_id: str = settings.DEFAULT_INSTANCE):
+        gamestate = get_gamestate(instance_id)
+        return {
+            "mode": gamestate.censor_mode,
+            "session_modes": gamestate.censor_modes,
+            "rules": gamestate.censor_rules,
+        }
+
     async def fine_user(self, db: SessionLocal, user_id: int, amount: int, reason: str):
         user = db.query(User).filter(User.id == user_id).first()
         if user:
             session_id = _session_id_from_username(user.username)
-            user.credits -= amount
+            routing_logic = get_routing(user.instance_id)
+            apply_credits(db, user.id, -amount, "fine", reason)
             if user.credits < 0 and not user.is_locked:
                 user.is_locked = True
                 await routing_logic.broadcast_to_session(session_id, json.dumps({"type": "lock_update", "locked": True}))
@@ -222,7 +289,8 @@ class AdminService:
         user = db.query(User).filter(User.id == user_id).first()
         if user:
             session_id = _session_id_from_username(user.username)
-            user.credits += amount
+            routing_logic = get_routing(user.instance_id)
+            apply_credits(db, user.id, amount, "bonus", reason)
             if user.credits < 0 and not user.is_locked:
                 user.is_locked = True
                 await routing_logic.broadcast_to_session(session_id, json.dumps({"type": "lock_update", "locked": True}))
@@ -242,6 +310,7 @@ class AdminService:
         user = db.query(User).filter(User.id == user_id).first()
         if user:
             session_id = _session_id_from_username(user.username)
+            routing_logic = get_routing(user.instance_id)
             user.is_locked = not user.is_locked
             db.commit()
             await routing_logic.broadcast_to_session(session_id, json.dumps({
@@ -258,6 +327,7 @@ class AdminService:
         user = db.query(User).filter(User.id == user_id).first()
         if user:
             session_id = _session_id_from_username(user.username)
+            routing_logic = get_routing(user.instance_id)
             user.status_level = status
             db.commit()
             await routing_logic.broadcast_to_session(session_id, json.dumps({
@@ -266,66 +336,73 @@ class AdminService:
             }))
             return status
 
-    async def global_bonus(self, db: SessionLocal, amount: int, reason: str):
-        from ..database import UserRole
-        users = db.query(User).filter(User.role == UserRole.USER).all()
-
-        for user in users:
-            session_id = _session_id_from_username(user.username)
-            user.credits += amount
-            await routing_logic.broadcast_to_session(session_id, json.dumps({
+    async def global_bonus(self, db: SessionLocal, amount: int, reason: str, instance_id: str = settings.DEFAULT_INSTANCE):
+        from ..logic.economy import bulk_update_players
+        rows = bulk_update_players(db, instance_id, "global_bonus", credits=User.credits + amount)
+        db.commit()
+        await get_routing(instance_id).send_to_users({
+            user_id: json.dumps({
                 "type": "economy_update",
-                "credits": user.credits,
+                "credits": credits,
                 "msg": f"GLOBAL STIMULUS: {reason}"
-            }))
-        db.commit()
-        return len(users)
+            })
+            for user_id, credits, _ in rows
+        })
+        return len(rows)
 
-    async def reset_economy(self, db: SessionLocal):
-        from ..database import UserRole
-        users = db.query(User).filter(User.role == UserRole.USER).all()
-        for user in users:
-            session_id = _session_id_from_username(user.username)
-            user.credits = 100
-            user.is_locked = False
-            await routing_logic.broadcast_to_session(session_id, json.dumps({
-                "type": "user_status",
-                "credits": 100,
-                "is_locked": False
-            }))
+    async def reset_economy(self, db: SessionLocal, instance_id: str = settings.DEFAULT_INSTANCE):
+        from ..logic.economy import bulk_update_players
+        rows = bulk_update_players(db, instance_id, "reset", credits=100, is_locked=False)
         db.commit()
-        return len(users)
+        await get_routing(instance_id).send_to_users({
+            user_id: json.dumps({
+                "type": "user_status",
+                "credits": credits,
+                "is_locked": is_locked
+            })
+            for user_id, credits, is_locked in rows
+        })
+        return len(rows)
 
     async def approve_task(self, db: SessionLocal, task_id: int, reward: int = None, prompt_content: str = None):
         from ..database import Task, TaskStatus, StatusLevel
         task = db.query(Task).filter(Task.id == task_id).first()
         if not task:
             raise ValueError("Task not found")
+        if task.status != TaskStatus.PENDING_APPROVAL:
+            raise ValueError("Task is not pending approval")
             
         user = task.user
+        instance_id = user.instance_id if user else settings.DEFAULT_INSTANCE
         
         # Reward Logic
         if reward is None or reward <= 0:
             level = user.status_level if user and user.status_level else StatusLevel.LOW
-            reward = gamestate.get_default_task_reward(level)
+            reward = get_gamestate(instance_id).get_default_task_reward(level)
             
-        # Description Logic
+        # Description Logic (pre-generated pool, inline generation when empty)
         if not prompt_content or prompt_content.strip() == "" or prompt_content == "Waiting for assignment...":
-            from ..logic.llm_core import llm_service
+            from ..logic.llm_core import DEFAULT_TASK_DESCRIPTION
+            level = user.status_level if user and user.status_level else StatusLevel.LOW
             user_profile = {
                 "username": user.username if user else "unknown",
-                "status_level": user.status_level.value if user and user.status_level else "low",
+                "status_level": level.value,
                 "credits": user.credits if user else 0
             }
             try:
-                prompt_content = await llm_service.generate_task_description(user_profile)
+                prompt_content = await task_pool.take(level, user_profile)
             except Exception:
-                prompt_content = "Proveďte analýzu aktuálního stavu systému a navrhněte zlepšení."
+                prompt_content = DEFAULT_TASK_DESCRIPTION
 
-        task.status = TaskStatus.ACTIVE
-        task.reward_offered = reward
-        task.prompt_desc = prompt_content
+        # Approved meanwhile (single approval vs. approve_all) -> keep the first one
+        approved = db.execute(
+            update(Task).where(Task.id == task_id, Task.status == TaskStatus.PENDING_APPROVAL)
+            .values(status=TaskStatus.ACTIVE, reward_offered=reward, prompt_desc=prompt_content)
+        ).rowcount
         db.commit()
+        if not approved:
+            raise ValueError("Task is not pending approval")
+        db.refresh(task)
         
         # Log
         db_log = SessionLocal()
@@ -335,7 +412,7 @@ class AdminService:
         
         # Notify
         user_session_id = _session_id_from_username(user.username) if user else 0
-        await routing_logic.broadcast_to_session(
+        await get_routing(instance_id).broadcast_to_session(
             user_session_id,
             json.dumps({
                 "type": "task_update",
@@ -347,8 +424,35 @@ class AdminService:
                 "description": task.prompt_desc
             })
         )
+        await push_task_delta(task, instance_id)
         return {"status": "approved", "task_id": task.id, "reward": reward}
 
+    async def approve_all_pending(self, instance_id: str = settings.DEFAULT_INSTANCE):
+        """Approve every pending task of the instance concurrently (default reward, pooled descriptions)."""
+        from ..database import Task, TaskStatus
+        db = SessionLocal()
+        try:
+            task_ids = [task_id for (task_id,) in db.query(Task.id).join(User).filter(
+                User.instance_id == instance_id, Task.status == TaskStatus.PENDING_APPROVAL
+            ).all()]
+        finally:
+            db.close()
+
+        async def approve(task_id):
+            # Sessions are not safe for concurrent use - one per approval
+            task_db = SessionLocal()
+            try:
+                return await self.approve_task(task_db, task_id)
+            finally:
+                task_db.close()
+
+        results = await asyncio.gather(*(approve(task_id) for task_id in task_ids), return_exceptions=True)
+        approved = [r["task_id"] for r in results if isinstance(r, dict)]
+        for task_id, result in zip(task_ids, results):
+            if isinstance(result, Exception):
+                print(f"WARN: Bulk approval of task #{task_id} failed: {result}")
+        return approved
+
     async def grade_task(self, db: SessionLocal, task_id: int, modifier: float):
         from ..logic.economy import process_task_payment
         result = process_task_payment(task_id, int(modifier * 100), db)
@@ -360,6 +464,7 @@ class AdminService:
         from ..database import Task, ChatLog
         task = db.query(Task).filter(Task.id == task_id).first() 
         user = task.user if task else None
+        routing_logic = get_routing(user.instance_id if user else None)
         
         db.add(SystemLog(
             event_type="ECONOMY",
@@ -370,6 +475,7 @@ class AdminService:
         if user:
             task_name = task.prompt_desc[:50] if task and task.prompt_desc else "Úkol"
             db.add(ChatLog(
+                instance_id=user.instance_id,
                 session_id=user_session_id,
                 sender_id=user.id,
                 content=f"📋 Úkol '{task_name}...' vyhodnocen. Odměna: {result.get('net_reward', 0)} kreditů."
@@ -392,10 +498,12 @@ class AdminService:
             "msg": f"Odměna za úkol: +{result.get('net_reward', 0)} CR"
         }))
         
-        await routing_logic.broadcast_to_admins(json.dumps({"type": "admin_refresh_tasks"}))
+        if task:
+            await push_task_delta(task, user.instance_id if user else None)
         return result
 
-    async def update_constants(self, db: SessionLocal, admin_username: str, data: dict):
+    async def update_constants(self, db: SessionLocal, admin_username: str, data: dict, instance_id: str = settings.DEFAULT_INSTANCE):
+        gamestate = get_gamestate(instance_id)
         gamestate.update_reward_config(data) # Partial update
         # Manual update for rest
         if "power_cap" in data: gamestate.power_capacity = data["power_cap"]
@@ -412,7 +520,7 @@ class AdminService:
         db.add(SystemLog(event_type="ROOT", message=f"Constants Updated by {admin_username}", data=json.dumps(data)))
         db.commit()
         
-        await routing_logic.broadcast_global(json.dumps({
+        await get_routing(instance_id).broadcast_global(json.dumps({
             "type": "gamestate_update",
             "power_cap": gamestate.power_capacity,
             "temp_threshold": gamestate.TEMP_THRESHOLD
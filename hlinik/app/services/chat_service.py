@@ -1,8 +1,16 @@
+import asyncio
 import json
+import time
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import joinedload
 from ..database import SessionLocal, ChatLog, User, UserRole, SystemLog
-from ..logic.routing import routing_logic
-from ..logic.gamestate import gamestate
+from ..logic.routing import get_routing
+from ..logic.gamestate import get_gamestate, HyperVisibilityMode
 from ..logic.llm_core import llm_service
+from ..logic.ledger import apply_credits
+from ..logic.censor import CensorMode, get_rule_censor
+from ..logic.autopilot import autopilot
+from ..logic.typing_coalescer import coalescer_for
 from ..config import settings
 from fastapi import WebSocket
 
@@ -10,12 +18,71 @@ PANIC_PROMPT_FALLBACK = "Panický režim nahrazuje odpověď."
 PANIC_RESPONSE_FALLBACK = "PANICKÝ MÓD: Odpověď nahrazena."
 PANIC_USER_FALLBACK = "PANICKÝ MÓD: Zpráva nahrazena."
 
-def get_latest_user_message(db_session, session_id: int):
+def get_latest_user_message(db_session, session_id: int, instance_id: str = settings.DEFAULT_INSTANCE):
     try:
-        return db_session.query(ChatLog).filter(ChatLog.session_id == session_id).order_by(ChatLog.timestamp.desc()).first()
+        return db_session.query(ChatLog).filter(
+            ChatLog.instance_id == instance_id,
+            ChatLog.session_id == session_id
+        ).order_by(ChatLog.timestamp.desc()).first()
     except Exception:
         return None
 
+def session_history(db: SessionLocal, instance_id: str, session_id: int, role: UserRole,
+                    limit: Optional[int] = None) -> List[dict]:
+    """
+    Chat frames of a session as replayed to a client (oldest first), `limit` = only the newest.
+    Agents get nothing in BLACKBOX/EPHEMERAL (NORMAL/FORENSIC show the history).
+    """
+    if role == UserRole.AGENT and get_gamestate(instance_id).hyper_visibility_mode in (
+            HyperVisibilityMode.BLACKBOX, HyperVisibilityMode.EPHEMERAL):
+        return []
+    query = db.query(ChatLog).options(joinedload(ChatLog.sender)).filter(
+        ChatLog.instance_id == instance_id,
+        ChatLog.session_id == session_id
+    )
+    if limit:
+        logs = query.order_by(ChatLog.timestamp.desc(), ChatLog.id.desc()).limit(limit).all()[::-1]
+    else:
+        logs = query.order_by(ChatLog.timestamp).all()
+    return [{
+        "sender": log.sender.username,
+        "role": log.sender.role.value,
+        "content": log.content,
+        "session_id": log.session_id if role == UserRole.AGENT else None,
+        "id": log.id,
+        "is_hyper": log.is_hyper,
+        "is_optimized": log.is_optimized
+    } for log in logs]
+
+async def switch_agent_sessions(instance_id: str):
+    """
+    After a shift change: every connected agent (any worker) gets a session_switch with its
+    new session and that session's recent history, instead of reconnecting for the full one.
+    Routing itself follows the shift already (agent_for_session).
+    """
+    gamestate = get_gamestate(instance_id)
+    routing_logic = get_routing(instance_id)
+    agents = routing_logic.connected_agents()
+    if not agents:
+        return
+    messages: Dict[int, str] = {}
+    db = SessionLocal()
+    try:
+        for agent_user_id, logical_id in agents.items():
+            session_id = gamestate.session_for_agent(logical_id)
+            if session_id not in messages:
+                messages[session_id] = json.dumps({
+                    "type": "session_switch",
+                    "session_id": session_id,
+                    "shift": gamestate.global_shift_offset,
+                    "hyper_mode": gamestate.hyper_visibility_mode.value,
+                    "history": session_history(db, instance_id, session_id, UserRole.AGENT,
+                                               limit=settings.SESSION_SWITCH_HISTORY)
+                })
+            await routing_logic.broadcast_to_agent(agent_user_id, messages[session_id])
+    finally:
+        db.close()
+
 class ChatService:
     """
     Handles chat logic for Users and Agents.
@@ -25,9 +92,13 @@ class ChatService:
     - Checks Purgatory logic (debt blocking).
     - Handles report system logic.
     """
+    def __init__(self):
+        # (instance_id, agent logical id) -> background optimizer rewrite past its deadline
+        self._optimizer_jobs: Dict[Tuple[str, int], asyncio.Task] = {}
+
     def _get_logical_id(self, username: str, role: str) -> int:
         import re
-        match = re.search(r'\d+', username)
+        match = re.search(r'\d+$', username)
         if match:
             return int(match.group())
         return 0
@@ -35,32 +106,26 @@ class ChatService:
     async def handle_agent_message(self, db: SessionLocal, user: User, msg_data: dict, websocket: WebSocket):
         cmd_type = msg_data.get("type")
         agent_logical_id = self._get_logical_id(user.username, "agent")
+        gamestate = get_gamestate(user.instance_id)
+        routing_logic = get_routing(user.instance_id)
 
         if cmd_type == "autopilot_toggle":
             status = msg_data.get("status") # true/false
             gamestate.active_autopilots[agent_logical_id] = status
             if not status:
-                    # Clear history on OFF
+                    # Clear history on OFF, drop the reply being generated
                     gamestate.hyper_histories[agent_logical_id] = []
+                    autopilot.cancel(user.instance_id, gamestate.session_for_agent(agent_logical_id))
             return
 
         if cmd_type == "typing_sync":
-            content = msg_data.get("content", "")
-            await routing_logic.broadcast_to_agent(user.id, json.dumps({
-                "type": "typing_sync",
-                "sender": user.username,
-                "content": content
-            }), exclude_ws=websocket)
+            await self.handle_typing_sync(user, msg_data, websocket)
             return
 
         content = msg_data.get("content")
         if not content: return
 
-        shift = gamestate.global_shift_offset
-        total = settings.TOTAL_SESSIONS
-        agent_index = agent_logical_id - 1
-        session_index = (agent_index + shift) % total
-        session_id = session_index + 1
+        session_id = gamestate.session_for_agent(agent_logical_id)
 
         # Ensure session tracking exists even if user prompt was not recorded yet
         # Uses GAMESTATE now
@@ -82,21 +147,26 @@ class ChatService:
         panic_state = gamestate.get_panic_state(session_id)
 
         is_confirming = msg_data.get("confirm_opt", False) # Flag sent by client
+        # False when the agent confirms the original text offered after the optimizer deadline
+        confirmed_optimized = is_confirming and msg_data.get("optimized", True)
+
+        # A new message supersedes a rewrite still running for the previous one
+        self._cancel_optimizer_job(user.instance_id, agent_logical_id)
 
         # Panic mode for agent: override outgoing content with censorship LLM
         if panic_state.get("agent"):
             prompt_source = gamestate.get_last_user_message(session_id)
             if not prompt_source:
-                latest_user = get_latest_user_message(db, session_id)
+                latest_user = get_latest_user_message(db, session_id, user.instance_id)
                 if latest_user and latest_user.sender and latest_user.sender.role == UserRole.USER and latest_user.content:
                     prompt_source = latest_user.content
                     gamestate.set_last_user_message(session_id, prompt_source)
             if not prompt_source:
                 prompt_source = content
-            final_content = await llm_service.generate_response(
-                gamestate.llm_config_censor,
-                [{"role": "user", "content": prompt_source or PANIC_PROMPT_FALLBACK}]
-            ) or PANIC_RESPONSE_FALLBACK
+            final_content = await self._censor(
+                gamestate, session_id, content, prompt_source or PANIC_PROMPT_FALLBACK,
+                PANIC_RESPONSE_FALLBACK, context=prompt_source
+            )
             was_rewritten = True
         elif gamestate.optimizer_active and not is_confirming:
             # Check Power
@@ -110,32 +180,13 @@ class ChatService:
                     "type": "optimizing_start"
                 }))
 
-                if settings.OPENROUTER_API_KEY or settings.OPENAI_API_KEY or settings.GEMINI_API_KEY:
-                    try:
-                        rewritten = await llm_service.rewrite_message(
-                            content,
-                            gamestate.optimizer_prompt,
-                            gamestate.llm_config_optimizer
-                        ) or content
-                    except Exception as e:
-                        print(f"Optimizer Error: {e}")
-                        rewritten = content
-                else:
-                    rewritten = content
-
-                rewritten = rewritten.strip() if rewritten else content
-
                 # v2.0: Send PREVIEW to Agent, do not broadcast/save yet
-                await websocket.send_text(json.dumps({
-                    "type": "optimizer_preview",
-                    "original": content,
-                    "rewritten": rewritten
-                }))
+                await self._send_optimizer_preview(gamestate, session_id, agent_logical_id, content, websocket)
                 return # Stop processing, wait for confirmation
         
         # Save (Rewritten or Original)
         # If is_confirming, 'content' IS the rewritten version sent back by client
-        log = ChatLog(session_id=session_id, sender_id=user.id, content=final_content, is_optimized=is_confirming or was_rewritten)
+        log = ChatLog(instance_id=user.instance_id, session_id=session_id, sender_id=user.id, content=final_content, is_optimized=confirmed_optimized or was_rewritten)
         db.add(log)
         db.commit()
 
@@ -144,7 +195,7 @@ class ChatService:
 
         # Broadcast to Session (User sees final_content)
         exclude_target = None if is_confirming else websocket
-        await routing_logic.broadcast_to_session(session_id, json.dumps({
+        chat_msg = json.dumps({
             "sender": user.username,
             "role": "agent",
             "content": final_content,
@@ -152,11 +203,110 @@ class ChatService:
             "id": log.id,
             "is_optimized": log.is_optimized,  # PHASE 27: Report immunity flag
             "panic": panic_state.get("agent", False)
-        }), exclude_ws=exclude_target)
+        })
+        await routing_logic.broadcast_to_session(session_id, chat_msg, exclude_ws=exclude_target)
+        await routing_logic.publish_to_admins(session_id, "chat", chat_msg)
+
+    async def _censor(self, gamestate, session_id: int, text: str, llm_prompt: str, fallback: str, context: str = None) -> str:
+        """
+        Panic censor for one message. The rule engine answers unless the session is in
+        llm mode or the rules cannot decide (hybrid -> LLM, rules -> fallback text).
+        """
+        mode = gamestate.get_censor_mode(session_id)
+        if mode != CensorMode.LLM:
+            verdict = get_rule_censor(gamestate.censor_rules).check(text, context)
+            if verdict.decided:
+                return verdict.text
+            if mode == CensorMode.RULES:
+                return fallback
+        return await llm_service.generate_response(
+            gamestate.llm_config_censor,
+            [{"role": "user", "content": llm_prompt}]
+        ) or fallback
+
+    # --- Optimizer preview (deadline-bounded) ---
+
+    def _cancel_optimizer_job(self, instance_id: str, agent_logical_id: int):
+        job = self._optimizer_jobs.pop((instance_id, agent_logical_id), None)
+        if job and not job.done():
+            job.cancel()
+
+    async def _rewrite(self, gamestate, content: str) -> str:
+        if not (settings.OPENROUTER_API_KEY or settings.OPENAI_API_KEY or settings.GEMINI_API_KEY):
+            return content
+        try:
+            rewritten = await llm_service.rewrite_message(
+                content,
+                gamestate.optimizer_prompt,
+                gamestate.llm_config_optimizer
+            ) or content
+        except Exception as e:
+            print(f"Optimizer Error: {e}")
+            rewritten = content
+        return rewritten.strip() if rewritten else content
+
+    async def _send_optimizer_preview(self, gamestate, session_id: int, agent_logical_id: int, content: str, websocket: WebSocket):
+        """
+        Preview within OPTIMIZER_DEADLINE: the rewrite, or the original text flagged
+        optimized=False. A rewrite finishing later is sent as an updated preview while
+        the agent still has to answer. Waiting time is added back to the response window.
+        """
+        rewrite = asyncio.create_task(self._rewrite(gamestate, content))
+        started = time.monotonic()
+        try:
+            rewritten = await asyncio.wait_for(asyncio.shield(rewrite), timeout=settings.OPTIMIZER_DEADLINE)
+        except asyncio.TimeoutError:
+            rewritten = None
+        finally:
+            gamestate.extend_pending_response(session_id, time.monotonic() - started)
+
+        if rewritten is not None:
+            await websocket.send_text(json.dumps({
+                "type": "optimizer_preview",
+                "original": content,
+                "rewritten": rewritten,
+                "optimized": True
+            }))
+            return
+
+        await websocket.send_text(json.dumps({
+            "type": "optimizer_preview",
+            "original": content,
+            "rewritten": content,
+            "optimized": False
+        }))
+        key = (gamestate.instance_id, agent_logical_id)
+        self._optimizer_jobs[key] = asyncio.create_task(
+            self._deliver_late_preview(key, rewrite, gamestate, session_id, content, websocket)
+        )
+
+    async def _deliver_late_preview(self, key, rewrite: asyncio.Task, gamestate, session_id: int, content: str, websocket: WebSocket):
+        try:
+            rewritten = await rewrite
+        except asyncio.CancelledError:
+            rewrite.cancel()
+            raise
+        if self._optimizer_jobs.get(key) is asyncio.current_task():
+            del self._optimizer_jobs[key]
+        # In time = the agent has not answered yet and the window is still open
+        if session_id not in gamestate.pending_responses or gamestate.is_session_timed_out(session_id):
+            return
+        try:
+            await websocket.send_text(json.dumps({
+                "type": "optimizer_preview",
+                "original": content,
+                "rewritten": rewritten,
+                "optimized": True,
+                "updated": True
+            }))
+        except Exception:
+            pass  # Agent disconnected
 
     async def handle_user_message(self, db: SessionLocal, user: User, msg_data: dict, websocket: WebSocket):
         cmd_type = msg_data.get("type")
         content = msg_data.get("content")
+        gamestate = get_gamestate(user.instance_id)
+        routing_logic = get_routing(user.instance_id)
 
         # Generic Action Handling (v1.9)
         if cmd_type == "action":
@@ -171,23 +321,14 @@ class ChatService:
 
         # User Mirroring
         if cmd_type == "typing_sync":
-            content = msg_data.get("content", "")
-            # Send to ALL sessions of this user (including other open tabs)
-            if user.id in routing_logic.user_connections:
-                for conn in routing_logic.user_connections[user.id]:
-                    if conn != websocket: # Don't echo back
-                        await conn.send_text(json.dumps({
-                            "type": "typing_sync",
-                            "sender": user.username,
-                            "content": content
-                        }))
+            await self.handle_typing_sync(user, msg_data, websocket)
             return
 
         # v1.7 Report Logic
         if cmd_type == "report_message":
             msg_id = msg_data.get("id")
             # Verify DB
-            target_log = db.query(ChatLog).filter(ChatLog.id == msg_id).first()
+            target_log = db.query(ChatLog).filter(ChatLog.id == msg_id, ChatLog.instance_id == user.instance_id).first()
             if target_log:
                 if target_log.is_optimized:
                     # IMMUNITY
@@ -202,7 +343,7 @@ class ChatService:
 
                     # Reward the reporting user
                     report_reward = gamestate.report_reward
-                    user.credits += report_reward
+                    credits = apply_credits(db, user.id, report_reward, "report", f"message {msg_id}")
 
                     db.commit()
 
@@ -215,7 +356,7 @@ class ChatService:
                     # Send reward update to user
                     await websocket.send_text(json.dumps({
                         "type": "economy_update",
-                        "credits": user.credits
+                        "credits": credits
                     }))
 
                     # Ack
@@ -234,9 +375,7 @@ class ChatService:
         if not content: return
         
         # Purgatory Mode Check: Fetch fresh status
-        db.refresh(user) # Check if this is safer than new query
-        # Actually user passed in might be detached or simple object from get_user_from_token
-        # It's better to query fresh
+        # (the user object comes from get_user_from_token and is detached from this session)
         db_user_check = db.query(User).filter(User.id == user.id).first()
         is_purgatory = db_user_check.is_locked if db_user_check else False
         
@@ -252,14 +391,10 @@ class ChatService:
         session_id = self._get_logical_id(user.username, "user")
         panic_state = gamestate.get_panic_state(session_id)
         if panic_state.get("user"):
-            censored = await llm_service.generate_response(
-                gamestate.llm_config_censor,
-                [{"role": "user", "content": content}]
-            )
-            content = censored or PANIC_USER_FALLBACK
+            content = await self._censor(gamestate, session_id, content, content, PANIC_USER_FALLBACK)
         gamestate.set_last_user_message(session_id, content)
         # Save User Message
-        log = ChatLog(session_id=session_id, sender_id=user.id, content=content)
+        log = ChatLog(instance_id=user.instance_id, session_id=session_id, sender_id=user.id, content=content)
         db.add(log)
         db.commit()
         
@@ -267,106 +402,86 @@ class ChatService:
         gamestate.clear_session_timeout(session_id)
         gamestate.start_pending_response(session_id)
         
-        await routing_logic.broadcast_to_session(session_id, json.dumps({
+        chat_msg = json.dumps({
             "sender": user.username,
             "role": "user",
             "content": content,
+            "session_id": session_id,
             "id": log.id,
             "panic": panic_state.get("user", False)
-        }), exclude_ws=websocket)
+        })
+        await routing_logic.broadcast_to_session(session_id, chat_msg, exclude_ws=websocket)
+        await routing_logic.publish_to_admins(session_id, "chat", chat_msg)
         
         # CHECK FOR AUTOPILOT
         # Reverse Routing: Which Agent is on this Session?
-        shift = gamestate.global_shift_offset
-        total = settings.TOTAL_SESSIONS
-        agent_index = (session_id - 1 - shift) % total
-        agent_logical_id = agent_index + 1 # This is the Agent mapped to this user
-        
-        if gamestate.active_autopilots.get(agent_logical_id):
-            await routing_logic.broadcast_to_session(session_id, json.dumps({
-                "type": "optimizing_start",
-                "mode": "hyper"
-            }))
-            # 1. Update History
-            if agent_logical_id not in gamestate.hyper_histories:
-                gamestate.hyper_histories[agent_logical_id] = []
-            
-            history = gamestate.hyper_histories[agent_logical_id]
-            history.append({"role": "user", "content": content})
-            
-            # 2. Generate Reply
-            try:
-                reply = await llm_service.generate_response(gamestate.llm_config_hyper, history)
-            except Exception as e:
-                print(f"Autopilot Error: {e}")
-                reply = "..."
-
-            # 3. Add Reply to History
-            history.append({"role": "assistant", "content": reply})
-            
-            # 4. Save & Broadcast (As Agent)
-            agent_username = f"agent{agent_logical_id}"
-            agent_db_user = db.query(User).filter(User.username == agent_username).first()
-            
-            if agent_db_user and reply:
-                log_ai = ChatLog(session_id=session_id, sender_id=agent_db_user.id, content=reply, is_hyper=True)
-                db.add(log_ai)
-                db.commit()
-
-                # Autopilot responded - clear pending response timer
-                gamestate.clear_pending_response(session_id)
-
-                hyper_msg = json.dumps({
-                    "sender": agent_username,
-                    "role": "agent",
-                    "content": reply,
-                    "session_id": session_id,
-                    "id": log_ai.id,
-                    "is_hyper": True
-                })
+        agent_logical_id = gamestate.agent_for_session(session_id) # This is the Agent mapped to this user
 
-                # Hyper Visibility: BLACKBOX/FORENSIC hide live HYPER from agent
-                # NORMAL/EPHEMERAL show live HYPER to agent
-                from ..logic.gamestate import HyperVisibilityMode
-                hide_live = gamestate.hyper_visibility_mode in (
-                    HyperVisibilityMode.BLACKBOX,
-                    HyperVisibilityMode.FORENSIC,
-                )
-
-                if hide_live:
-                    # Send only to user (not agent) in this session
-                    for uid, lid in routing_logic.user_logical_ids.items():
-                        if lid == session_id and uid in routing_logic.user_connections:
-                            for con in routing_logic.user_connections[uid]:
-                                try: await con.send_text(hyper_msg)
-                                except: pass
-                    # Also notify admins
-                    await routing_logic.broadcast_to_admins(hyper_msg)
-                else:
-                    # Normal broadcast to entire session (user + agent)
-                    await routing_logic.broadcast_to_session(session_id, hyper_msg)
+        if gamestate.active_autopilots.get(agent_logical_id):
+            # Answered by the session's autopilot worker; the reader loop continues right away
+            autopilot.submit(user.instance_id, session_id, content)
 
     async def handle_typing_indicator(self, user: User, msg_data: dict, websocket: WebSocket):
         msg_type = msg_data.get("type")
-        if msg_type in ["typing_start", "typing_stop"]:
-            if user.role == UserRole.USER:
-                # Value from User -> Send to Agent
-                session_id = self._get_logical_id(user.username, "user")
-                await routing_logic.broadcast_to_session(session_id, json.dumps({
-                    "type": msg_type,
-                    "sender": user.username,
-                    "role": "user",
-                    "session_id": session_id
-                }), exclude_ws=websocket)
-                
-            elif user.role == UserRole.AGENT:
-                # Agent typing -> Send to User in current session
-                target_session_id = self._get_logical_id(user.username, "agent")
-                
-                if target_session_id:
-                    await routing_logic.broadcast_to_session(target_session_id, json.dumps({
-                        "type": msg_type,
-                        "sender": user.username,
-                        "role": "agent",
-                        "session_id": target_session_id
-                    }), exclude_ws=websocket)
+        if msg_type not in ["typing_start", "typing_stop"]:
+            return
+        routing_logic = get_routing(user.instance_id)
+        if user.role == UserRole.USER:
+            # Value from User -> Send to Agent
+            session_id = self._get_logical_id(user.username, "user")
+            role = "user"
+        elif user.role == UserRole.AGENT:
+            # Agent typing -> Send to User in the session the agent currently serves
+            session_id = get_gamestate(user.instance_id).session_for_agent(self._get_logical_id(user.username, "agent"))
+            role = "agent"
+        else:
+            return
+
+        async def send(state: str):
+            message = json.dumps({
+                "type": state,
+                "sender": user.username,
+                "role": role,
+                "session_id": session_id
+            })
+            await routing_logic.broadcast_to_session(session_id, message, exclude_ws=websocket)
+            await routing_logic.publish_to_admins(session_id, "typing", message)
+
+        # Rate-limited per connection, a start/stop flip within the interval cancels out
+        coalescer_for(websocket).typing_indicator(msg_type, send)
+
+    async def handle_typing_sync(self, user: User, msg_data: dict, websocket: WebSocket):
+        """Mirror the input text to the sender's other tabs (last value wins per window)."""
+        routing_logic = get_routing(user.instance_id)
+        if user.role not in (UserRole.USER, UserRole.AGENT):
+            return
+        coalescer = coalescer_for(websocket)
+
+        if routing_logic.has_typing_diff(websocket) and "seq" in msg_data:
+            # Incremental frame (logic/typing_diff.py); a gap asks the client for a checkpoint
+            content = coalescer.stream.receive(msg_data)
+            if content is None:
+                await websocket.send_text(json.dumps({"type": "typing_resync"}))
+                return
+        else:
+            content = msg_data.get("content", "")
+
+        async def send(text: str):
+            # All tabs but this one; each gets the diff or the full frame it negotiated
+            await routing_logic.send_typing_sync(user.role.value, user.id, json.dumps({
+                "type": "typing_sync",
+                "sender": user.username,
+                "content": text
+            }), json.dumps({
+                "type": "typing_sync",
+                "sender": user.username,
+                **coalescer.stream.encode(text)
+            }), exclude_ws=websocket)
+
+        coalescer.typing_sync(content, send)
+
+    async def handle_typing_resync(self, user: User, msg_data: dict, websocket: WebSocket):
+        """A tab missed a diff frame of stream `src`; the stream's next frame is a checkpoint."""
+        src = msg_data.get("src")
+        if isinstance(src, str):
+            await get_routing(user.instance_id).request_typing_checkpoint(src)
@@ -6,6 +6,8 @@ from .task_service import TaskService
 from .admin_service import AdminService
 import json
 
+TYPING_EVENTS = ("typing_start", "typing_stop", "typing_sync", "typing_resync")
+
 class Dispatcher:
     """
     Central router for WebSocket messages (Hotfix v1.1).
@@ -34,14 +36,26 @@ class Dispatcher:
                 await self.task_service.handle_task_submit(db, user, message, websocket)
             return
 
-        # 3. CHAT Routing (Default for all remaining)
+        # 3. Keystroke traffic (coalesced per connection)
+        if msg_type in TYPING_EVENTS:
+            await self.handle_typing(message, user, websocket)
+            return
+
+        # 4. CHAT Routing (Default for all remaining)
         if user.role == UserRole.AGENT:
             await self.chat_service.handle_agent_message(db, user, message, websocket)
         elif user.role == UserRole.USER:
-            # Chat, Action, Typing Sync, Report, etc.
-            if msg_type in ["typing_start", "typing_stop"]:
-                 await self.chat_service.handle_typing_indicator(user, message, websocket)
-            else:
-                 await self.chat_service.handle_user_message(db, user, message, websocket)
+            # Chat, Action, Report, etc.
+            await self.chat_service.handle_user_message(db, user, message, websocket)
+
+    async def handle_typing(self, message: dict, user: User, websocket: WebSocket):
+        """Typing events need neither a DB session nor shared-state tracking."""
+        msg_type = message.get("type")
+        if msg_type == "typing_sync":
+            await self.chat_service.handle_typing_sync(user, message, websocket)
+        elif msg_type == "typing_resync":
+            await self.chat_service.handle_typing_resync(user, message, websocket)
+        else:
+            await self.chat_service.handle_typing_indicator(user, message, websocket)
 
 dispatcher_service = Dispatcher()
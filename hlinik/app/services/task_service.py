@@ -1,7 +1,8 @@
 import json
 from ..database import SessionLocal, Task, TaskStatus, SystemLog, User
-from ..logic.routing import routing_logic
-from ..logic.gamestate import gamestate
+from ..logic.gamestate import get_gamestate
+from ..logic.task_feed import push_task_delta
+from ..logic.evaluation_queue import evaluation_queue
 from fastapi import WebSocket
 
 class TaskService:
@@ -25,7 +26,7 @@ class TaskService:
         ])).first()
         
         if not existing:
-            default_reward = gamestate.get_default_task_reward(user.status_level)
+            default_reward = get_gamestate(user.instance_id).get_default_task_reward(user.status_level)
             new_task = Task(
                 user_id=user.id,
                 prompt_desc="Waiting for assignment...",
@@ -46,9 +47,7 @@ class TaskService:
             }))
 
             # Notify Admins
-            await routing_logic.broadcast_to_admins(json.dumps({
-                "type": "admin_refresh_tasks"
-            }))
+            await push_task_delta(new_task, user.instance_id)
             
             # Log
             db_log = SessionLocal()
@@ -82,7 +81,9 @@ class TaskService:
 
         current_task.submission_content = submission_text
         current_task.status = TaskStatus.SUBMITTED
+        current_task.suggested_rating = None
         db.commit()
+        evaluation_queue.enqueue(current_task.id)
 
         await websocket.send_text(json.dumps({
             "type": "task_update",
@@ -93,9 +94,7 @@ class TaskService:
             "reward": current_task.reward_offered
         }))
 
-        await routing_logic.broadcast_to_admins(json.dumps({
-            "type": "admin_refresh_tasks"
-        }))
+        await push_task_delta(current_task, user.instance_id)
 
         db_log = SessionLocal()
         db_log.add(SystemLog(event_type="TASK", message=f"{user.username} submitted task #{current_task.id}"))
@@ -0,0 +1,208 @@
+"""
+Static file serving with precompressed variants and fingerprinted URLs.
+
+PrecompressedStaticFiles is a drop-in StaticFiles replacement:
+- Text assets (js, css, html, json, ...) are compressed once (gzip, plus brotli
+  when the optional `brotli` package is installed) and served in the best
+  encoding the client accepts. Variants are rebuilt when the file changes.
+- Every asset has a content hash. `name.<hash>.ext` URLs (see `static_url`) are
+  served with `Cache-Control: immutable`; plain URLs revalidate via ETag.
+- HTML files served by the mount get their relative .js/.css references
+  rewritten to fingerprinted URLs (lore-web index.html). The rewritten HTML is
+  rebuilt (new hash/ETag) when any referenced file changes, not only the HTML.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+
+try:
+    import brotli
+except ImportError:  # Optional - gzip only
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {".js", ".css", ".html", ".json", ".svg", ".md", ".txt", ".map"}
+MIN_COMPRESS_SIZE = 1024  # bytes; smaller files are not worth the extra request header
+HASH_LENGTH = 10
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+_FINGERPRINT_RE = re.compile(r"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{%d})(?P<ext>\.[A-Za-z0-9]+)$" % HASH_LENGTH)
+_HTML_REF_RE = re.compile(r'(?P<attr>\b(?:src|href))="(?P<url>[^"#:]+?\.(?:js|css))(?:\?[^"]*)?"')
+
+# URL prefix -> mount, used by static_url() in templates
+_mounts: Dict[str, "PrecompressedStaticFiles"] = {}
+
+
+class StaticAsset:
+    """Encoded variants of one file, valid while (mtime, size) of it and of its `deps` match."""
+    __slots__ = ("mtime", "size", "deps", "hash", "etag", "body", "variants")
+
+    def __init__(self, mtime: int, size: int, body: bytes, keep_body: bool, compress: bool = True,
+                 deps: Tuple[Tuple[str, int, int], ...] = ()):
+        self.mtime = mtime
+        self.size = size
+        self.deps = deps  # (path, mtime, size) of the files an HTML body references
+        self.hash = hashlib.sha256(body).hexdigest()[:HASH_LENGTH]
+        self.etag = f'"{self.hash}"'
+        self.body = body if keep_body else None  # Identity is served from disk unless rewritten
+        self.variants: Dict[str, bytes] = {}
+        if compress and len(body) >= MIN_COMPRESS_SIZE:
+            gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(gzipped) < len(body):
+                self.variants["gzip"] = gzipped
+            if brotli is not None:
+                compressed = brotli.compress(body)
+                if len(compressed) < len(gzipped):
+                    self.variants["br"] = compressed
+
+
+def _deps_current(deps) -> bool:
+    for path, mtime, size in deps:
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            return False
+        if stat_result.st_mtime_ns != mtime or stat_result.st_size != size:
+            return False
+    return True
+
+
+def _is_compressible(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def _pick_encoding(accept_encoding: str, variants: Dict[str, bytes]) -> Optional[str]:
+    accepted = {part.split(";")[0].strip() for part in accept_encoding.split(",")}
+    for encoding in ("br", "gzip"):
+        if encoding in variants and encoding in accepted:
+            return encoding
+    return None
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    def __init__(self, *args, url_prefix: Optional[str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._assets: Dict[str, StaticAsset] = {}
+        self.url_prefix = url_prefix
+        if url_prefix:
+            _mounts[url_prefix] = self
+
+    # --- Asset cache ---
+
+    def _fingerprint_html(self, full_path: str, body: bytes) -> Tuple[bytes, Tuple[Tuple[str, int, int], ...]]:
+        """Rewritten body and the referenced files it depends on."""
+        base_dir = os.path.dirname(full_path)
+        root = os.path.realpath(self.directory)
+        deps: List[Tuple[str, int, int]] = []
+
+        def replace(match):
+            target = os.path.realpath(os.path.join(base_dir, match.group("url")))
+            if not target.startswith(root + os.sep) or not os.path.isfile(target):
+                return match.group(0)
+            asset = self.asset(target)
+            deps.append((target, asset.mtime, asset.size))
+            stem, ext = os.path.splitext(match.group("url"))
+            return f'{match.group("attr")}="{stem}.{asset.hash}{ext}"'
+
+        return _HTML_REF_RE.sub(replace, body.decode("utf-8")).encode("utf-8"), tuple(deps)
+
+    def asset(self, full_path: str, stat_result: Optional[os.stat_result] = None) -> StaticAsset:
+        stat_result = stat_result or os.stat(full_path)
+        cached = self._assets.get(full_path)
+        if (cached and cached.mtime == stat_result.st_mtime_ns and cached.size == stat_result.st_size
+                and _deps_current(cached.deps)):
+            return cached
+        with open(full_path, "rb") as f:
+            body = f.read()
+        is_html = full_path.endswith(".html")
+        deps = ()
+        if is_html:
+            body, deps = self._fingerprint_html(full_path, body)
+        asset = StaticAsset(stat_result.st_mtime_ns, stat_result.st_size, body,
+                            keep_body=is_html, compress=_is_compressible(full_path), deps=deps)
+        self._assets[full_path] = asset
+        return asset
+
+    def precompress_all(self) -> int:
+        """Build all compressible assets up front (run in a thread at startup)."""
+        count = 0
+        for dirpath, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                full_path = os.path.join(dirpath, filename)
+                if _is_compressible(full_path):
+                    try:
+                        self.asset(full_path)
+                        count += 1
+                    except (OSError, UnicodeDecodeError) as e:
+                        print(f"WARN: Could not precompress {full_path}: {e}")
+        return count
+
+    def fingerprint(self, path: str) -> Optional[str]:
+        """Content hash of a file relative to the mount (None if missing)."""
+        full_path, stat_result = self.lookup_path(path)
+        if not stat_result:
+            return None
+        return self.asset(full_path, stat_result).hash
+
+    # --- Serving ---
+
+    async def get_response(self, path: str, scope) -> Response:
+        match = _FINGERPRINT_RE.match(path)
+        if match and not self.lookup_path(path)[1]:
+            original = f"{match.group('stem')}{match.group('ext')}"
+            _, stat_result = self.lookup_path(original)
+            if stat_result:
+                # Stale hashes (old HTML after a deploy) still get the current file, just not as immutable
+                scope["iris.fingerprint"] = match.group("hash")
+                path = original
+        return await super().get_response(path, scope)
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        full_path = str(full_path)
+        if status_code != 200 or not _is_compressible(full_path):
+            response = super().file_response(full_path, stat_result, scope, status_code)
+            fingerprint = scope.get("iris.fingerprint")
+            if fingerprint and fingerprint == self.asset(full_path, stat_result).hash:
+                response.headers["Cache-Control"] = IMMUTABLE_CACHE
+            return response
+
+        asset = self.asset(full_path, stat_result)
+        request_headers = Headers(scope=scope)
+        immutable = scope.get("iris.fingerprint") == asset.hash
+        headers = {
+            "ETag": asset.etag,
+            "Vary": "Accept-Encoding",
+            "Cache-Control": IMMUTABLE_CACHE if immutable else "no-cache",
+        }
+        if asset.etag in request_headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+
+        media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        encoding = _pick_encoding(request_headers.get("accept-encoding", ""), asset.variants)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            return Response(asset.variants[encoding], media_type=media_type, headers=headers)
+        if asset.body is not None:
+            return Response(asset.body, media_type=media_type, headers=headers)
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers.update(headers)
+        return response
+
+
+def static_url(url: str) -> str:
+    """Fingerprinted URL for templates: /static/js/app.js -> /static/js/app.<hash>.js"""
+    for prefix, mount in _mounts.items():
+        if url.startswith(prefix + "/"):
+            relative = url[len(prefix) + 1:]
+            digest = mount.fingerprint(relative)
+            if digest:
+                stem, ext = os.path.splitext(relative)
+                return f"{prefix}/{stem}.{digest}{ext}"
+    return url
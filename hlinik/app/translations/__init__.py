@@ -9,13 +9,31 @@ Future implementation will include:
 - Real-time translation updates via WebSocket
 """
 
+import hashlib
 import json
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
 # Translation cache
 _translations_cache: Dict[str, dict] = {}
 
+# Language mode -> translation files, later files override earlier ones.
+# Every mode falls back to Czech for keys it does not define.
+LANGUAGE_LAYERS: Dict[str, List[str]] = {
+    "cz": ["czech"],
+    "en": ["czech", "english"],
+    "crazy": ["czech", "crazy"],
+    "czech-iris": ["czech", "iris"],
+}
+
+# Compiled (flattened) translations per language mode: {"login.username_label": "..."}
+_flat_cache: Dict[str, Dict[str, str]] = {}
+# Source file mtimes the flat cache was built from
+_flat_mtimes: Dict[str, Tuple[float, ...]] = {}
+# Encoded HTTP bundles: {(language_mode, labels_json): TranslationBundle}
+_bundle_cache: Dict[Tuple[str, str], "TranslationBundle"] = {}
+MAX_BUNDLES = 32
+
 def load_translations(language: str = "czech") -> dict:
     """
     Load translation file from disk.
@@ -67,33 +85,8 @@ def get_translation(key_path: str, language_mode: str = "cz", custom_labels: Opt
     if custom_labels and key_path in custom_labels:
         return custom_labels[key_path]
     
-    # Priority 2: Load appropriate language file(s)
-    if language_mode == "en":
-        english_trans = load_translations("english")
-        value = _get_nested_value(english_trans, key_path)
-        # Fallback to czech if key not found in english
-        if value is None:
-            czech_trans = load_translations("czech")
-            value = _get_nested_value(czech_trans, key_path)
-    elif language_mode == "crazy":
-        crazy_trans = load_translations("crazy")
-        value = _get_nested_value(crazy_trans, key_path)
-        # Fallback to czech if key not found in crazy
-        if value is None:
-            czech_trans = load_translations("czech")
-            value = _get_nested_value(czech_trans, key_path)
-    elif language_mode == "czech-iris":
-        # Try IRIS first, fallback to czech
-        iris_trans = load_translations("iris")
-        czech_trans = load_translations("czech")
-        
-        # Navigate through nested keys
-        value = _get_nested_value(iris_trans, key_path)
-        if value is None:
-            value = _get_nested_value(czech_trans, key_path)
-    else:  # default "cz"
-        czech_trans = load_translations("czech")
-        value = _get_nested_value(czech_trans, key_path)
+    # Priority 2: Compiled language bundle (IRIS/English/Crazy overrides on top of Czech)
+    value = get_flat_translations(language_mode).get(key_path)
     
     # Priority 3: Fallback to key path itself
     return value if value is not None else key_path
@@ -121,6 +114,103 @@ def _get_nested_value(data: dict, key_path: str) -> Optional[str]:
     return current if isinstance(current, str) else None
 
 
+def flatten_translations(data: dict, prefix: str = "") -> Dict[str, str]:
+    """
+    Flatten nested translations into dotted keys.
+    Only string leaves are kept (same as _get_nested_value).
+    
+    Example:
+        >>> flatten_translations({"login": {"username_label": "ID"}})
+        {"login.username_label": "ID"}
+    """
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_translations(value, f"{path}."))
+        elif isinstance(value, str):
+            flat[path] = value
+    return flat
+
+
+def _source_mtimes(language_mode: str) -> Tuple[float, ...]:
+    translations_dir = Path(__file__).parent
+    mtimes = []
+    for language in LANGUAGE_LAYERS.get(language_mode, LANGUAGE_LAYERS["cz"]):
+        try:
+            mtimes.append((translations_dir / f"{language}.json").stat().st_mtime)
+        except OSError:
+            mtimes.append(0.0)
+    return tuple(mtimes)
+
+
+def get_flat_translations(language_mode: str = "cz", check_files: bool = False) -> Dict[str, str]:
+    """
+    Get compiled translations of a language mode (flattened, overrides applied).
+    Built once per mode; `check_files` also rebuilds when a source file changed on disk.
+    """
+    if check_files and language_mode in _flat_cache and _flat_mtimes.get(language_mode) != _source_mtimes(language_mode):
+        clear_cache()
+    if language_mode in _flat_cache:
+        return _flat_cache[language_mode]
+    
+    flat = {}
+    for language in LANGUAGE_LAYERS.get(language_mode, LANGUAGE_LAYERS["cz"]):
+        flat.update(flatten_translations(load_translations(language)))
+    _flat_cache[language_mode] = flat
+    _flat_mtimes[language_mode] = _source_mtimes(language_mode)
+    return flat
+
+
+class TranslationBundle:
+    """Pre-encoded /api/translations response of one language mode + custom labels."""
+    __slots__ = ("language_mode", "version", "etag", "body")
+    
+    def __init__(self, language_mode: str, version: str, body: bytes):
+        self.language_mode = language_mode
+        self.version = version
+        self.etag = f'"{version}"'
+        self.body = body
+
+
+def get_bundle(language_mode: str = "cz", custom_labels: Optional[dict] = None) -> TranslationBundle:
+    """
+    Compiled translation bundle for clients.
+    Custom labels are merged into the flat translations (and also sent separately
+    so terminals can apply live label updates). Rebuilt only when a translation
+    file or the labels change.
+    """
+    custom_labels = custom_labels or {}
+    labels_json = json.dumps(custom_labels, sort_keys=True, ensure_ascii=False)
+    flat = get_flat_translations(language_mode, check_files=True)
+    
+    cache_key = (language_mode, labels_json)
+    bundle = _bundle_cache.get(cache_key)
+    if bundle is not None:
+        return bundle
+    
+    translations = {**flat, **custom_labels}
+    payload = json.dumps({
+        "translations": translations,
+        "custom_labels": custom_labels,
+    }, ensure_ascii=False, sort_keys=True)
+    version = hashlib.sha1(f"{language_mode}:{payload}".encode("utf-8")).hexdigest()[:16]
+    body = json.dumps({
+        "status": "ok",
+        "language_mode": language_mode,
+        "version": version,
+        "flat": True,
+        "translations": translations,
+        "custom_labels": custom_labels
+    }, ensure_ascii=False).encode("utf-8")
+    
+    if len(_bundle_cache) >= MAX_BUNDLES:
+        _bundle_cache.pop(next(iter(_bundle_cache)))
+    bundle = TranslationBundle(language_mode, version, body)
+    _bundle_cache[cache_key] = bundle
+    return bundle
+
+
 def merge_translations(base: dict, override: dict) -> dict:
     """
     Deep merge two translation dictionaries.
@@ -145,9 +235,11 @@ def merge_translations(base: dict, override: dict) -> dict:
 
 
 def clear_cache():
-    """Clear translation cache. Useful for hot-reloading."""
-    global _translations_cache
-    _translations_cache = {}
+    """Clear translation caches (raw files, compiled bundles). Useful for hot-reloading."""
+    _translations_cache.clear()
+    _flat_cache.clear()
+    _flat_mtimes.clear()
+    _bundle_cache.clear()
 
 
 # TODO: Add database integration for custom labels
@@ -1,6 +1,10 @@
 import os
+import sys
 import json
-import shutil
+import hashlib
+import inspect
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 # ==========================================
@@ -192,31 +196,42 @@ FULL_RELATIONS = [
 # 3. GENERÁTOR
 # ==========================================
 
-def init_folder_structure():
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
+MANIFEST_FILE = ".manifest.json"  # role id -> hash vstupů a vygenerovaný soubor
+PARALLEL_THRESHOLD = 4  # pod tímto počtem změněných briefingů se nevyplatí spouštět procesy
+
+def _write_if_changed(path, content):
+    """Zapíše soubor jen při změně obsahu (nemění mtime zbytečně)."""
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+def init_folder_structure(output_dir=None):
+    output_dir = output_dir or OUTPUT_DIR
+    os.makedirs(DATA_DIR, exist_ok=True)
     
     # Zápis JSONů
-    with open(f"{DATA_DIR}/roles.json", 'w', encoding='utf-8') as f:
-        json.dump(FULL_ROLES, f, indent=4, ensure_ascii=False)
-    with open(f"{DATA_DIR}/relations.json", 'w', encoding='utf-8') as f:
-        json.dump(FULL_RELATIONS, f, indent=4, ensure_ascii=False)
-
-    # Reset output složky
-    if os.path.exists(OUTPUT_DIR):
-        shutil.rmtree(OUTPUT_DIR)
-    os.makedirs(f"{OUTPUT_DIR}/users")
-    os.makedirs(f"{OUTPUT_DIR}/agents")
-    os.makedirs(f"{OUTPUT_DIR}/admins")
+    _write_if_changed(f"{DATA_DIR}/roles.json", json.dumps(FULL_ROLES, indent=4, ensure_ascii=False))
+    _write_if_changed(f"{DATA_DIR}/relations.json", json.dumps(FULL_RELATIONS, indent=4, ensure_ascii=False))
 
-def get_relations_for_role(role_id, relations):
-    my_relations = []
+    # Výstupní složky (bez mazání - generuje se inkrementálně)
+    for folder in ("users", "agents", "admins"):
+        os.makedirs(f"{output_dir}/{folder}", exist_ok=True)
+
+def build_relation_index(relations):
+    """role id -> vazby z pohledu role. Jeden průchod místo skenování pro každou roli."""
+    index = {}
     for r in relations:
-        if r['source'] == role_id:
-            my_relations.append({"target": r['target'], "desc": r['desc_source'], "type": r['type']})
-        elif r['target'] == role_id:
-            my_relations.append({"target": r['source'], "desc": r['desc_target'], "type": r['type']})
-    return my_relations
+        index.setdefault(r['source'], []).append({"target": r['target'], "desc": r['desc_source'], "type": r['type']})
+        if r['target'] != r['source']:
+            index.setdefault(r['target'], []).append({"target": r['source'], "desc": r['desc_target'], "type": r['type']})
+    return index
+
+def get_relations_for_role(role_id, relations):
+    return build_relation_index(relations).get(role_id, [])
 
 def generate_html(role, my_relations):
     color_class = "role-user"
@@ -293,23 +308,98 @@ def generate_html(role, my_relations):
     """
     return html
 
-def main():
+def _briefing_filename(role, output_dir):
+    folder = f"{role['type']}s"
+    return f"{output_dir}/{folder}/{role['id']}_{role['name'].replace(' ', '_')}.html"
+
+def _template_hash():
+    # Změna šablony nebo verze => přegenerovat vše
+    return hashlib.sha256((VERSION + inspect.getsource(generate_html)).encode('utf-8')).hexdigest()
+
+def _input_hash(role, my_relations, template_hash):
+    payload = json.dumps([template_hash, role, my_relations], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _render_briefing(job):
+    """Worker (spouštěno i v ProcessPoolExecutor)."""
+    role, my_relations, filename = job
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(generate_html(role, my_relations))
+    return role['id']
+
+def _load_manifest(output_dir):
+    try:
+        with open(f"{output_dir}/{MANIFEST_FILE}", 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def generate_briefings(roles, relations, output_dir, force=False, jobs=None):
+    """
+    Inkrementální generování: briefing se přepíše jen při změně vstupů
+    (role, její vazby, šablona). Vrací report {"rebuilt", "unchanged", "removed",
+    "stale_files"}: "removed" jsou role, které zmizely, "stale_files" smazané
+    soubory (i po přejmenování role, která se zároveň přegeneruje).
+    """
+    manifest = _load_manifest(output_dir)
+    relation_index = build_relation_index(relations)
+    template_hash = _template_hash()
+
+    new_manifest = {}
+    pending = []
+    unchanged = []
+    for role in roles:
+        my_rels = relation_index.get(role['id'], [])
+        filename = _briefing_filename(role, output_dir)
+        digest = _input_hash(role, my_rels, template_hash)
+        new_manifest[role['id']] = {"hash": digest, "file": filename}
+
+        previous = manifest.get(role['id'], {})
+        if not force and previous.get("hash") == digest and os.path.exists(filename):
+            unchanged.append(role['id'])
+        else:
+            pending.append((role, my_rels, filename))
+
+    # Zastaralé soubory (smazaná / přejmenovaná role)
+    current_files = {entry["file"] for entry in new_manifest.values()}
+    removed = [role_id for role_id in manifest if role_id not in new_manifest]
+    stale_files = []
+    for entry in manifest.values():
+        if entry.get("file") not in current_files and os.path.exists(entry.get("file", "")):
+            os.remove(entry["file"])
+            stale_files.append(entry["file"])
+
+    if len(pending) >= PARALLEL_THRESHOLD and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            rebuilt = list(pool.map(_render_briefing, pending))
+    else:
+        rebuilt = [_render_briefing(job) for job in pending]
+
+    with open(f"{output_dir}/{MANIFEST_FILE}", 'w', encoding='utf-8') as f:
+        json.dump(new_manifest, f, indent=2, ensure_ascii=False)
+
+    return {"rebuilt": rebuilt, "unchanged": unchanged, "removed": removed, "stale_files": stale_files}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=f"Generátor briefingů {VERSION}")
+    parser.add_argument("--force", action="store_true", help="přegenerovat všechny briefingy")
+    parser.add_argument("--jobs", type=int, default=None, help="počet procesů (výchozí: počet CPU)")
+    args = parser.parse_args(argv)
+
     print(f"🚀 Startuji generátor {VERSION}...")
     init_folder_structure()
     
-    print("⚙️ Generuji 20 briefingů...")
-    for role in FULL_ROLES:
-        my_rels = get_relations_for_role(role['id'], FULL_RELATIONS)
-        html_content = generate_html(role, my_rels)
-        
-        folder = f"{role['type']}s"
-        filename = f"{OUTPUT_DIR}/{folder}/{role['id']}_{role['name'].replace(' ', '_')}.html"
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        print(f"  ✅ {role['id']}: {role['name']}")
+    print(f"⚙️ Generuji {len(FULL_ROLES)} briefingů...")
+    report = generate_briefings(FULL_ROLES, FULL_RELATIONS, OUTPUT_DIR, force=args.force, jobs=args.jobs)
+    for role_id in report["rebuilt"]:
+        print(f"  ✅ {role_id}")
+    for role_id in report["removed"]:
+        print(f"  🗑️ {role_id} (odstraněno)")
+    for path in report["stale_files"]:
+        print(f"  🧹 {path} (starý soubor smazán)")
 
-    print("\n✨ HOTOVO. Briefingy pro 20 hráčů jsou připraveny.")
+    print(f"\n✨ HOTOVO. Přegenerováno: {len(report['rebuilt'])}, beze změny: {len(report['unchanged'])}, "
+          f"odstraněno: {len(report['removed'])}.")
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
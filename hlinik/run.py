@@ -3,4 +3,7 @@ import os
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run("app.main:app", host="0.0.0.0", port=port, reload=True, app_dir="hlinik")
+    # permessage-deflate is negotiated by uvicorn with clients that offer it (all browsers)
+    deflate = os.getenv("IRIS_WS_DEFLATE", "1") != "0"
+    uvicorn.run("app.main:app", host="0.0.0.0", port=port, reload=True, app_dir="hlinik",
+                ws_per_message_deflate=deflate)
@@ -0,0 +1,47 @@
+#!/bin/bash
+# =====================================================
+# MICROBENCHMARKS: routing, gamestate, translations, lore, wire size
+# =====================================================
+# Runs the in-process hot path benchmarks in tests/benchmarks/
+# and compares them against the last stored baseline.
+#
+# Usage:
+#   ./run_benchmarks.sh            # Run and compare against latest baseline
+#   ./run_benchmarks.sh --save     # Run and store a new baseline
+#
+# Baselines are stored per machine in tests/benchmarks/.baselines/.
+# The comparison fails if any benchmark median regresses by more than
+# BENCH_FAIL_THRESHOLD (default 25%).
+
+set -e
+
+cd "$(dirname "$0")"
+
+if [ -d "venv" ]; then
+    PYTEST_CMD="./venv/bin/pytest"
+else
+    PYTEST_CMD="pytest"
+fi
+
+STORAGE="tests/benchmarks/.baselines"
+THRESHOLD="${BENCH_FAIL_THRESHOLD:-25%}"
+BENCH_ARGS="--benchmark-enable --benchmark-only --benchmark-storage=$STORAGE --benchmark-sort=name"
+
+if [ "$1" == "--save" ]; then
+    echo "Storing new benchmark baseline..."
+    $PYTEST_CMD tests/benchmarks $BENCH_ARGS --benchmark-autosave
+elif ls "$STORAGE"/*/*.json >/dev/null 2>&1; then
+    echo "Comparing against latest baseline (fail threshold: median +$THRESHOLD)..."
+    $PYTEST_CMD tests/benchmarks $BENCH_ARGS --benchmark-compare --benchmark-compare-fail="median:$THRESHOLD"
+else
+    echo "No baseline found in $STORAGE, storing the first one..."
+    $PYTEST_CMD tests/benchmarks $BENCH_ARGS --benchmark-autosave
+fi
+
+echo ""
+echo "WebSocket frame sizes (bytes):"
+if [ -d "venv" ]; then PYTHON_CMD="./venv/bin/python"; else PYTHON_CMD="python"; fi
+$PYTHON_CMD -m tests.benchmarks.test_bench_payloads
+
+echo ""
+echo "Benchmarks completed!"
@@ -254,6 +254,7 @@ window.openStation = function (name) {
     if (titleEl) titleEl.innerText = titleMap[name] || name.toUpperCase();
 
     window.currentView = name;
+    updateSubscription();
 
     // 6. Init specific logic
     disableEditMode(); // Force exit edit mode on navigation
@@ -286,11 +287,13 @@ window.closeStation = function () {
     if (hubView) hubView.classList.remove('hidden');
 
     window.currentView = null;
+    updateSubscription();
 };
 
 window.switchMonitorTab = function (tab) {
     console.log("Switching tab to:", tab);
     window.currentTab = tab;
+    updateSubscription();
     document.querySelectorAll('.mon-tab').forEach(e => e.classList.add('hidden'));
     const tabContent = document.getElementById(`mon-content-${tab}`);
     if (tabContent) tabContent.classList.remove('hidden');
@@ -688,13 +691,30 @@ function t(key, defaultVal) {
     return defaultVal;
 }
 
+// Follows next_cursor until the last page; `key` is the list field of the response.
+// serverTime (first page) is the updated_since for a later incremental fetch.
+async function fetchAllPages(url, key) {
+    const items = [];
+    let serverTime = null;
+    let cursor = null;
+    do {
+        const sep = url.includes('?') ? '&' : '?';
+        const res = await fetch(cursor === null ? url : `${url}${sep}cursor=${cursor}`, {
+            headers: { 'Authorization': `Bearer ${getAuthToken()}` }
+        });
+        if (!res.ok) throw new Error(`${url}: ${res.status}`);
+        const page = await res.json();
+        items.push(...page[key]);
+        if (serverTime === null) serverTime = page.server_time || null;
+        cursor = page.next_cursor;
+    } while (cursor !== null && cursor !== undefined);
+    return { items, serverTime };
+}
+
 // --- ECONOMY (NX-01 STYLE) ---
 window.refreshEconomy = async function () {
     try {
-        const res = await fetch('/api/admin/data/users', {
-            headers: { 'Authorization': `Bearer ${getAuthToken()}` }
-        });
-        const users = await res.json();
+        const { items: users } = await fetchAllPages('/api/admin/data/users', 'users');
         const tbody = document.getElementById('economyTableBody');
         if (!tbody) return;
         tbody.innerHTML = '';
@@ -785,103 +805,148 @@ window.setStatus = async function (userId, status) {
 };
 
 // --- TASKS (LCARS VOYAGER STYLE) ---
+// Local copy of the task list (id -> task), kept current by admin_task_delta pushes
+const taskCache = new Map();
+let tasksLoaded = false;
+let tasksSyncedAt = null;
+
 window.refreshTasks = async function () {
     if (window.currentView !== 'tasks') return;
     try {
-        const res = await fetch('/api/admin/tasks', {
-            headers: { 'Authorization': `Bearer ${getAuthToken()}` }
-        });
-        if (!res.ok) {
-            console.error('Task fetch fail', res.status);
-            return;
-        }
-        const tasks = await res.json();
+        // After the first load only fetch what changed (covers deltas missed during a reconnect)
+        const incremental = tasksLoaded && tasksSyncedAt;
+        const url = incremental
+            ? `/api/admin/tasks?updated_since=${encodeURIComponent(tasksSyncedAt)}`
+            : '/api/admin/tasks';
+        const { items: tasks, serverTime } = await fetchAllPages(url, 'tasks');
+        if (!incremental) taskCache.clear();
+        tasks.forEach(t => taskCache.set(t.id, t));
+        tasksLoaded = true;
+        tasksSyncedAt = serverTime;
+        renderTasks();
+    } catch (e) { console.error('Task fetch fail', e); }
+};
 
-        const pendingDiv = document.getElementById('pendingTasksCtx');
-        const activeDiv = document.getElementById('activeTasksCtx');
-        const submitDiv = document.getElementById('submittedTasksCtx');
-        const paidDiv = document.getElementById('paidTasksCtx');
+function applyTaskDelta(task) {
+    // Before the first full load there is nothing to patch; refreshTasks() will fetch everything
+    if (!tasksLoaded) return;
+    taskCache.set(task.id, task);
+    if (window.currentView === 'tasks') renderTasks();
+}
 
-        [pendingDiv, activeDiv, submitDiv, paidDiv].forEach(div => {
-            if (div) div.innerHTML = '';
-        });
+// Submitted tasks are ranked by the background evaluation (unscored last), the rest by id
+function taskOrder(a, b) {
+    if (a.status === 'submitted' && b.status === 'submitted') {
+        const sa = a.suggested_rating ?? -1;
+        const sb = b.suggested_rating ?? -1;
+        if (sa !== sb) return sb - sa;
+    }
+    return a.id - b.id;
+}
 
-        tasks.forEach(t => {
-            const el = document.createElement('div');
-
-            const rewardInfo = t.reward !== undefined && t.reward !== null
-                ? `<span class="lcars-reward">${t.reward} CR</span>`
-                : '';
-            const promptInfo = t.prompt
-                ? `<div class="lcars-task-prompt">„${t.prompt}"</div>`
-                : '<div class="lcars-task-prompt" style="opacity: 0.5;">(bez popisu)</div>';
-
-            if (t.status === 'pending_approval') {
-                el.className = "lcars-task-card lcars-task-pending";
-                el.innerHTML = `
-                    <div class="lcars-task-id">ŽÁDOST #${t.id} • UŽIVATEL ${t.user_id}</div>
-                    ${promptInfo}
-                    <div class="lcars-task-meta">
-                        ${rewardInfo}
-                    </div>
-                    <div style="margin-top: 0.75rem; display: grid; grid-template-columns: 1fr 1fr; gap: 0.5rem;">
-                        <div>
-                            <label style="font-size: 0.65rem; color: var(--lcars-paleblue); display: block; margin-bottom: 0.25rem;">ODMĚNA</label>
-                            <input type="number" value="${t.reward || ''}" placeholder="${t.reward || 0}" class="lcars-input" id="rew-${t.id}">
-                        </div>
-                        <div>
-                            <label style="font-size: 0.65rem; color: var(--lcars-paleblue); display: block; margin-bottom: 0.25rem;">ZADÁNÍ</label>
-                            <textarea rows="2" class="lcars-textarea" id="prompt-${t.id}">${t.prompt || ''}</textarea>
-                        </div>
-                    </div>
-                    <div style="margin-top: 0.75rem; display: flex; justify-content: flex-end;">
-                        <button class="lcars-btn lcars-btn-approve" onclick="approveTask(${t.id})">SCHVÁLIT</button>
-                    </div>
-                `;
-                if (pendingDiv) pendingDiv.appendChild(el);
-            } else if (t.status === 'active') {
-                el.className = "lcars-task-card lcars-task-active";
-                el.innerHTML = `
-                    <div class="lcars-task-id">AKTIVNÍ #${t.id} • UŽIVATEL ${t.user_id}</div>
-                    ${promptInfo}
-                    <div class="lcars-task-meta">
-                        ${rewardInfo}
-                        <span style="font-size: 0.65rem; color: var(--lcars-paleblue);">ČEKÁ NA ODEVZDÁNÍ</span>
-                    </div>
-                `;
-                if (activeDiv) activeDiv.appendChild(el);
-            } else if (t.status === 'submitted') {
-                el.className = "lcars-task-card lcars-task-submitted";
-                el.onclick = () => openGradingModal(t);
-
-                el.innerHTML = `
-                    <div style="display: flex; justify-content: space-between; align-items: flex-start;">
-                        <div class="lcars-task-id">ODEVZDÁNO #${t.id} • UŽIVATEL ${t.user_id}</div>
-                        <span class="lcars-click-hint">🔍 HODNOTIT</span>
-                    </div>
-                    ${promptInfo}
-                    <div class="lcars-task-submission">${(t.submission || '(prázdné)').substring(0, 150)}${t.submission && t.submission.length > 150 ? '...' : ''}</div>
-                    <div class="lcars-task-meta">
-                        ${rewardInfo}
+function renderTasks() {
+    const tasks = [...taskCache.values()].sort(taskOrder);
+
+    const pendingDiv = document.getElementById('pendingTasksCtx');
+    const activeDiv = document.getElementById('activeTasksCtx');
+    const submitDiv = document.getElementById('submittedTasksCtx');
+    const paidDiv = document.getElementById('paidTasksCtx');
+
+    [pendingDiv, activeDiv, submitDiv, paidDiv].forEach(div => {
+        if (div) div.innerHTML = '';
+    });
+
+    tasks.forEach(t => {
+        const el = document.createElement('div');
+
+        const rewardInfo = t.reward !== undefined && t.reward !== null
+            ? `<span class="lcars-reward">${t.reward} CR</span>`
+            : '';
+        const promptInfo = t.prompt
+            ? `<div class="lcars-task-prompt">„${t.prompt}"</div>`
+            : '<div class="lcars-task-prompt" style="opacity: 0.5;">(bez popisu)</div>';
+
+        if (t.status === 'pending_approval') {
+            el.className = "lcars-task-card lcars-task-pending";
+            el.innerHTML = `
+                <div class="lcars-task-id">ŽÁDOST #${t.id} • UŽIVATEL ${t.user_id}</div>
+                ${promptInfo}
+                <div class="lcars-task-meta">
+                    ${rewardInfo}
+                </div>
+                <div style="margin-top: 0.75rem; display: grid; grid-template-columns: 1fr 1fr; gap: 0.5rem;">
+                    <div>
+                        <label style="font-size: 0.65rem; color: var(--lcars-paleblue); display: block; margin-bottom: 0.25rem;">ODMĚNA</label>
+                        <input type="number" value="${t.reward || ''}" placeholder="${t.reward || 0}" class="lcars-input" id="rew-${t.id}">
                     </div>
-                `;
-                if (submitDiv) submitDiv.appendChild(el);
-            } else if (t.status === 'paid') {
-                el.className = "lcars-task-card lcars-task-paid";
-                el.innerHTML = `
-                    <div class="lcars-task-id">HOTOVO #${t.id} • UŽIVATEL ${t.user_id}</div>
-                    ${promptInfo}
-                    ${t.submission ? `<div class="lcars-task-submission">${t.submission}</div>` : ''}
-                    <div class="lcars-task-meta">
-                        <span style="font-size: 0.7rem; color: var(--lcars-skyblue);">HODNOCENÍ: ${t.rating || 0}%</span>
-                        ${rewardInfo}
+                    <div>
+                        <label style="font-size: 0.65rem; color: var(--lcars-paleblue); display: block; margin-bottom: 0.25rem;">ZADÁNÍ</label>
+                        <textarea rows="2" class="lcars-textarea" id="prompt-${t.id}">${t.prompt || ''}</textarea>
                     </div>
-                `;
-                if (paidDiv) paidDiv.appendChild(el);
-            }
-        });
+                </div>
+                <div style="margin-top: 0.75rem; display: flex; justify-content: flex-end;">
+                    <button class="lcars-btn lcars-btn-approve" onclick="approveTask(${t.id})">SCHVÁLIT</button>
+                </div>
+            `;
+            if (pendingDiv) pendingDiv.appendChild(el);
+        } else if (t.status === 'active') {
+            el.className = "lcars-task-card lcars-task-active";
+            el.innerHTML = `
+                <div class="lcars-task-id">AKTIVNÍ #${t.id} • UŽIVATEL ${t.user_id}</div>
+                ${promptInfo}
+                <div class="lcars-task-meta">
+                    ${rewardInfo}
+                    <span style="font-size: 0.65rem; color: var(--lcars-paleblue);">ČEKÁ NA ODEVZDÁNÍ</span>
+                </div>
+            `;
+            if (activeDiv) activeDiv.appendChild(el);
+        } else if (t.status === 'submitted') {
+            el.className = "lcars-task-card lcars-task-submitted";
+            el.onclick = () => openGradingModal(t);
+
+            el.innerHTML = `
+                <div style="display: flex; justify-content: space-between; align-items: flex-start;">
+                    <div class="lcars-task-id">ODEVZDÁNO #${t.id} • UŽIVATEL ${t.user_id}</div>
+                    <span class="lcars-click-hint">🔍 HODNOTIT</span>
+                </div>
+                ${promptInfo}
+                <div class="lcars-task-submission">${(t.submission || '(prázdné)').substring(0, 150)}${t.submission && t.submission.length > 150 ? '...' : ''}</div>
+                <div class="lcars-task-meta">
+                    <span style="font-size: 0.7rem; color: var(--lcars-skyblue);">${t.suggested_rating !== null && t.suggested_rating !== undefined ? `NÁVRH: ${t.suggested_rating}%` : 'NÁVRH: —'}</span>
+                    ${rewardInfo}
+                </div>
+            `;
+            if (submitDiv) submitDiv.appendChild(el);
+        } else if (t.status === 'paid') {
+            el.className = "lcars-task-card lcars-task-paid";
+            el.innerHTML = `
+                <div class="lcars-task-id">HOTOVO #${t.id} • UŽIVATEL ${t.user_id}</div>
+                ${promptInfo}
+                ${t.submission ? `<div class="lcars-task-submission">${t.submission}</div>` : ''}
+                <div class="lcars-task-meta">
+                    <span style="font-size: 0.7rem; color: var(--lcars-skyblue);">HODNOCENÍ: ${t.rating || 0}%</span>
+                    ${rewardInfo}
+                </div>
+            `;
+            if (paidDiv) paidDiv.appendChild(el);
+        }
+    });
+}
 
-    } catch (e) { console.error('Task fetch fail', e); }
+// Approves every pending request at once (default rewards, pre-generated descriptions)
+window.approveAllTasks = async function () {
+    const btn = document.getElementById('btnApproveAllTasks');
+    if (btn) btn.disabled = true;
+    try {
+        await fetch('/api/admin/tasks/approve_all', {
+            method: 'POST',
+            headers: { 'Authorization': `Bearer ${getAuthToken()}` }
+        });
+    } catch (e) {
+        console.error('Approve all failed', e);
+    } finally {
+        if (btn) btn.disabled = false;
+    }
 };
 
 window.approveTask = async function (id) {
@@ -1049,6 +1114,11 @@ window.openGradingModal = function (task) {
     document.getElementById('gradeTaskSubmission').textContent = task.submission || '(Prázdná odpověď)';
     document.getElementById('gradeUsername').textContent = `User ${task.user_id}`;
     document.getElementById('gradeReward').textContent = task.reward || '0';
+    const suggestedEl = document.getElementById('gradeSuggested');
+    if (suggestedEl) {
+        suggestedEl.textContent = task.suggested_rating !== null && task.suggested_rating !== undefined
+            ? `${task.suggested_rating}%` : '-';
+    }
 
     document.getElementById('gradingModal').classList.remove('hidden');
 };
@@ -1111,7 +1181,10 @@ function initWebSocket() {
     const wsUrl = `${protocol}//${window.location.host}/ws/connect`;
 
     if (typeof SocketClient !== 'undefined') {
-        const client = new SocketClient(wsUrl, handleMessage);
+        const client = new SocketClient(wsUrl, handleMessage, (status) => {
+            // Subscriptions live on the connection: renew after every (re)connect
+            if (status === 'connected') updateSubscription(true);
+        });
         client.connect(wsToken);
         window.socket = {
             send: (data) => client.send(JSON.parse(data))
@@ -1121,19 +1194,50 @@ function initWebSocket() {
     }
 }
 
+// --- LIVE SESSION SUBSCRIPTION ---
+// The server sends chat/HYPER traffic only for the sessions this tab displays (monitor grids)
+let activeSubscription = null;
+
+function monitoredSessions() {
+    const visible = window.currentView === 'monitor' && (window.currentTab === 'all' || window.currentTab === 'chats');
+    return visible ? Array.from({ length: TOTAL_SESSIONS }, (_, i) => i + 1) : [];
+}
+
+function updateSubscription(force) {
+    if (!window.socket) return;
+    const sessions = monitoredSessions();
+    const key = sessions.join(',');
+    if (!force && key === activeSubscription) return;
+    activeSubscription = key;
+    window.socket.send(JSON.stringify({ type: 'subscribe', sessions: sessions, kinds: ['chat', 'hyper'] }));
+}
+
 function handleMessage(data) {
     // Handle translation updates (all pages)
-    if (data.type === 'translation_update' || data.type === 'language_change' || data.type === 'translations_reset') {
+    if (data.type === 'translation_update' || data.type === 'language_change' || data.type === 'translations_reset' || data.type === 'translations_changed') {
         if (window.translationManager) {
             window.translationManager.handleTranslationUpdate(data);
         }
         return;
     }
 
-    if (data.type === 'admin_refresh_tasks') {
-        if (window.currentView === 'tasks') {
-            refreshTasks();
-        }
+    // Subscribed session traffic: chat/HYPER frames as the session sees them (no type)
+    if (!data.type && data.session_id && data.content !== undefined) {
+        updateMonitorChat(data);
+        return;
+    }
+
+    if (data.type === 'admin_task_delta') {
+        applyTaskDelta(data.task);
+        return;
+    }
+
+    if (data.type === 'system_reset') {
+        // Tasks were deleted server-side; deltas do not cover deletion
+        taskCache.clear();
+        tasksLoaded = false;
+        tasksSyncedAt = null;
+        if (window.currentView === 'tasks') refreshTasks();
         return;
     }
 
@@ -1209,7 +1313,7 @@ function updateMonitorChat(msg) {
     const sessId = msg.session_id || 1;
     document.querySelectorAll(`.chat-box-${sessId}`).forEach(chatDiv => {
         const line = document.createElement('div');
-        line.innerText = `[${msg.sender}]: ${msg.content}`;
+        line.innerText = `[${msg.sender}${msg.is_hyper ? ' / HYPER' : ''}]: ${msg.content}`;
         line.className = "truncate hover:whitespace-normal bg-black mb-1 px-1";
         chatDiv.appendChild(line);
         chatDiv.scrollTop = chatDiv.scrollHeight;
@@ -162,12 +162,15 @@
     var wsUrl = (window.location.protocol === 'https:' ? 'wss://' : 'ws://') + window.location.host + '/ws/connect';
     var client = new SocketClient(wsUrl, handleMessage, function (status) {
         console.log("WS Status:", status);
+        if (status !== 'connected') mirror.handleDisconnect();
     });
+    var mirror = new TypingMirror(client, msgInput);
+    client.connectParams = function () { return mirror.connectParams(); };
     client.connect(token);
 
     function handleMessage(data) {
         // Translation system messages
-        if (data.type === 'translation_update' || data.type === 'language_change' || data.type === 'translations_reset') {
+        if (data.type === 'translation_update' || data.type === 'language_change' || data.type === 'translations_reset' || data.type === 'translations_changed') {
             if (window.translationManager) window.translationManager.handleTranslationUpdate(data);
             applyLocalizedText();
             return;
@@ -191,6 +194,10 @@
                 if (data.agent_window !== undefined) updateTimerLimitUI(data.agent_window);
                 break;
 
+            case 'session_switch':
+                switchSession(data);
+                break;
+
             case 'optimizing_start':
                 showOptimizingLoader();
                 break;
@@ -200,9 +207,15 @@
                 break;
 
             case 'typing_sync':
-                if (data.tabId !== tabId) {
-                    if (msgInput.value !== data.content) msgInput.value = data.content;
-                }
+                if (data.tabId !== tabId) mirror.receive(data);
+                break;
+
+            case 'protocol':
+                mirror.handleProtocol(data);
+                break;
+
+            case 'typing_resync':
+                mirror.resync();
                 break;
 
             case 'system_alert':
@@ -250,6 +263,24 @@
         }
     }
 
+    // Shift change: new session without reconnecting, history = its recent messages
+    function switchSession(data) {
+        currentSessionId = data.session_id;
+        sessionIdDisplay.innerText = "S" + data.session_id;
+        if (data.shift !== undefined) document.getElementById('shiftDisplay').innerText = data.shift;
+        if (data.hyper_mode) applyHyperVisibility(data.hyper_mode);
+        chatHistory.innerHTML = '';
+        showTypingIndicator(false);
+        stopTimer();
+        document.getElementById('lockOverlay').classList.add('hidden');
+        msgInput.disabled = false;
+        var history = data.history || [];
+        history.forEach(appendMessage);
+        // The user is still waiting for an answer in the new session
+        var last = history[history.length - 1];
+        if (last && last.role === 'user') startTimer();
+    }
+
     // =====================
     // INPUT HANDLING
     // =====================
@@ -257,7 +288,7 @@
 
     msgInput.addEventListener('input', function (e) {
         // Sync across tabs
-        client.send({ type: 'typing_sync', content: e.target.value, tabId: tabId });
+        mirror.send(e.target.value);
 
         // Typing indicator to user
         if (!typingTimeout) {
@@ -280,7 +311,7 @@
         if (!text) return;
 
         client.send({ content: text });
-        client.send({ type: 'typing_sync', content: "", tabId: tabId });
+        mirror.send("");
         appendMessage({ sender: currentUsername, role: 'agent', content: text });
         msgInput.value = '';
         if (window.sfx) sfx.playSend();
@@ -346,22 +377,39 @@
         var loader = document.getElementById('optimizingLoader');
         if (loader) loader.remove();
 
+        var existing = document.getElementById('optimizerConfirmBox');
+        if (data.updated) {
+            // Late rewrite: only replaces a fallback preview the agent has not acted on yet
+            if (!existing || existing.dataset.optimized !== 'false') return;
+            existing.remove();
+        } else if (existing) {
+            existing.remove();
+        }
+
+        // optimized=false: the optimizer missed its deadline, the original text is offered
+        var optimized = data.optimized !== false;
+
         var div = document.createElement('div');
         div.id = 'optimizerConfirmBox';
+        div.dataset.optimized = optimized ? 'true' : 'false';
         div.className = 'border border-pink-500 bg-black p-2 text-xs mb-2';
 
         var header = document.createElement('div');
         header.className = 'text-pink-300 font-bold mb-1 text-[10px]';
-        header.textContent = t('agent_terminal.optimization_complete', 'OPTIMALIZACE DOKONČENA');
+        header.textContent = optimized
+            ? t('agent_terminal.optimization_complete', 'OPTIMALIZACE DOKONČENA')
+            : t('agent_terminal.optimization_pending', 'OPTIMALIZACE NESTIHLA - LZE ODESLAT ORIGINÁL');
         div.appendChild(header);
 
-        var orig = document.createElement('div');
-        orig.className = 'mb-1 text-gray-500 line-through text-[9px]';
-        orig.textContent = data.original;
-        div.appendChild(orig);
+        if (optimized) {
+            var orig = document.createElement('div');
+            orig.className = 'mb-1 text-gray-500 line-through text-[9px]';
+            orig.textContent = data.original;
+            div.appendChild(orig);
+        }
 
         var rewritten = document.createElement('div');
-        rewritten.className = 'mb-2 text-green-400 font-bold text-sm';
+        rewritten.className = optimized ? 'mb-2 text-green-400 font-bold text-sm' : 'mb-2 text-gray-300 text-sm';
         rewritten.textContent = data.rewritten;
         div.appendChild(rewritten);
 
@@ -373,7 +421,7 @@
         confirmBtn.textContent = '[ POTVRDIT ]';
         confirmBtn.onclick = function () {
             div.remove();
-            client.send({ content: data.rewritten, confirm_opt: true });
+            client.send({ content: data.rewritten, confirm_opt: true, optimized: optimized });
             msgInput.disabled = false;
             msgInput.placeholder = t('agent_terminal.message_placeholder', 'Vložte odpověď...');
             msgInput.focus();
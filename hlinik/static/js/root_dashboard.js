@@ -101,7 +101,7 @@
         logEvent(data.type);
 
         // Handle translation updates
-        if (data.type === 'translation_update' || data.type === 'language_change' || data.type === 'translations_reset') {
+        if (data.type === 'translation_update' || data.type === 'language_change' || data.type === 'translations_reset' || data.type === 'translations_changed') {
             if (window.translationManager) {
                 window.translationManager.handleTranslationUpdate(data);
             }
@@ -554,10 +554,17 @@
 
     // --- ECONOMY TABLE ---
     async function fetchUsers() {
-        const res = await fetch('/api/admin/data/users', {
-            headers: { 'Authorization': `Bearer ${token}` }
-        });
-        return await res.json();
+        const users = [];
+        let cursor = null;
+        do {
+            const res = await fetch(`/api/admin/data/users${cursor === null ? '' : `?cursor=${cursor}`}`, {
+                headers: { 'Authorization': `Bearer ${token}` }
+            });
+            const page = await res.json();
+            users.push(...page.users);
+            cursor = page.next_cursor;
+        } while (cursor !== null && cursor !== undefined);
+        return users;
     }
 
     async function refreshEconomy() {
@@ -1,3 +1,90 @@
+/**
+ * Dekodér kompaktních binárních rámců (MessagePack, viz app/logic/wire.py).
+ * Tabulky klíčů a typů posílá server v rámci {type: 'protocol', encoding: 'msgpack'}.
+ */
+class WireDecoder {
+    constructor(keys, types) {
+        this.keys = keys;
+        this.types = types;
+        this.text = new TextDecoder();
+    }
+
+    decode(buffer) {
+        this.view = new DataView(buffer);
+        this.bytes = new Uint8Array(buffer);
+        this.pos = 0;
+        const data = this.expand(this.read());
+        if (data && typeof data.type === 'number') data.type = this.types[data.type];
+        return data;
+    }
+
+    expand(value) {
+        if (Array.isArray(value)) return value.map(v => this.expand(v));
+        if (value instanceof Map) {
+            const obj = {};
+            for (const [k, v] of value) obj[typeof k === 'number' ? this.keys[k] : k] = this.expand(v);
+            return obj;
+        }
+        return value;
+    }
+
+    read() {
+        const tag = this.bytes[this.pos++];
+        if (tag < 0x80) return tag;
+        if (tag >= 0xe0) return tag - 0x100;
+        if (tag >= 0xa0 && tag <= 0xbf) return this.str(tag & 0x1f);
+        if (tag >= 0x90 && tag <= 0x9f) return this.array(tag & 0x0f);
+        if (tag >= 0x80 && tag <= 0x8f) return this.map(tag & 0x0f);
+        const v = this.view;
+        let p = this.pos;
+        switch (tag) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xca: this.pos += 4; return v.getFloat32(p);
+            case 0xcb: this.pos += 8; return v.getFloat64(p);
+            case 0xcc: this.pos += 1; return v.getUint8(p);
+            case 0xcd: this.pos += 2; return v.getUint16(p);
+            case 0xce: this.pos += 4; return v.getUint32(p);
+            case 0xcf: this.pos += 8; return Number(v.getBigUint64(p));
+            case 0xd0: this.pos += 1; return v.getInt8(p);
+            case 0xd1: this.pos += 2; return v.getInt16(p);
+            case 0xd2: this.pos += 4; return v.getInt32(p);
+            case 0xd3: this.pos += 8; return Number(v.getBigInt64(p));
+            case 0xd9: this.pos += 1; return this.str(v.getUint8(p));
+            case 0xda: this.pos += 2; return this.str(v.getUint16(p));
+            case 0xdb: this.pos += 4; return this.str(v.getUint32(p));
+            case 0xdc: this.pos += 2; return this.array(v.getUint16(p));
+            case 0xdd: this.pos += 4; return this.array(v.getUint32(p));
+            case 0xde: this.pos += 2; return this.map(v.getUint16(p));
+            case 0xdf: this.pos += 4; return this.map(v.getUint32(p));
+        }
+        throw new Error('Neznámý MessagePack tag 0x' + tag.toString(16));
+    }
+
+    str(n) {
+        const s = this.text.decode(this.bytes.subarray(this.pos, this.pos + n));
+        this.pos += n;
+        return s;
+    }
+
+    array(n) {
+        const items = new Array(n);
+        for (let i = 0; i < n; i++) items[i] = this.read();
+        return items;
+    }
+
+    map(n) {
+        // Map: klíče mohou být čísla (kódy z tabulky) i řetězce
+        const m = new Map();
+        for (let i = 0; i < n; i++) {
+            const k = this.read();
+            m.set(k, this.read());
+        }
+        return m;
+    }
+}
+
 class SocketClient {
     constructor(url, onMessage, onStatusChange) {
         this.url = url;
@@ -10,6 +97,9 @@ class SocketClient {
         this.pingInterval = null;
         this.pongTimeout = null;
         this.isExplicitlyClosed = false;
+        this.connectParams = null; // () => ({key: value}) appended to the WS URL
+        this.encoding = 'msgpack'; // kompaktní binární rámce; null = jen JSON
+        this.decoder = null;
 
         // Reconnect s exponential backoff
         this.reconnectAttempts = 0;
@@ -20,10 +110,19 @@ class SocketClient {
     connect(token) {
         this.token = token;
         this.isExplicitlyClosed = false;
-        const wsUrl = `${this.url}?token=${token}`;
+        let wsUrl = `${this.url}?token=${token}`;
+        if (this.encoding) wsUrl += `&encoding=${this.encoding}`;
+        // Optional extra query params, re-evaluated on every reconnect (e.g. cached labels version)
+        if (this.connectParams) {
+            for (const [key, value] of Object.entries(this.connectParams())) {
+                if (value !== null && value !== undefined) wsUrl += `&${key}=${encodeURIComponent(value)}`;
+            }
+        }
 
         try {
             this.ws = new WebSocket(wsUrl);
+            this.ws.binaryType = 'arraybuffer';
+            this.decoder = null;
         } catch (e) {
             console.error("WS: Nelze vytvořit spojení", e);
             this.scheduleReconnect();
@@ -39,7 +138,11 @@ class SocketClient {
 
         this.ws.onmessage = (event) => {
             try {
-                const data = JSON.parse(event.data);
+                // Binární rámce jen po potvrzení kódování serverem (starý server posílá JSON)
+                const data = typeof event.data === 'string' ? JSON.parse(event.data) : this.decoder.decode(event.data);
+                if (data.type === 'protocol' && data.encoding === 'msgpack') {
+                    this.decoder = new WireDecoder(data.keys, data.types);
+                }
                 if (data.type === 'pong') {
                     this.handlePong();
                     return;
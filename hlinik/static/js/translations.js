@@ -37,6 +37,7 @@ class TranslationManager {
             this.translations = data.translations || {};
             this.customLabels = data.custom_labels || {};
             this.languageMode = data.language_mode || 'cz';
+            this.version = data.version || null;
             this.initialized = true;
             
             // Apply translations to UI
@@ -83,6 +84,10 @@ class TranslationManager {
      * Navigate nested object using dot-separated path
      */
     getNestedValue(keyPath) {
+        // Compiled bundles are flat: {"login.username_label": "..."}
+        const flat = this.translations[keyPath];
+        if (typeof flat === 'string') return flat;
+
         const keys = keyPath.split('.');
         let current = this.translations;
         
@@ -214,6 +219,9 @@ class TranslationManager {
             this.languageMode = data.language_mode;
             // Reload translations for new language
             this.init();
+        } else if (data.type === 'translations_changed') {
+            // A translation file was edited; revalidate the bundle (ETag)
+            this.init();
         } else if (data.type === 'translations_reset') {
             this.customLabels = {};
             this.updateAllLabels();
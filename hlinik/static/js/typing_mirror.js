@@ -0,0 +1,123 @@
+/**
+ * TypingMirror — zrcadlení rozepsané zprávy mezi taby (typing_sync)
+ * Vyžaduje: socket_client.js
+ *
+ * Klient se připojuje s parametrem typing=diff. Po potvrzení serverem
+ * ({type: 'protocol', typing_sync: 'diff'}) posílá místo celého textu jen
+ * změny [pozice, smazat, vložit] s pořadovým číslem (seq) a každých
+ * CHECKPOINT_EVERY rámců celý text. Starý server potvrzení nepošle, takže
+ * se dál posílá celý obsah.
+ *
+ * Příjem: rámce bez `src` nesou celý text (starý formát). Rámce se `src`
+ * tvoří proud; při výpadku seq si klient vyžádá checkpoint (typing_resync).
+ * Pozice se počítají v Unicode znacích (stejně jako na serveru).
+ */
+class TypingMirror {
+    constructor(client, input) {
+        this.client = client;
+        this.input = input;
+        this.diff = false;
+        this.seq = 0;
+        this.lastSent = null;
+        this.sinceCheckpoint = 0;
+        this.streams = {}; // src -> { seq, text } (null text = čeká na checkpoint)
+    }
+
+    static get CHECKPOINT_EVERY() { return 20; }
+
+    connectParams() {
+        return { typing: 'diff' };
+    }
+
+    // Potvrzení protokolu serverem (po každém připojení)
+    handleProtocol(data) {
+        this.diff = data.typing_sync === 'diff';
+        this.seq = 0;
+        this.lastSent = null;
+        this.streams = {};
+    }
+
+    // Spojení spadlo: nový server nemusí diff podporovat
+    handleDisconnect() {
+        this.diff = false;
+    }
+
+    static diffOps(oldText, newText) {
+        const a = Array.from(oldText), b = Array.from(newText);
+        const limit = Math.min(a.length, b.length);
+        let start = 0;
+        while (start < limit && a[start] === b[start]) start++;
+        let end = 0;
+        while (end < limit - start && a[a.length - 1 - end] === b[b.length - 1 - end]) end++;
+        if (start === a.length && start === b.length) return [];
+        return [[start, a.length - start - end, b.slice(start, b.length - end).join('')]];
+    }
+
+    static applyOps(text, ops) {
+        let chars = Array.from(text);
+        for (const [at, del, ins] of ops) {
+            if (at < 0 || del < 0 || at + del > chars.length) return null;
+            chars.splice(at, del, ...Array.from(ins));
+        }
+        return chars.join('');
+    }
+
+    send(text) {
+        if (!this.diff) {
+            this.client.send({ type: 'typing_sync', content: text });
+            return;
+        }
+        this.seq++;
+        let ops = null;
+        if (this.lastSent !== null && this.sinceCheckpoint < TypingMirror.CHECKPOINT_EVERY) {
+            ops = TypingMirror.diffOps(this.lastSent, text);
+            const size = ops.reduce((sum, op) => sum + op[2].length + 8, 0);
+            if (size >= text.length) ops = null;
+        }
+        if (ops) {
+            this.client.send({ type: 'typing_sync', seq: this.seq, ops: ops });
+            this.sinceCheckpoint++;
+        } else {
+            this.client.send({ type: 'typing_sync', seq: this.seq, content: text });
+            this.sinceCheckpoint = 0;
+        }
+        this.lastSent = text;
+    }
+
+    // Server zahodil náš rámec (výpadek seq) a chce celý text
+    resync() {
+        this.lastSent = null;
+        this.send(this.input.value);
+    }
+
+    receive(data) {
+        if (data.src === undefined) {
+            this.apply(data.content || '');
+            return;
+        }
+        const stream = this.streams[data.src];
+        if (data.checkpoint) {
+            this.streams[data.src] = { seq: data.seq, text: data.content || '' };
+            this.apply(data.content || '');
+            return;
+        }
+        if (stream && stream.text !== null && data.seq === stream.seq + 1) {
+            const text = TypingMirror.applyOps(stream.text, data.ops || []);
+            if (text !== null) {
+                stream.seq = data.seq;
+                stream.text = text;
+                this.apply(text);
+                return;
+            }
+        }
+        // Chybí předchozí rámec: požádat jednou o checkpoint
+        if (!stream || stream.text !== null) {
+            this.streams[data.src] = { seq: data.seq, text: null };
+            this.client.send({ type: 'typing_resync', src: data.src });
+        }
+    }
+
+    apply(text) {
+        if (this.input.value !== text) this.input.value = text;
+    }
+}
@@ -31,9 +31,20 @@
     // === WEBSOCKET ===
     const wsUrl = (window.location.protocol === 'https:' ? 'wss://' : 'ws://') + window.location.host + '/ws/connect';
 
+    // Admin labels are cached locally; the server skips the payload when our version is current
+    const LABELS_CACHE_KEY = 'iris_labels';
+    let labelsCache = { version: null, labels: {} };
+    try {
+        labelsCache = JSON.parse(localStorage.getItem(LABELS_CACHE_KEY)) || labelsCache;
+    } catch (e) { /* corrupted cache */ }
+
     const client = new SocketClient(wsUrl, handleMessage, (status) => {
         console.log("WS Status:", status);
+        if (status !== 'connected') mirror.handleDisconnect();
     });
+    const mirror = new TypingMirror(client, msgInput);
+    client.connectParams = () => Object.assign({ labels_version: labelsCache.version }, mirror.connectParams());
+    applyLabels(labelsCache.labels);
     client.connect(token);
 
     // Exposovat pro HTML onclick handlery
@@ -44,22 +55,38 @@
     window.toggleVolume = toggleVolume;
     window.updateVolume = updateVolume;
 
+    function applyLabels(labels) {
+        for (const [key, value] of Object.entries(labels || {})) {
+            if (value === null) continue;
+            document.querySelectorAll('.editable-label[data-key="' + key + '"]').forEach(el => {
+                if (el.tagName === 'INPUT' || el.tagName === 'TEXTAREA') el.value = value;
+                else el.innerText = value;
+            });
+        }
+    }
+
     // === MESSAGE HANDLER ===
     function handleMessage(data) {
-        if (data.type === 'translation_update' || data.type === 'language_change' || data.type === 'translations_reset') {
+        if (data.type === 'translation_update' || data.type === 'language_change' || data.type === 'translations_reset' || data.type === 'translations_changed') {
             if (window.translationManager) window.translationManager.handleTranslationUpdate(data);
             return;
         }
 
         if (data.type === 'labels_update') {
             if (data.labels) {
-                for (const [key, value] of Object.entries(data.labels)) {
-                    document.querySelectorAll('.editable-label[data-key="' + key + '"]').forEach(el => {
-                        if (el.tagName === 'INPUT' || el.tagName === 'TEXTAREA') el.value = value;
-                        else el.innerText = value;
-                    });
+                // Full set (connect with outdated cache)
+                labelsCache = { version: data.version, labels: data.labels };
+                applyLabels(data.labels);
+            } else if (data.changes) {
+                // Only the keys the admin changed; null = label removed
+                for (const [key, value] of Object.entries(data.changes)) {
+                    if (value === null) delete labelsCache.labels[key];
+                    else labelsCache.labels[key] = value;
                 }
+                labelsCache.version = data.version;
+                applyLabels(data.changes);
             }
+            try { localStorage.setItem(LABELS_CACHE_KEY, JSON.stringify(labelsCache)); } catch (e) { /* quota */ }
             return;
         }
 
@@ -96,6 +123,9 @@
             case 'system_alert': showSystemAlert(data.content); break;
             case 'typing_start': showTypingIndicator(true); break;
             case 'typing_stop': showTypingIndicator(false); break;
+            case 'typing_sync': mirror.receive(data); break;
+            case 'protocol': mirror.handleProtocol(data); break;
+            case 'typing_resync': mirror.resync(); break;
             default:
                 showTypingIndicator(false);
                 appendMessage(data);
@@ -282,6 +312,7 @@
         var text = msgInput.value.trim();
         if (text) {
             client.send({ content: text });
+            mirror.send('');
             appendMessage({ sender: config.username, role: 'user', content: text });
             showAgentRespondingIndicator('ČEKÁNÍ NA ODPOVĚĎ', true);
             msgInput.value = '';
@@ -406,7 +437,7 @@
     // === TYPING ===
     var typingTimeout = null;
     msgInput.addEventListener('input', function() {
-        client.send({ type: 'typing_sync', content: msgInput.value });
+        mirror.send(msgInput.value);
         if (!typingTimeout) client.send({ type: 'typing_start' });
         clearTimeout(typingTimeout);
         typingTimeout = setTimeout(function() {
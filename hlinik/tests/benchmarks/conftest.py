@@ -0,0 +1,84 @@
+import asyncio
+import json
+import pytest
+
+from app.config import BASE_DIR
+from app.database import UserRole
+from app.logic.gamestate import gamestate
+from app.logic.routing import routing_logic
+
+LORE_DATA_DIR = BASE_DIR.parent / "lore-web" / "data"
+
+
+class FakeSocket:
+    """Minimal WebSocket stand-in that only counts frames (no memory growth)."""
+    def __init__(self):
+        self.frames = 0
+        self.bytes_sent = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        self.frames += 1
+        self.bytes_sent += len(message)
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def crowded_routing(loop):
+    """
+    ConnectionManager with every session populated: each user and agent
+    has several open tabs, similar to a busy game night.
+    """
+    tabs_per_player = 4
+    routing_logic.user_connections = {}
+    routing_logic.agent_connections = {}
+    routing_logic.user_logical_ids = {}
+    routing_logic.agent_logical_ids = {}
+    routing_logic.admin_connections = []
+    gamestate.set_shift(3)
+
+    sockets = []
+    for i in range(1, 9):
+        for _ in range(tabs_per_player):
+            ws_user = FakeSocket()
+            ws_agent = FakeSocket()
+            loop.run_until_complete(routing_logic.connect(ws_user, UserRole.USER, 100 + i, logical_id=i))
+            loop.run_until_complete(routing_logic.connect(ws_agent, UserRole.AGENT, 200 + i, logical_id=i))
+            sockets.extend([ws_user, ws_agent])
+    for _ in range(4):
+        ws_admin = FakeSocket()
+        loop.run_until_complete(routing_logic.connect(ws_admin, UserRole.ADMIN, 1))
+        sockets.append(ws_admin)
+
+    yield sockets
+
+    routing_logic.user_connections = {}
+    routing_logic.agent_connections = {}
+    routing_logic.user_logical_ids = {}
+    routing_logic.agent_logical_ids = {}
+    routing_logic.admin_connections = []
+    gamestate.set_shift(0)
+
+
+@pytest.fixture(scope="session")
+def lore_records():
+    """All records of the editable lore files, keyed by file key."""
+    from app.routers.lore_editor_api import EDITABLE_FILES
+
+    records = {}
+    for file_key, config in EDITABLE_FILES.items():
+        path = LORE_DATA_DIR / config["file"]
+        if not path.exists():
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        records[file_key] = data.get(config["key"], []) if config["key"] else [data]
+    return records
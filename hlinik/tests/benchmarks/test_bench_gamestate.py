@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.logic.gamestate import gamestate
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    gamestate.reset_state()
+    yield
+    gamestate.reset_state()
+
+
+def test_bench_process_tick(benchmark):
+    benchmark(gamestate.process_tick)
+
+
+def test_bench_calc_load(benchmark):
+    benchmark(gamestate.calc_load, active_terminals=8, active_autopilots=3, low_latency_active=True)
+
+
+def test_bench_check_overload(benchmark):
+    gamestate.temperature = gamestate.TEMP_THRESHOLD + 10
+    benchmark(gamestate.check_overload)
+
+
+def test_bench_full_tick(benchmark):
+    """One game_loop iteration worth of GameState work."""
+    def tick():
+        gamestate.process_tick()
+        gamestate.calc_load(active_terminals=8, active_autopilots=3, low_latency_active=False)
+        return gamestate.check_overload()
+
+    benchmark(tick)
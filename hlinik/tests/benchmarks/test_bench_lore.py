@@ -0,0 +1,17 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.routers.lore_editor_api import _search_dict_for_value
+
+
+def test_bench_search_dict_for_value(benchmark, lore_records):
+    def search_all():
+        found = 0
+        for records in lore_records.values():
+            for record in records:
+                found += len(_search_dict_for_value(record, "U01"))
+        return found
+
+    found = benchmark(search_all)
+    assert found >= 0
@@ -0,0 +1,92 @@
+import json
+import zlib
+
+import pytest
+
+from app.logic import wire
+
+pytest.importorskip("pytest_benchmark")
+
+# Representative frames as they are produced by game_loop and the services
+TYPICAL_PAYLOADS = {
+    "gamestate_update": {
+        "type": "gamestate_update",
+        "temperature": 142.5,
+        "shift": 3,
+        "power_load": 85.0,
+        "power_capacity": 100,
+        "treasury": 1250,
+        "is_overloaded": False,
+        "agent_window": 120,
+        "hyper_mode": "normal"
+    },
+    "chat_message": {
+        "sender": "user3",
+        "role": "user",
+        "content": "Dobrý den, potřebuji pomoc s úkolem, který mi systém přidělil včera večer.",
+        "session_id": 3,
+        "id": 4821,
+        "is_optimized": False,
+        "panic": False
+    },
+    "typing_sync": {
+        "type": "typing_sync",
+        "sender": "agent5",
+        "content": "Vážený uživateli, Vaše žádost byla zaevidována a bude zpracována v"
+    },
+    "task_list": [
+        {
+            "id": i,
+            "user_id": 10 + (i % 8),
+            "prompt": "Proveďte analýzu aktuálního stavu systému a navrhněte zlepšení.",
+            "status": "active",
+            "reward": 125,
+            "submission": None,
+            "rating": 0
+        }
+        for i in range(1, 41)
+    ],
+}
+
+
+@pytest.mark.parametrize("payload_name", sorted(TYPICAL_PAYLOADS))
+def test_bench_json_encode(benchmark, payload_name):
+    payload = TYPICAL_PAYLOADS[payload_name]
+    encoded = benchmark(json.dumps, payload)
+    benchmark.extra_info["bytes"] = len(encoded.encode("utf-8"))
+
+
+def _deflated_size(data: bytes) -> int:
+    # permessage-deflate: raw deflate, sync flush, trailing 00 00 ff ff stripped (RFC 7692)
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return len(compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)) - 4
+
+
+def wire_sizes(payload) -> dict:
+    """Bytes on the wire per encoding, with and without per-message deflate."""
+    text = json.dumps(payload).encode("utf-8")
+    compact = wire.encode(payload)
+    return {
+        "json_bytes": len(text),
+        "compact_bytes": len(compact),
+        "json_deflate_bytes": _deflated_size(text),
+        "compact_deflate_bytes": _deflated_size(compact),
+    }
+
+
+@pytest.mark.parametrize("payload_name", sorted(TYPICAL_PAYLOADS))
+def test_bench_compact_encode(benchmark, payload_name):
+    payload = TYPICAL_PAYLOADS[payload_name]
+    encoded = benchmark(wire.encode, payload)
+    assert wire.decode(encoded) == payload
+    benchmark.extra_info["bytes"] = len(encoded)
+    benchmark.extra_info.update(wire_sizes(payload))
+
+
+if __name__ == "__main__":
+    # Byte-count comparison printed by ./run_benchmarks.sh
+    columns = ("json_bytes", "compact_bytes", "json_deflate_bytes", "compact_deflate_bytes")
+    print(f"{'frame':<18}" + "".join(f"{c:>23}" for c in columns))
+    for name in sorted(TYPICAL_PAYLOADS):
+        sizes = wire_sizes(TYPICAL_PAYLOADS[name])
+        print(f"{name:<18}" + "".join(f"{sizes[c]:>23}" for c in columns))
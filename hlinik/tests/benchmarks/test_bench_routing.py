@@ -0,0 +1,37 @@
+import json
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.logic.routing import routing_logic
+
+CHAT_FRAME = json.dumps({
+    "sender": "agent4",
+    "role": "agent",
+    "content": "Děkujeme za Váš dotaz. Systém IRIS pracuje na optimální kvantové efektivitě.",
+    "session_id": 7,
+    "id": 1234,
+    "is_optimized": False,
+    "panic": False
+})
+
+
+def test_bench_broadcast_to_session(benchmark, loop, crowded_routing):
+    def run():
+        loop.run_until_complete(routing_logic.broadcast_to_session(7, CHAT_FRAME))
+
+    benchmark(run)
+    assert sum(ws.frames for ws in crowded_routing) > 0
+
+
+def test_bench_broadcast_to_all_sessions(benchmark, loop, crowded_routing):
+    async def fan_out():
+        for session_id in range(1, 9):
+            await routing_logic.broadcast_to_session(session_id, CHAT_FRAME)
+
+    benchmark(lambda: loop.run_until_complete(fan_out()))
+
+
+def test_bench_broadcast_global(benchmark, loop, crowded_routing):
+    frame = json.dumps({"type": "gamestate_update", "temperature": 123.5})
+    benchmark(lambda: loop.run_until_complete(routing_logic.broadcast_global(frame)))
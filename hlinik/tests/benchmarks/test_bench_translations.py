@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.translations import get_bundle, get_translation, load_translations, merge_translations
+
+KEYS = [
+    "login.username_label",
+    "user_terminal.credits",
+    "agent_terminal.session_id",
+    "admin_dashboard.hub_station_1",
+    "missing.key.path",
+]
+
+
+@pytest.mark.parametrize("language_mode", ["cz", "czech-iris", "en"])
+def test_bench_get_translation(benchmark, language_mode):
+    custom_labels = {"login.username_label": "ID"}
+
+    def lookup():
+        for key in KEYS:
+            get_translation(key, language_mode, custom_labels)
+
+    benchmark(lookup)
+
+
+def test_bench_merge_translations(benchmark):
+    czech = load_translations("czech")
+    iris = load_translations("iris")
+    merged = benchmark(merge_translations, czech, iris)
+    assert merged
+
+
+def test_bench_translation_bundle(benchmark):
+    """Cached bundle lookup done by GET /api/translations/ (no merge, no re-encode)."""
+    custom_labels = {"login.username_label": "ID"}
+    bundle = benchmark(get_bundle, "czech-iris", custom_labels)
+    benchmark.extra_info["bytes"] = len(bundle.body)
@@ -1,5 +1,6 @@
 import sys
 import os
+import json
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -27,3 +28,27 @@ def db(test_engine):
     yield session
     session.rollback()
     session.close()
+
+
+class FakeWebSocket:
+    """Stand-in for a connected socket; records every frame the server sends."""
+
+    def __init__(self):
+        self.sent = []           # Decoded JSON frames (text frames that are not JSON as they are)
+        self.sent_messages = []  # Raw text frames
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent_messages.append(text)
+        try:
+            self.sent.append(json.loads(text))
+        except ValueError:
+            self.sent.append(text)
+
+
+@pytest.fixture
+def fake_socket():
+    """Factory for FakeWebSocket: `ws = fake_socket()`."""
+    return FakeWebSocket
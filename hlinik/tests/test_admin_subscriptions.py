@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from app.database import User, UserRole
+from app.logic import routing
+from app.logic.gamestate import GameState
+from app.services.admin_service import AdminService
+
+INSTANCE = "admin-subscriptions-test"
+
+
+@pytest.fixture
+def manager():
+    manager = routing.get_routing(INSTANCE)
+    yield manager
+    routing._managers.pop(INSTANCE, None)
+    GameState._instances.pop(INSTANCE, None)
+
+
+async def test_admins_receive_only_subscribed_sessions(manager, fake_socket):
+    legacy, spy = fake_socket(), fake_socket()
+    await manager.connect(legacy, UserRole.ADMIN, 1)
+    await manager.connect(spy, UserRole.ADMIN, 2)
+    manager.subscribe_admin(spy, [3], ["chat"])
+
+    await manager.publish_to_admins(3, "chat", json.dumps({"content": "s3"}))
+    await manager.publish_to_admins(4, "chat", json.dumps({"content": "s4"}))
+    await manager.publish_to_admins(3, "hyper", json.dumps({"content": "hyper s3"}))
+
+    assert spy.sent == [{"content": "s3"}]
+    assert legacy.sent == [{"content": "hyper s3"}]  # Default: HYPER of all sessions
+
+    manager.disconnect(spy, UserRole.ADMIN, 2)
+    assert (3, "chat") not in manager.admin_index
+
+
+async def test_subscribe_command_validates_and_acknowledges(manager, fake_socket):
+    socket = fake_socket()
+    await manager.connect(socket, UserRole.ADMIN, 1)
+    admin = User(id=1, username="admin", role=UserRole.ADMIN, instance_id=INSTANCE)
+
+    await AdminService().handle_admin_command(None, admin, {
+        "type": "subscribe", "sessions": [2, 2, 99], "kinds": ["chat", "bogus"]
+    }, socket)
+
+    assert socket.sent == [{"type": "subscribed", "sessions": [2], "kinds": ["chat"]}]
+    assert manager.admin_subscriptions[socket] == [(2, "chat")]
@@ -0,0 +1,121 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.database import ChatLog, User, UserRole
+from app.logic import autopilot as autopilot_module
+from app.logic import routing
+from app.logic.autopilot import AutopilotWorkers
+from app.logic.gamestate import GameState, get_gamestate
+
+INSTANCE = "autopilot-test"
+
+
+@pytest.fixture
+def hyper(monkeypatch, test_engine):
+    Session = sessionmaker(bind=test_engine)
+    monkeypatch.setattr(autopilot_module, "SessionLocal", Session)
+    db = Session()
+    if not db.query(User).filter(User.username == f"{INSTANCE}_agent1").first():
+        db.add(User(username=f"{INSTANCE}_agent1", role=UserRole.AGENT, instance_id=INSTANCE))
+        db.commit()
+    db.close()
+
+    gamestate = get_gamestate(INSTANCE)
+    gamestate.active_autopilots[1] = True
+    prompts = []
+    delay = {"seconds": 0}
+
+    async def fake_generate(config, messages):
+        prompts.append([m["content"] for m in messages])
+        await asyncio.sleep(delay["seconds"])
+        return f"reply {len(prompts)}"
+
+    monkeypatch.setattr(autopilot_module.llm_service, "generate_response", fake_generate)
+    workers = AutopilotWorkers(debounce=0.02, max_wait=0.2)
+    yield workers, gamestate, prompts, delay, Session
+    workers.stop()
+    routing._managers.pop(INSTANCE, None)
+    GameState._instances.pop(INSTANCE, None)
+
+
+def _replies(Session):
+    db = Session()
+    try:
+        return [log.content for log in db.query(ChatLog).filter(ChatLog.instance_id == INSTANCE, ChatLog.is_hyper == True)]
+    finally:
+        db.query(ChatLog).filter(ChatLog.instance_id == INSTANCE).delete()
+        db.commit()
+        db.close()
+
+
+async def _idle(worker):
+    for _ in range(100):
+        if worker.idle:
+            return
+        await asyncio.sleep(0.02)
+
+
+async def test_burst_is_answered_in_one_turn(hyper):
+    workers, gamestate, prompts, delay, Session = hyper
+    for text in ("a", "b", "c"):
+        worker = workers.submit(INSTANCE, 1, text)
+    await _idle(worker)
+
+    assert prompts == [["a", "b", "c"]]
+    assert _replies(Session) == ["reply 1"]
+    assert gamestate.hyper_histories[1][-1] == {"role": "assistant", "content": "reply 1"}
+
+
+async def test_new_message_supersedes_generation(hyper):
+    workers, gamestate, prompts, delay, Session = hyper
+    delay["seconds"] = 0.2
+    worker = workers.submit(INSTANCE, 1, "first")
+    while not worker.generating:
+        await asyncio.sleep(0.01)
+    delay["seconds"] = 0
+    workers.submit(INSTANCE, 1, "second")
+    await _idle(worker)
+
+    assert prompts == [["first"], ["first", "second"]]
+    assert _replies(Session) == ["reply 2"]
+    assert worker.superseded == 1 and worker.turns == 1
+    assert [m["content"] for m in gamestate.hyper_histories[1]] == ["first", "second", "reply 2"]
+
+
+async def test_switching_autopilot_off_drops_the_turn(hyper):
+    workers, gamestate, prompts, delay, Session = hyper
+    delay["seconds"] = 0.2
+    worker = workers.submit(INSTANCE, 1, "hello")
+    while not worker.generating:
+        await asyncio.sleep(0.01)
+    gamestate.active_autopilots[1] = False
+    workers.cancel(INSTANCE, 1)
+    await _idle(worker)
+
+    assert _replies(Session) == []
+    assert worker.turns == 0 and 1 not in gamestate.hyper_histories
+
+
+async def test_reply_respects_hyper_visibility(hyper, monkeypatch):
+    workers, gamestate, prompts, delay, Session = hyper
+    from app.logic.gamestate import HyperVisibilityMode
+    gamestate.hyper_visibility_mode = HyperVisibilityMode.BLACKBOX
+    manager = routing.get_routing(INSTANCE)
+    sent = []
+
+    def record(kind):
+        async def send(*args, **kwargs):
+            sent.append((kind, json.loads(args[-1])))
+        return send
+
+    monkeypatch.setattr(manager, "broadcast_to_session", record("session"))
+    monkeypatch.setattr(manager, "broadcast_to_session_users", record("users"))
+    monkeypatch.setattr(manager, "publish_to_admins", record("admins"))
+    worker = workers.submit(INSTANCE, 1, "hi")
+    await _idle(worker)
+    _replies(Session)
+
+    assert [kind for kind, message in sent if message.get("is_hyper")] == ["users", "admins"]
@@ -0,0 +1,102 @@
+import pytest
+
+from app.logic.censor import RuleCensor, get_rule_censor, lore_names, DEFAULT_CENSOR_RULES
+from app.logic.gamestate import GameState, get_gamestate
+from app.services import chat_service as chat_module
+from app.services.admin_service import AdminService
+from app.services.chat_service import ChatService, PANIC_USER_FALLBACK
+
+INSTANCE = "censor-test"
+
+LORE_USERS = [
+    {"id": "U01", "type": "user", "obcanske_jmeno": "Jana Nováková"},
+    {"id": "S01", "type": "admin", "obcanske_jmeno": "Ing. Miloš Vrána"},
+]
+
+
+@pytest.fixture
+def censor():
+    return RuleCensor(DEFAULT_CENSOR_RULES, lore_names(LORE_USERS))
+
+
+@pytest.fixture
+def gamestate():
+    yield get_gamestate(INSTANCE)
+    GameState._instances.pop(INSTANCE, None)
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    calls = []
+
+    async def fake_generate(config, messages):
+        calls.append(messages[0]["content"])
+        return "LLM"
+
+    monkeypatch.setattr(chat_module.llm_service, "generate_response", fake_generate)
+    return calls
+
+
+def test_scrubs_pii_and_lore_names(censor):
+    verdict = censor.check("Napiš Janě Novákové na jana@example.cz nebo volej 777 123 456, ptej se na S01 a Vránu.")
+    assert verdict.decided
+    assert verdict.text == "Napiš Janě Subjekt na [ZAŠIFROVÁNO] nebo volej ███, ptej se na Správce a Správce."
+    assert verdict.hits == 5
+
+
+def test_blocked_phrases_are_replaced_case_insensitively(censor):
+    verdict = censor.check("Moje HESLO je tajné")
+    assert verdict.decided and verdict.text == "Moje [REDIGOVÁNO] je tajné"
+
+
+def test_escalation_in_text_or_context_is_undecided(censor):
+    assert not censor.check("Jsi člověk?").decided
+    assert not censor.check("Ano.", context="Kdo jsi ve skutečnosti?").decided
+    assert censor.check("Dobrý den").decided
+
+
+def test_compiled_censor_is_cached_per_rules_dict():
+    rules = dict(DEFAULT_CENSOR_RULES)
+    assert get_rule_censor(rules) is get_rule_censor(rules)
+    assert get_rule_censor(dict(rules)) is not get_rule_censor(rules)
+
+
+async def test_modes(gamestate, llm_calls):
+    service = ChatService()
+    gamestate.set_censor_mode(None, "hybrid")
+    assert await service._censor(gamestate, 1, "heslo 1234", "heslo 1234", PANIC_USER_FALLBACK) == "[REDIGOVÁNO] ███"
+    assert await service._censor(gamestate, 1, "jsi robot?", "jsi robot?", PANIC_USER_FALLBACK) == "LLM"
+
+    gamestate.set_censor_mode(2, "rules")
+    assert await service._censor(gamestate, 2, "jsi robot?", "jsi robot?", PANIC_USER_FALLBACK) == PANIC_USER_FALLBACK
+
+    gamestate.set_censor_mode(3, "llm")
+    assert await service._censor(gamestate, 3, "ahoj", "ahoj", PANIC_USER_FALLBACK) == "LLM"
+    assert llm_calls == ["jsi robot?", "ahoj"]
+
+
+async def test_admin_validation(gamestate):
+    service = AdminService()
+    with pytest.raises(ValueError):
+        await service.set_censor_mode(1, "shout", INSTANCE)
+    with pytest.raises(ValueError):
+        service.update_censor_rules({"blocked": "heslo"}, INSTANCE)
+
+    state = service.update_censor_rules({"blocked": ["tajné"]}, INSTANCE)
+    assert state["rules"]["blocked"] == ["tajné"]
+    state = await service.set_censor_mode(4, "rules", INSTANCE)
+    assert state["session_modes"] == {4: "rules"}
+    state = await service.set_censor_mode(4, None, INSTANCE)
+    assert state["session_modes"] == {}
+
+
+def test_default_mode_replaces_agent_replies_with_llm(gamestate):
+    gamestate.set_censor_mode(None, None)
+    assert gamestate.get_censor_mode(5).value == chat_module.settings.CENSOR_MODE == "llm"
+
+
+async def test_replacements_are_literal_text(gamestate):
+    AdminService().update_censor_rules({"blocked_replacement": "[X \\o/]", "number_replacement": r"\1"}, INSTANCE)
+    gamestate.set_censor_mode(6, "rules")
+    text = await ChatService()._censor(gamestate, 6, "heslo 1234", "heslo 1234", PANIC_USER_FALLBACK)
+    assert text == "[X \\o/] \\1"
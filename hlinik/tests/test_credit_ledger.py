@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.database import CreditLedger, User, UserRole, Task, TaskStatus
+from app.logic.economy import bulk_update_players, process_task_payment
+from app.logic.gamestate import GameState, gamestate
+from app.logic.ledger import apply_credits, open_accounts, reconcile
+
+
+@pytest.fixture
+def player(db, request):
+    # open_accounts() commits, so every test gets its own instance
+    instance_id = f"ledger-{request.node.name}"
+    user = User(username=f"{instance_id}_user1", role=UserRole.USER, instance_id=instance_id, credits=100)
+    db.add(user)
+    db.flush()
+    open_accounts(db)
+    yield user
+    GameState._instances.pop(instance_id, None)  # Created by process_task_payment
+
+
+def test_concurrent_rewards_are_not_lost(db, test_engine, player):
+    # A second handler that loaded the same user earlier (stale credits)
+    other = sessionmaker(bind=test_engine)()
+    stale = other.get(User, player.id)
+    assert stale.credits == 100
+
+    assert apply_credits(db, player.id, 30, "report") == 130
+    db.commit()
+    assert apply_credits(other, stale.id, 20, "report") == 150
+    other.commit()
+    other.close()
+
+    db.refresh(player)
+    assert player.credits == 150
+    assert reconcile(db, player.instance_id) == []
+
+
+def test_bulk_update_and_task_payout_are_ledgered(db, player):
+    gamestate.reset_state()
+    bulk_update_players(db, player.instance_id, "reset", credits=10)
+    task = Task(user_id=player.id, status=TaskStatus.SUBMITTED, reward_offered=100)
+    db.add(task)
+    db.commit()
+
+    assert process_task_payment(task.id, 100, db)["net_reward"] == 80
+    assert process_task_payment(task.id, 100, db) == {"error": "Task already paid"}
+
+    entries = db.query(CreditLedger).filter(CreditLedger.user_id == player.id).order_by(CreditLedger.id).all()
+    assert [(e.reason, e.delta, e.balance) for e in entries] == [
+        ("opening", 100, 100), ("reset", -90, 10), ("task_payout", 80, 90)
+    ]
+    assert player.credits == 90
+    assert reconcile(db, player.instance_id) == []
+
+
+def test_reconcile_reports_direct_writes(db, player):
+    player.credits = 999  # Bypasses the ledger
+    db.flush()
+    assert reconcile(db, player.instance_id) == [
+        {"user_id": player.id, "username": player.username, "credits": 999, "ledger_balance": 100}
+    ]
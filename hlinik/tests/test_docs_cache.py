@@ -0,0 +1,42 @@
+import os
+import pytest
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.database import UserRole
+from app.dependencies import get_current_user_cookie
+from app.routers import docs
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_current_user_cookie] = lambda: SimpleNamespace(role=UserRole.AGENT)
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_current_user_cookie, None)
+
+
+def test_render_is_cached_per_mtime_and_theme(tmp_path):
+    path = tmp_path / "manual.md"
+    path.write_text("# Manual\n\n| a | b |\n|---|---|\n| 1 | 2 |\n")
+    first = docs.render_doc("test", str(path), "green")
+    assert docs.render_doc("test", str(path), "green") is first
+    assert b"<table>" in first.body and b"theme-green" in first.body
+    assert docs.render_doc("test", str(path), "pink").etag != first.etag
+
+    path.write_text("# Changed\n")
+    os.utime(path, (first.mtime + 10, first.mtime + 10))
+    changed = docs.render_doc("test", str(path), "green")
+    assert changed is not first and b"Changed" in changed.body
+
+
+def test_view_returns_304_on_revalidation(client):
+    res = client.get("/doc/view/agent")
+    assert res.status_code == 200
+    assert "theme-pink" in res.text
+    etag, last_modified = res.headers["etag"], res.headers["last-modified"]
+
+    assert client.get("/doc/view/agent", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/doc/view/agent", headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get("/doc/view/agent", headers={"If-None-Match": '"stale"'}).status_code == 200
+    assert client.get("/doc/view/admin").status_code == 403
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Task, TaskStatus, User, UserRole
+from app.logic import evaluation_queue as queue_module
+from app.logic import task_feed
+from app.logic.evaluation_queue import EvaluationQueue
+from app.logic.llm_core import LLMConfig, LLMService
+
+
+@pytest.fixture
+def scored(monkeypatch, test_engine):
+    Session = sessionmaker(bind=test_engine)
+    monkeypatch.setattr(queue_module, "SessionLocal", Session)
+    monkeypatch.setattr(task_feed, "SessionLocal", Session)
+    calls = []
+
+    async def fake_evaluate(prompt, submission, config=None, default=50):
+        calls.append(submission)
+        await asyncio.sleep(0.01)
+        return None if submission == "fail" else len(submission)
+
+    monkeypatch.setattr(queue_module.llm_service, "evaluate_submission", fake_evaluate)
+    monkeypatch.setattr(queue_module.llm_service, "has_key", lambda provider: True)
+    return Session, calls
+
+
+def _submitted(Session, name, submissions, status=TaskStatus.SUBMITTED):
+    db = Session()
+    user = User(username=name, role=UserRole.USER)
+    db.add(user)
+    db.commit()
+    tasks = [Task(user_id=user.id, prompt_desc="p", submission_content=s, status=status) for s in submissions]
+    db.add_all(tasks)
+    db.commit()
+    ids = [t.id for t in tasks]
+    db.close()
+    return ids
+
+
+def _ratings(Session, ids):
+    db = Session()
+    try:
+        return [db.get(Task, task_id).suggested_rating for task_id in ids]
+    finally:
+        db.close()
+
+
+async def test_backlog_is_scored_under_concurrency_limit(scored):
+    Session, calls = scored
+    ids = _submitted(Session, "eval_user1", ["a" * 10, "b" * 20, "c" * 30, "fail"])
+    queue = EvaluationQueue(concurrency=2)
+    queue.start(backlog=True)
+    try:
+        await asyncio.wait_for(queue._queue.join(), timeout=2)
+    finally:
+        queue.stop()
+    assert _ratings(Session, ids) == [10, 20, 30, None]
+    assert queue.pending == 0
+
+
+async def test_graded_tasks_keep_no_suggestion(scored):
+    Session, calls = scored
+    [task_id] = _submitted(Session, "eval_user2", ["done"], status=TaskStatus.PAID)
+    assert await EvaluationQueue(concurrency=1).evaluate(task_id) is None
+    assert calls == []
+    assert _ratings(Session, [task_id]) == [None]
+
+
+async def test_enqueue_deduplicates(scored):
+    queue = EvaluationQueue(concurrency=1)
+    queue._queue = asyncio.Queue()  # Not started: no workers consume
+    queue.enqueue(7)
+    queue.enqueue(7)
+    assert queue._queue.qsize() == 1
+
+
+async def test_tasks_are_not_sent_without_provider_key(scored, monkeypatch):
+    Session, calls = scored
+    monkeypatch.setattr(queue_module.llm_service, "has_key", lambda provider: False)
+    [task_id] = _submitted(Session, "eval_user3", ["no key"])
+    assert await EvaluationQueue(concurrency=1).evaluate(task_id) is None
+    assert calls == []
+    assert _ratings(Session, [task_id]) == [None]
+
+
+@pytest.mark.parametrize("reply,rating", [
+    ("85", 85), (" 100.\n", 100), ("42/100", 42), ("0", 0),
+    ("[MOCK OPENROUTER] Evaluated input: TASK PROMPT: 1 USER SUBMISSION: 2", None),
+    ("[SYSTEM ERROR: 429 Too Many Requests]", None),
+    ("Rating: 85 of 100", None), ("7 8", None), ("150", None), ("", None),
+])
+async def test_only_a_single_number_is_a_rating(monkeypatch, reply, rating):
+    service = LLMService()
+    monkeypatch.setattr(service, "has_key", lambda provider: True)
+
+    async def fake_generate(config, history):
+        return reply
+
+    monkeypatch.setattr(service, "generate_response", fake_generate)
+    assert await service.evaluate_submission("p", "s", LLMConfig(), default=None) == rating
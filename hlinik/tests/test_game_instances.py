@@ -0,0 +1,98 @@
+import pytest
+from app.config import parse_game_instances
+from app.database import UserRole
+from app.logic.gamestate import GameState, gamestate, get_gamestate, export_all_shared_state, import_all_shared_state
+from app.logic import routing
+from app.logic.routing import routing_logic, get_routing
+from app.services.admin_service import _session_id_from_username
+
+
+@pytest.fixture
+def rehearsal():
+    game = get_gamestate("rehearsal-test")
+    yield game
+    # Drop the instance again so other tests (game_loop) do not tick or persist it
+    GameState._instances.pop("rehearsal-test", None)
+    routing._managers.pop("rehearsal-test", None)
+
+
+def test_parse_game_instances():
+    assert parse_game_instances("", "default", 8) == {"default": 8}
+    assert parse_game_instances("live, rehearsal:4", "default", 8) == {"default": 8, "live": 8, "rehearsal": 4}
+    with pytest.raises(ValueError):
+        parse_game_instances("Live 2", "default", 8)
+
+
+def test_default_instance_is_legacy_singleton(rehearsal):
+    assert GameState() is gamestate
+    assert get_gamestate() is gamestate
+    assert get_routing() is routing_logic
+    assert rehearsal is not gamestate
+    assert get_gamestate("rehearsal-test") is rehearsal
+
+
+def test_instance_state_is_isolated(rehearsal):
+    gamestate.reset_state()
+    rehearsal.set_shift(3)
+    rehearsal.report_anomaly()
+    assert gamestate.global_shift_offset == 0
+    assert rehearsal.temperature > gamestate.temperature
+    assert rehearsal.scoped_username("agent2") == "rehearsal-test_agent2"
+    assert gamestate.scoped_username("agent2") == "agent2"
+
+
+def test_instance_usernames_map_to_sessions():
+    assert _session_id_from_username("user3") == 3
+    assert _session_id_from_username("live2_user3") == 3
+
+
+@pytest.mark.asyncio
+async def test_broadcast_stays_within_instance(rehearsal, fake_socket):
+    default_routing = routing_logic
+    rehearsal_routing = get_routing("rehearsal-test")
+    gamestate.set_shift(0)
+    rehearsal.set_shift(1)
+
+    ws_default_user = fake_socket()
+    ws_rehearsal_user = fake_socket()
+    ws_rehearsal_agent = fake_socket()
+    await default_routing.connect(ws_default_user, UserRole.USER, 1, logical_id=1)
+    await rehearsal_routing.connect(ws_rehearsal_user, UserRole.USER, 101, logical_id=1)
+    await rehearsal_routing.connect(ws_rehearsal_agent, UserRole.AGENT, 102, logical_id=1)
+    try:
+        # Shift 1 applies to the rehearsal instance only: agent 1 serves session 2
+        await rehearsal_routing.broadcast_to_session(2, "rehearsal only")
+        assert ws_rehearsal_agent.sent_messages == ["rehearsal only"]
+        assert ws_rehearsal_user.sent_messages == []
+
+        await rehearsal_routing.broadcast_global("rehearsal global")
+        assert "rehearsal global" in ws_rehearsal_user.sent_messages
+        assert ws_default_user.sent_messages == []
+        assert default_routing.get_active_counts()["users"] == 1
+    finally:
+        default_routing.disconnect(ws_default_user, UserRole.USER, 1)
+        rehearsal_routing.disconnect(ws_rehearsal_user, UserRole.USER, 101)
+        rehearsal_routing.disconnect(ws_rehearsal_agent, UserRole.AGENT, 102)
+
+
+def test_shared_state_export_is_keyed_by_instance(rehearsal):
+    rehearsal.treasury_balance = 1234
+    state = export_all_shared_state()
+    assert state["rehearsal-test/treasury_balance"] == 1234
+
+    import_all_shared_state({"rehearsal-test/treasury_balance": 42})
+    assert rehearsal.treasury_balance == 42
+    assert gamestate.treasury_balance != 42
+
+
+def test_session_dicts_are_replicated_per_session(rehearsal):
+    rehearsal.pending_responses = {3: 10.0, 5: 20.0}
+    rehearsal.treasury_balance = 42
+    state = export_all_shared_state()
+    assert state["rehearsal-test/pending_responses/3"] == 10.0
+    assert "rehearsal-test/pending_responses" not in state
+
+    import_all_shared_state({"rehearsal-test/pending_responses/4": 30.0},
+                            ["rehearsal-test/pending_responses/3"], {"rehearsal-test/treasury_balance": 5})
+    assert rehearsal.pending_responses == {5: 20.0, 4: 30.0}
+    assert rehearsal.treasury_balance == 47
@@ -1,8 +1,11 @@
 import pytest
 import time
-from app.database import User, Task, TaskStatus
-from app.logic.gamestate import gamestate
-from app.logic.economy import process_task_payment
+from app.database import CreditLedger, SystemLog, User, Task, TaskStatus, UserRole
+from app.logic import routing
+from app.logic.gamestate import GameState, gamestate
+from app.logic.economy import process_task_payment, bulk_update_players
+from app.logic.routing import get_routing
+from app.services.admin_service import admin_service
 
 
 def test_tax_collection(db):
@@ -66,3 +69,49 @@ def test_insufficient_funds_purchase():
     assert success is False
     assert gamestate.treasury_balance == 500
     assert gamestate.power_capacity == 100
+
+
+def _players(db, instance_id, credits):
+    users = [User(username=f"{instance_id}_user{i}", role=UserRole.USER, instance_id=instance_id, credits=c)
+             for i, c in enumerate(credits, 1)]
+    users.append(User(username=f"{instance_id}_agent", role=UserRole.AGENT, instance_id=instance_id, credits=0))
+    db.add_all(users)
+    db.flush()
+    return users
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_bulk_update_players_is_set_based(db, monkeypatch, returning):
+    monkeypatch.setattr(db.get_bind().dialect, "update_returning", returning)
+    users = _players(db, f"bulk{int(returning)}", [10, -5])
+
+    rows = bulk_update_players(db, f"bulk{int(returning)}", "bonus", credits=User.credits + 20)
+
+    assert sorted(rows) == [(users[0].id, 30, False), (users[1].id, 15, False)]
+    agent = db.query(User).filter(User.id == users[2].id).one()
+    assert agent.credits == 0  # Only players are touched
+
+
+async def test_global_bonus_pushes_each_new_balance(db, fake_socket):
+    last_log = db.query(SystemLog.id).order_by(SystemLog.id.desc()).limit(1).scalar() or 0
+    users = _players(db, "bonus-test", [100, 40])
+    db.commit()
+    user_ids = [u.id for u in users[:2]]
+    sockets = {user_id: fake_socket() for user_id in user_ids}
+    manager = get_routing("bonus-test")
+    for user_id, ws in sockets.items():
+        manager.user_connections[user_id] = [ws]
+    try:
+        count = await admin_service.global_bonus(db, 25, "test", "bonus-test")
+    finally:
+        routing._managers.pop("bonus-test", None)
+        GameState._instances.pop("bonus-test", None)
+        # global_bonus commits: remove the rows again so later tests do not see them
+        db.rollback()
+        db.query(CreditLedger).filter(CreditLedger.instance_id == "bonus-test").delete()
+        db.query(SystemLog).filter(SystemLog.id > last_log).delete()
+        db.query(User).filter(User.instance_id == "bonus-test").delete()
+        db.commit()
+
+    assert count == 2
+    assert [sockets[user_id].sent[-1]["credits"] for user_id in user_ids] == [125, 65]
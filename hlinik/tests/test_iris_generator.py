@@ -0,0 +1,54 @@
+import copy
+import os
+
+from iris_generator import FULL_RELATIONS, FULL_ROLES, build_relation_index, generate_briefings
+
+
+def _legacy_relations_for_role(role_id, relations):
+    my_relations = []
+    for r in relations:
+        if r['source'] == role_id:
+            my_relations.append({"target": r['target'], "desc": r['desc_source'], "type": r['type']})
+        elif r['target'] == role_id:
+            my_relations.append({"target": r['source'], "desc": r['desc_target'], "type": r['type']})
+    return my_relations
+
+
+def test_relation_index_matches_per_role_scan():
+    index = build_relation_index(FULL_RELATIONS)
+    for role in FULL_ROLES:
+        assert index.get(role['id'], []) == _legacy_relations_for_role(role['id'], FULL_RELATIONS)
+
+
+def test_only_changed_briefings_are_rebuilt(tmp_path):
+    for folder in ("users", "agents", "admins"):
+        os.makedirs(tmp_path / folder)
+    roles = copy.deepcopy(FULL_ROLES)
+
+    first = generate_briefings(roles, FULL_RELATIONS, str(tmp_path), jobs=1)
+    assert len(first["rebuilt"]) == len(roles)
+
+    second = generate_briefings(roles, FULL_RELATIONS, str(tmp_path), jobs=1)
+    assert second["rebuilt"] == [] and len(second["unchanged"]) == len(roles)
+
+    # Editing one role rebuilds only that briefing; renaming removes the stale file
+    old_file = f"{tmp_path}/{roles[1]['type']}s/{roles[1]['id']}_{roles[1]['name'].replace(' ', '_')}.html"
+    roles[0]["description"] = "Nový popis."
+    roles[1]["name"] = "Karel Přejmenovaný"
+    third = generate_briefings(roles, FULL_RELATIONS, str(tmp_path), jobs=1)
+    assert sorted(third["rebuilt"]) == sorted([roles[0]["id"], roles[1]["id"]])
+    assert third["removed"] == [] and third["stale_files"] == [old_file]
+    assert not os.path.exists(old_file)
+    assert "Nový popis." in (tmp_path / "users" / f"{roles[0]['id']}_{roles[0]['name'].replace(' ', '_')}.html").read_text()
+
+
+def test_deleted_role_is_reported_as_removed(tmp_path):
+    for folder in ("users", "agents", "admins"):
+        os.makedirs(tmp_path / folder)
+    roles = copy.deepcopy(FULL_ROLES)
+    generate_briefings(roles, FULL_RELATIONS, str(tmp_path), jobs=1)
+
+    gone = roles.pop()
+    report = generate_briefings(roles, FULL_RELATIONS, str(tmp_path), jobs=1)
+    assert report["rebuilt"] == [] and report["removed"] == [gone["id"]]
+    assert len(report["stale_files"]) == 1 and report["stale_files"][0].startswith(f"{tmp_path}/{gone['type']}s/")
@@ -0,0 +1,44 @@
+import json
+from app.logic.labels import LabelStore
+
+
+def test_replace_returns_only_changed_keys(tmp_path):
+    store = LabelStore(tmp_path / "labels.json")
+    assert store.get_version() == 0
+
+    assert store.replace({"title": "IRIS", "status": "OK"}) == {"title": "IRIS", "status": "OK"}
+    assert store.replace({"title": "IRIS", "hint": "?"}) == {"hint": "?", "status": None}
+    assert store.replace({"title": "IRIS", "hint": "?"}) == {}
+    assert json.loads((tmp_path / "labels.json").read_text()) == {"title": "IRIS", "hint": "?"}
+
+
+def test_version_is_content_checksum(tmp_path):
+    first = LabelStore(tmp_path / "a.json")
+    second = LabelStore(tmp_path / "b.json")
+    first.replace({"title": "IRIS"})
+    second.replace({"title": "IRIS"})
+    assert first.version == second.version != 0
+
+    # A fresh store reading the same file computes the same version
+    assert LabelStore(tmp_path / "a.json").get_version() == first.version
+    first.replace({"title": "HLINIK"})
+    assert first.version != second.version
+
+
+def test_connect_message_skips_current_cache(tmp_path):
+    store = LabelStore(tmp_path / "labels.json")
+    store.replace({"title": "IRIS"})
+
+    current = json.loads(store.connect_message(store.version))
+    assert current["current"] is True and "labels" not in current
+
+    stale = json.loads(store.connect_message(None))
+    assert stale["labels"] == {"title": "IRIS"}
+
+
+def test_clear_removes_file(tmp_path):
+    store = LabelStore(tmp_path / "labels.json")
+    store.replace({"title": "IRIS"})
+    assert store.clear() == {"title": None}
+    assert not (tmp_path / "labels.json").exists()
+    assert store.version == 0
@@ -0,0 +1,62 @@
+import gzip
+import json
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.logic.lore_bundle import LoreBundler, lore_bundler, relations_for_role
+from app.logic.lore_repository import LoreRepository
+
+FILES = {
+    "users": {"file": "users.json", "key": "users", "id_field": "id", "display_field": "obcanske_jmeno"},
+    "relations": {"file": "relations_v2.json", "key": "relations", "id_field": "id", "display_field": "nazev"},
+}
+
+
+@pytest.fixture
+def bundler(tmp_path):
+    (tmp_path / "users.json").write_text(json.dumps({"users": [
+        {"id": "U01", "obcanske_jmeno": "Jana Nováková"},
+        {"id": "A01", "obcanske_jmeno": "Petr"},
+    ]}))
+    (tmp_path / "relations_v2.json").write_text(json.dumps({"relations": [
+        {"id": "R01", "source": "U01", "target": "A01", "type": "past", "desc_source": "Žák", "desc_target": "Učitelka"},
+    ]}))
+    return LoreBundler(LoreRepository(tmp_path, FILES))
+
+
+def test_relations_for_role_matches_generator_shape():
+    relations = [{"id": "R01", "source": "U01", "target": "A01", "type": "past", "desc_source": "a", "desc_target": "b"}]
+    assert relations_for_role("A01", relations) == [{"id": "R01", "target": "U01", "type": "past", "desc": "b"}]
+    assert relations_for_role("U02", relations) == []
+
+
+def test_bundle_contents_and_incremental_rebuild(bundler):
+    bundle = bundler.get_bundle()
+    data = json.loads(bundle.body)
+    assert data["version"] == bundle.version
+    assert data["files"]["users"]["users"][0]["id"] == "U01"
+    assert data["relations_by_role"]["U01"][0]["target"] == "A01"
+    assert {"file": "relations", "record_id": "R01", "field": "source"} in data["references"]["U01"]
+    assert data["search"]["nováková"] == ["users/U01"]
+    assert gzip.decompress(bundle.gzip_body) == bundle.body
+
+    assert bundler.get_bundle() is bundle
+    users_section = bundler._sections["users"]
+    bundler.repository.update("relations", "R01", {"id": "R01", "source": "U01", "target": "A01", "type": "rival"})
+    rebuilt = bundler.get_bundle()
+    assert rebuilt.version != bundle.version
+    assert bundler._sections["users"] is users_section  # unchanged file not re-encoded
+
+
+def test_bundle_endpoint_gzip_and_304():
+    client = TestClient(app)
+    bundle = lore_bundler.get_bundle()
+    res = client.get("/api/lore-editor/bundle")
+    assert res.status_code == 200
+    assert res.headers["etag"] == bundle.etag
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.json()["version"] == bundle.version
+
+    cached = client.get("/api/lore-editor/bundle", headers={"If-None-Match": bundle.etag})
+    assert cached.status_code == 304
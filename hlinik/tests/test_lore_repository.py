@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+import pytest
+
+from app.logic.lore_repository import LoreRepository
+
+FILES = {
+    "users": {"file": "users.json", "key": "users", "id_field": "id", "display_field": "obcanske_jmeno"},
+    "tasks": {"file": "tasks.json", "key": "tasks", "id_field": "id", "display_field": "nazev"},
+    "config": {"file": "config.json", "key": None, "id_field": None, "display_field": None},
+}
+
+
+@pytest.fixture
+def repo(tmp_path):
+    (tmp_path / "tasks.json").write_text(json.dumps({"tasks": [{"id": "T01", "nazev": "A"}, {"id": "T02", "nazev": "B"}]}))
+    (tmp_path / "users.json").write_text(json.dumps({"users": [
+        {"id": "U01", "ukoly": ["T01"]},
+        {"id": "U02", "vztahy": {"partner": "U01"}},
+    ]}))
+    (tmp_path / "config.json").write_text(json.dumps({"title": "IRIS"}))
+    return LoreRepository(tmp_path, FILES, write_delay=0.05)
+
+
+def _read(tmp_path, name):
+    return json.loads((tmp_path / name).read_text())
+
+
+def test_lookup_by_id_and_errors(repo):
+    assert repo.find("tasks", "T02")["nazev"] == "B"
+    assert repo.find("tasks", "T99") is None
+    assert repo.find("config", "anything") == {"title": "IRIS"}
+    with pytest.raises(KeyError):
+        repo.get("unknown")
+
+
+def test_external_change_is_reloaded(repo, tmp_path):
+    first = repo.get("tasks")
+    assert repo.get("tasks") is first and first.index["T01"]["nazev"] == "A"
+
+    path = tmp_path / "tasks.json"
+    path.write_text(json.dumps({"tasks": [{"id": "T01", "nazev": "Changed"}]}))
+    os.utime(path, (first.mtime + 5, first.mtime + 5))
+    assert repo.find("tasks", "T01")["nazev"] == "Changed"
+    assert repo.find("tasks", "T02") is None
+
+    path.write_text("{broken")
+    os.utime(path, (first.mtime + 10, first.mtime + 10))
+    with pytest.raises(ValueError):
+        repo.get("tasks")
+
+
+def test_mutations_without_loop_write_immediately(repo, tmp_path):
+    repo.create("tasks", {"id": "T03", "nazev": "C"})
+    with pytest.raises(ValueError):
+        repo.create("tasks", {"id": "T03", "nazev": "dup"})
+    assert repo.update("tasks", "T01", {"id": "T01", "nazev": "A2"})
+    assert not repo.update("tasks", "T99", {"id": "T99"})
+    assert repo.delete("tasks", "T02")
+
+    assert _read(tmp_path, "tasks.json")["tasks"] == [{"id": "T01", "nazev": "A2"}, {"id": "T03", "nazev": "C"}]
+    assert not (tmp_path / "tasks.json.tmp").exists()
+
+
+@pytest.mark.asyncio
+async def test_writes_are_debounced(repo, tmp_path):
+    repo.update("tasks", "T01", {"id": "T01", "nazev": "X"})
+    repo.update("tasks", "T02", {"id": "T02", "nazev": "Y"})
+    # Not on disk yet, but reads see the pending edits
+    assert _read(tmp_path, "tasks.json")["tasks"][0]["nazev"] == "A"
+    assert repo.find("tasks", "T01")["nazev"] == "X"
+
+    await asyncio.sleep(0.1)
+    assert [t["nazev"] for t in _read(tmp_path, "tasks.json")["tasks"]] == ["X", "Y"]
+    assert not repo.get("tasks").dirty
+
+
+@pytest.mark.asyncio
+async def test_failed_write_is_reported_and_retried(repo, tmp_path, monkeypatch):
+    write = repo._write
+    failures = []
+
+    def flaky_write(lore_file):
+        if not failures:
+            failures.append(lore_file.file_key)
+            raise OSError("disk full")
+        write(lore_file)
+
+    monkeypatch.setattr(repo, "_write", flaky_write)
+    repo.update("tasks", "T01", {"id": "T01", "nazev": "X"})
+    await asyncio.sleep(0.07)
+    assert repo.write_error("tasks") == "disk full"
+    assert repo.find("tasks", "T01")["nazev"] == "X"  # Edit kept in memory
+
+    await asyncio.sleep(0.2)  # Retried with backoff
+    assert _read(tmp_path, "tasks.json")["tasks"][0]["nazev"] == "X"
+    assert repo.write_error("tasks") is None
+
+
+def test_reference_index_follows_writes(repo):
+    # Like the old full scan, a record's own id field is included
+    assert sorted(repo.references("T01"), key=lambda r: r["file"]) == [
+        {"file": "tasks", "record_id": "T01", "field": "id"},
+        {"file": "users", "record_id": "U01", "field": "ukoly[0]"},
+    ]
+    assert {r["record_id"] for r in repo.references("U01")} == {"U01", "U02"}  # own id + partner
+
+    repo.update("users", "U01", {"id": "U01", "ukoly": ["T02"]})
+    assert [r["file"] for r in repo.references("T01")] == ["tasks"]
+    assert repo.references("T02")[-1]["field"] == "ukoly[0]"
+
+    repo.delete("users", "U02")
+    assert repo.references("U01") == [{"file": "users", "record_id": "U01", "field": "id"}]
+
+
+def test_update_keeps_references_of_records_sharing_the_id(repo, tmp_path):
+    (tmp_path / "users.json").write_text(json.dumps({"users": [
+        {"id": "U05", "ukoly": ["T01"]},
+        {"id": "U05", "ukoly": ["T02"]},  # Duplicate id (hand-edited file)
+    ]}))
+    repo.update("users", "U05", {"id": "U05", "ukoly": ["T03"]})
+    assert [r["field"] for r in repo.references("T02") if r["file"] == "users"] == ["ukoly[0]"]
+    assert [r["field"] for r in repo.references("T03")] == ["ukoly[0]"]
+    assert [r["file"] for r in repo.references("T01")] == ["tasks"]
+
+    repo.update("users", "U05", {"id": "U06", "ukoly": ["T03"]})  # Renamed
+    assert [r["record_id"] for r in repo.references("T02") if r["file"] == "users"] == ["U05"]
+    assert [r["record_id"] for r in repo.references("T03")] == ["U06"]
+
+
+def test_dangling_references_report(repo):
+    assert repo.dangling_references() == []
+    repo.create("users", {"id": "U03", "ukoly": ["T07"]})
+    repo.delete("tasks", "T02")
+    repo.update("users", "U01", {"id": "U01", "ukoly": ["T01", "T02"]})
+
+    report = {d["target_id"]: d for d in repo.dangling_references()}
+    assert set(report) == {"T02", "T07"}
+    assert report["T07"]["source"] == "tasks"
+    assert report["T07"]["references"] == [{"file": "users", "record_id": "U03", "field": "ukoly[0]"}]
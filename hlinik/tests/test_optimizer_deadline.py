@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app.logic.gamestate import GameState, get_gamestate
+from app.services import chat_service as chat_module
+from app.services.chat_service import ChatService
+
+INSTANCE = "optimizer-test"
+
+
+@pytest.fixture
+def optimizer(monkeypatch):
+    delay = {"seconds": 0}
+
+    async def fake_rewrite(content, prompt, config=None):
+        await asyncio.sleep(delay["seconds"])
+        return f"  {content.upper()}  "
+
+    monkeypatch.setattr(chat_module.settings, "OPTIMIZER_DEADLINE", 0.05)
+    monkeypatch.setattr(chat_module.settings, "OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(chat_module.llm_service, "rewrite_message", fake_rewrite)
+    gamestate = get_gamestate(INSTANCE)
+    gamestate.start_pending_response(1)
+    yield ChatService(), gamestate, delay
+    GameState._instances.pop(INSTANCE, None)
+
+
+async def test_rewrite_within_deadline_is_sent_as_preview(optimizer, fake_socket):
+    service, gamestate, delay = optimizer
+    ws = fake_socket()
+    await service._send_optimizer_preview(gamestate, 1, 1, "hello", ws)
+    assert ws.sent == [{"type": "optimizer_preview", "original": "hello", "rewritten": "HELLO", "optimized": True}]
+    assert service._optimizer_jobs == {}
+
+
+async def test_slow_rewrite_falls_back_then_updates(optimizer, fake_socket):
+    service, gamestate, delay = optimizer
+    delay["seconds"] = 0.15
+    started = gamestate.pending_responses[1]
+    ws = fake_socket()
+    await service._send_optimizer_preview(gamestate, 1, 1, "hello", ws)
+
+    assert ws.sent[0]["optimized"] is False and ws.sent[0]["rewritten"] == "hello"
+    assert gamestate.pending_responses[1] >= started + 0.05  # Waiting time given back
+
+    await asyncio.wait_for(service._optimizer_jobs[(INSTANCE, 1)], timeout=1)
+    assert ws.sent[1]["updated"] is True and ws.sent[1]["rewritten"] == "HELLO"
+    assert service._optimizer_jobs == {}
+
+
+async def test_answered_session_gets_no_late_preview(optimizer, fake_socket):
+    service, gamestate, delay = optimizer
+    delay["seconds"] = 0.1
+    ws = fake_socket()
+    await service._send_optimizer_preview(gamestate, 1, 1, "hello", ws)
+    job = service._optimizer_jobs[(INSTANCE, 1)]
+
+    gamestate.clear_pending_response(1)
+    await asyncio.wait_for(job, timeout=1)
+    assert len(ws.sent) == 1
+
+
+async def test_new_message_cancels_running_rewrite(optimizer, fake_socket):
+    service, gamestate, delay = optimizer
+    delay["seconds"] = 1
+    ws = fake_socket()
+    await service._send_optimizer_preview(gamestate, 1, 1, "hello", ws)
+    job = service._optimizer_jobs[(INSTANCE, 1)]
+
+    service._cancel_optimizer_job(INSTANCE, 1)
+    with pytest.raises(asyncio.CancelledError):
+        await job
+    assert len(ws.sent) == 1
+    assert service._optimizer_jobs == {}
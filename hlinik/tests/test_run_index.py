@@ -0,0 +1,65 @@
+import json
+import os
+
+from app.logic import run_index as run_index_module
+from app.logic.run_index import RunIndex, read_json_header
+
+
+def _write_run(runs_dir, name, scenario, timestamp, status="success", logs=None):
+    run = {"timestamp": timestamp, "scenario_name": scenario, "status": status, "duration": 1.5,
+           "filename": name, "stats": {"steps": 3}, "logs": logs or []}
+    (runs_dir / name).write_text(json.dumps(run, indent=2))
+
+
+def test_header_reader_stops_before_body(tmp_path, monkeypatch):
+    path = tmp_path / "run.json"
+    # Body is invalid JSON - it must never be decoded
+    path.write_text('{"timestamp": "2025-01-01", "duration": 45.0, "stats": {"a": [1]}, "logs": [ broken')
+    monkeypatch.setattr(run_index_module, "CHUNK_SIZE", 3)
+    assert read_json_header(path) == {"timestamp": "2025-01-01", "duration": 45.0, "stats": {"a": [1]}}
+
+    (tmp_path / "list.json").write_text("[1, 2]")
+    assert read_json_header(tmp_path / "list.json") is None
+
+
+def test_header_fields_after_body_lists_are_found(tmp_path, monkeypatch):
+    path = tmp_path / "hlinik_workflow.json"
+    run = {"timestamp": "2025-01-01", "scenario_name": "Workflow", "status": "failed",
+           "steps": [{"name": "login \\\" ] {", "log": ["[x]", "}"]}, []],
+           "stats": {"passed": 3}, "error": "boom", "duration": 12.5}
+    path.write_text(json.dumps(run, indent=2))
+    monkeypatch.setattr(run_index_module, "CHUNK_SIZE", 3)
+    assert read_json_header(path) == {k: run[k] for k in ("timestamp", "scenario_name", "status", "stats", "duration")}
+
+
+def test_refresh_is_incremental(tmp_path):
+    runs_dir = tmp_path / "runs"
+    runs_dir.mkdir()
+    _write_run(runs_dir, "a.json", "LLM Hour", "2025-01-01T10:00:00")
+    _write_run(runs_dir, "b.json", "Economy", "2025-01-02T10:00:00")
+    index = RunIndex(runs_dir, tmp_path / "index.json")
+
+    assert sorted(index.refresh()["added"]) == ["a.json", "b.json"]
+    assert index.refresh() == {"added": [], "updated": [], "removed": []}
+
+    _write_run(runs_dir, "a.json", "LLM Hour", "2025-01-01T10:00:00", status="failed", logs=["x"])
+    os.remove(runs_dir / "b.json")
+    assert index.refresh() == {"added": [], "updated": ["a.json"], "removed": ["b.json"]}
+
+    on_disk = json.loads((tmp_path / "index.json").read_text())
+    assert [(r["filename"], r["status"]) for r in on_disk] == [("a.json", "failed")]
+
+
+def test_query_filters_and_paginates(tmp_path):
+    runs_dir = tmp_path / "runs"
+    runs_dir.mkdir()
+    for i in range(5):
+        _write_run(runs_dir, f"llm_{i}.json", "LLM Hour", f"2025-01-0{i + 1}", status="failed" if i == 4 else "success")
+    _write_run(runs_dir, "eco.json", "Economy", "2025-02-01")
+    index = RunIndex(runs_dir, tmp_path / "index.json")
+
+    total, page = index.query(scenario="llm", offset=1, limit=2)
+    assert total == 5
+    assert [r["filename"] for r in page] == ["llm_3.json", "llm_2.json"]
+    assert index.query(scenario="LLM", status="failed")[0] == 1
+    assert index.query()[0] == 6
@@ -0,0 +1,67 @@
+import itertools
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.database import ChatLog, User, UserRole
+from app.logic import routing
+from app.logic.gamestate import GameState, HyperVisibilityMode, get_gamestate
+from app.services import chat_service as chat_module
+from app.services.chat_service import switch_agent_sessions
+
+INSTANCE = "shift-switch-test"
+_runs = itertools.count()
+
+
+@pytest.fixture
+def shift(monkeypatch, test_engine, fake_socket):
+    Session = sessionmaker(bind=test_engine)
+    monkeypatch.setattr(chat_module, "SessionLocal", Session)
+    monkeypatch.setattr(chat_module.settings, "SESSION_SWITCH_HISTORY", 3)
+    db = Session()
+    users = {}
+    run = next(_runs)
+    for name, role in (("user1", UserRole.USER), ("user2", UserRole.USER), ("agent1", UserRole.AGENT)):
+        user = User(username=f"{INSTANCE}{run}_{name}", role=role, instance_id=INSTANCE)
+        db.add(user)
+        db.commit()
+        users[name] = user.id
+    db.query(ChatLog).filter(ChatLog.instance_id == INSTANCE).delete()
+    for i in range(5):
+        db.add(ChatLog(instance_id=INSTANCE, session_id=2, sender_id=users["user2"], content=f"s2 msg {i}"))
+    db.add(ChatLog(instance_id=INSTANCE, session_id=1, sender_id=users["user1"], content="s1 msg"))
+    db.commit()
+    db.close()
+
+    gamestate = get_gamestate(INSTANCE)
+    manager = routing.get_routing(INSTANCE)
+    tabs = [fake_socket(), fake_socket()]
+    manager.agent_connections[users["agent1"]] = tabs
+    manager.agent_logical_ids[users["agent1"]] = 1
+    yield gamestate, tabs
+    routing._managers.pop(INSTANCE, None)
+    GameState._instances.pop(INSTANCE, None)
+
+
+async def test_shift_pushes_new_session_with_recent_history(shift):
+    gamestate, tabs = shift
+    gamestate.set_shift(1)
+    await switch_agent_sessions(INSTANCE)
+
+    for tab in tabs:
+        [frame] = tab.sent
+        assert frame["type"] == "session_switch"
+        assert frame["session_id"] == 2 and frame["shift"] == 1
+        assert [m["content"] for m in frame["history"]] == ["s2 msg 2", "s2 msg 3", "s2 msg 4"]
+        assert frame["history"][0]["role"] == "user" and frame["history"][0]["session_id"] == 2
+
+
+async def test_hidden_history_modes_send_no_messages(shift):
+    gamestate, tabs = shift
+    gamestate.hyper_visibility_mode = HyperVisibilityMode.BLACKBOX
+    gamestate.set_shift(0)
+    await switch_agent_sessions(INSTANCE)
+
+    frame = tabs[0].sent[0]
+    assert frame["session_id"] == 1 and frame["history"] == []
+    assert frame["hyper_mode"] == "blackbox"
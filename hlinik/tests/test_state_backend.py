@@ -0,0 +1,133 @@
+import asyncio
+import pytest
+from app.logic.backend import UnixSocketBackend
+
+
+async def wait_for(predicate, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        if loop.time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+def make_state_backend(socket_path, worker_id, state):
+    def apply(patch, deleted, increments):
+        state.update(patch)
+        for key in deleted:
+            state.pop(key, None)
+        for key, increment in increments.items():
+            state[key] += increment
+
+    backend = UnixSocketBackend(str(socket_path), worker_id=worker_id)
+    backend.bind_state(lambda: dict(state), apply, lambda key: key == "treasury")
+    return backend
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return tmp_path / "bus.sock"
+
+
+@pytest.mark.asyncio
+async def test_leader_election_and_fan_out(socket_path):
+    received_a, received_b = [], []
+    leader = UnixSocketBackend(str(socket_path), worker_id=1)
+    follower = UnixSocketBackend(str(socket_path), worker_id=2)
+    leader.on("route", lambda payload, origin: received_a.append((payload, origin)))
+    follower.on("route", lambda payload, origin: received_b.append((payload, origin)))
+
+    await leader.start()
+    await follower.start()
+    try:
+        assert leader.is_leader
+        assert not follower.is_leader
+        await wait_for(lambda: 2 in leader._peers.values())
+
+        follower.publish("route", {"msg": "from follower"})
+        await wait_for(lambda: received_a)
+        assert received_a == [({"msg": "from follower"}, 2)]
+
+        leader.publish("route", {"msg": "from leader"})
+        await wait_for(lambda: received_b)
+        assert received_b == [({"msg": "from leader"}, 1)]
+    finally:
+        await follower.stop()
+        await leader.stop()
+
+
+@pytest.mark.asyncio
+async def test_state_changes_replicate(socket_path):
+    state_a = {"temperature": 80.0, "shift": 0}
+    state_b = {"temperature": 80.0, "shift": 0}
+    leader = make_state_backend(socket_path, 1, state_a)
+    follower = make_state_backend(socket_path, 2, state_b)
+
+    await leader.start()
+    await follower.start()
+    try:
+        await wait_for(lambda: 2 in leader._peers.values())
+
+        with follower.track_changes():
+            state_b["shift"] = 3
+        await wait_for(lambda: state_a["shift"] == 3)
+        # Unchanged fields are not part of the patch
+        assert state_a["temperature"] == 80.0
+
+        with leader.track_changes():
+            state_a["temperature"] = 120.0
+        await wait_for(lambda: state_b["temperature"] == 120.0)
+    finally:
+        await follower.stop()
+        await leader.stop()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_changes_of_different_keys_merge(socket_path):
+    # Flattened like gamestate.export_all_shared_state: one key per session entry
+    state_a = {"g/pending_responses/3": 1.0, "g/pending_responses/5": 1.0, "g/panic_modes/7": {}, "treasury": 500}
+    state_b = dict(state_a)
+    leader = make_state_backend(socket_path, 1, state_a)
+    follower = make_state_backend(socket_path, 2, state_b)
+
+    await leader.start()
+    await follower.start()
+    try:
+        await wait_for(lambda: 2 in leader._peers.values())
+
+        with follower.track_changes():
+            # Handler on the follower, still running (awaiting the LLM) ...
+            state_b["g/pending_responses/3"] = 2.0
+            state_b["treasury"] += 10
+            # ... while the leader's game_loop changes another session and the treasury
+            with leader.track_changes():
+                state_a["g/pending_responses/5"] = 9.0
+                del state_a["g/panic_modes/7"]
+                state_a["treasury"] += 25
+            await wait_for(lambda: state_b["g/pending_responses/5"] == 9.0)
+            assert state_b["g/pending_responses/3"] == 2.0  # Own unpublished edit kept
+            assert "g/panic_modes/7" not in state_b and state_b["treasury"] == 535
+
+        await wait_for(lambda: state_a["g/pending_responses/3"] == 2.0)
+        await wait_for(lambda: state_a["treasury"] == 535)
+        assert state_a["g/pending_responses/5"] == 9.0 and "g/panic_modes/7" not in state_a
+    finally:
+        await follower.stop()
+        await leader.stop()
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over_when_leader_stops(socket_path):
+    leader = UnixSocketBackend(str(socket_path), worker_id=1)
+    follower = UnixSocketBackend(str(socket_path), worker_id=2)
+
+    await leader.start()
+    await follower.start()
+    try:
+        await wait_for(lambda: 2 in leader._peers.values())
+        await leader.stop()
+        await wait_for(lambda: follower.is_leader)
+    finally:
+        await follower.stop()
+        await leader.stop()
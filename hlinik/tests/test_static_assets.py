@@ -0,0 +1,63 @@
+import gzip
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.static_assets import PrecompressedStaticFiles, static_url, IMMUTABLE_CACHE
+
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "app.js").write_text("console.log('iris');\n" * 200)
+    (tmp_path / "tiny.css").write_text("body{}")
+    (tmp_path / "index.html").write_text('<script src="js/app.js?v=old"></script><link href="missing.css">')
+    app = FastAPI()
+    app.mount("/assets-test", PrecompressedStaticFiles(directory=tmp_path, html=True, url_prefix="/assets-test"))
+    return TestClient(app)
+
+
+def test_serves_precompressed_variant(client):
+    res = client.get("/assets-test/js/app.js", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.headers["cache-control"] == "no-cache"
+    assert res.text.startswith("console.log")
+
+    plain = client.get("/assets-test/js/app.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] == res.headers["etag"]
+
+    tiny = client.get("/assets-test/tiny.css", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in tiny.headers  # below MIN_COMPRESS_SIZE
+
+
+def test_fingerprinted_urls_are_immutable(client, tmp_path):
+    url = static_url("/assets-test/js/app.js")
+    assert url != "/assets-test/js/app.js"
+    res = client.get(url)
+    assert res.status_code == 200 and res.headers["cache-control"] == IMMUTABLE_CACHE
+    assert client.get(url, headers={"If-None-Match": res.headers["etag"]}).status_code == 304
+
+    # Content changed: the old URL still works, but is no longer cached forever
+    (tmp_path / "js" / "app.js").write_text("console.log('v2');\n" * 100)
+    stale = client.get(url)
+    assert "v2" in stale.text and stale.headers["cache-control"] == "no-cache"
+    assert static_url("/assets-test/js/app.js") != url
+
+
+def test_html_references_are_rewritten(client):
+    html = client.get("/assets-test/").text
+    assert f'src="{static_url("/assets-test/js/app.js")[len("/assets-test/"):]}"' in html
+    assert 'href="missing.css"' in html
+
+
+def test_html_is_rebuilt_when_a_referenced_file_changes(client, tmp_path):
+    first = client.get("/assets-test/")
+    old_url = static_url("/assets-test/js/app.js")[len("/assets-test/"):]
+    assert old_url in first.text
+
+    (tmp_path / "js" / "app.js").write_text("console.log('v3');\n" * 100)  # index.html untouched
+    res = client.get("/assets-test/", headers={"If-None-Match": first.headers["etag"]})
+    assert res.status_code == 200 and res.headers["etag"] != first.headers["etag"]
+    assert old_url not in res.text
+    assert static_url("/assets-test/js/app.js")[len("/assets-test/"):] in res.text
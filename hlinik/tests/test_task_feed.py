@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import User, Task, TaskStatus, UserRole
+from app.logic import routing
+from app.logic.gamestate import GameState
+from app.logic.routing import get_routing
+from app.logic.task_feed import query_tasks, serialize_task, push_task_delta
+
+
+@pytest.fixture
+def feed_tasks(db):
+    users = [User(username=f"feed_user{i}", role=UserRole.USER, instance_id="feed-test") for i in (1, 2)]
+    other = User(username="feed_other", role=UserRole.USER, instance_id="other-feed")
+    db.add_all(users + [other])
+    db.flush()
+    tasks = []
+    for i in range(5):
+        tasks.append(Task(user_id=users[i % 2].id, prompt_desc=f"T{i}",
+                          status=TaskStatus.ACTIVE if i < 3 else TaskStatus.PAID))
+    tasks.append(Task(user_id=other.id, prompt_desc="foreign", status=TaskStatus.ACTIVE))
+    db.add_all(tasks)
+    db.flush()
+    return users, tasks[:5]
+
+
+def test_cursor_pagination_covers_instance_tasks_once(db, feed_tasks):
+    _, tasks = feed_tasks
+    seen, cursor = [], None
+    while True:
+        page, cursor = query_tasks(db, "feed-test", cursor=cursor, limit=2)
+        seen.extend(t.id for t in page)
+        if cursor is None:
+            break
+    assert seen == [t.id for t in tasks]
+
+
+def test_status_and_user_filters(db, feed_tasks):
+    users, tasks = feed_tasks
+    active, _ = query_tasks(db, "feed-test", status=TaskStatus.ACTIVE)
+    assert [t.prompt_desc for t in active] == ["T0", "T1", "T2"]
+    mine, _ = query_tasks(db, "feed-test", user_id=users[1].id)
+    assert [t.prompt_desc for t in mine] == ["T1", "T3"]
+
+
+def test_updated_since_returns_only_changed_tasks(db, feed_tasks):
+    _, tasks = feed_tasks
+    since = datetime.utcnow() + timedelta(seconds=1)
+    assert query_tasks(db, "feed-test", updated_since=since)[0] == []
+
+    tasks[0].updated_at = since + timedelta(seconds=1)
+    db.flush()
+    changed, _ = query_tasks(db, "feed-test", updated_since=since)
+    assert [t.id for t in changed] == [tasks[0].id]
+
+
+def test_updated_at_changes_on_update(db, feed_tasks):
+    _, tasks = feed_tasks
+    before = tasks[0].updated_at
+    tasks[0].status = TaskStatus.SUBMITTED
+    db.flush()
+    assert tasks[0].updated_at >= before
+    assert serialize_task(tasks[0])["status"] == "submitted"
+
+
+async def test_push_task_delta_reaches_instance_admins(db, feed_tasks, fake_socket):
+    _, tasks = feed_tasks
+    admin_ws = fake_socket()
+    manager = get_routing("feed-test")
+    manager.admin_connections.append(admin_ws)
+    try:
+        await push_task_delta(tasks[0])
+    finally:
+        routing._managers.pop("feed-test", None)
+        GameState._instances.pop("feed-test", None)
+
+    message = admin_ws.sent[-1]
+    assert message["type"] == "admin_task_delta"
+    assert message["task"]["id"] == tasks[0].id
+    assert message["task"]["prompt"] == "T0"
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.database import StatusLevel, SystemLog, Task, TaskStatus, User, UserRole
+from app.logic import routing
+from app.logic import task_pool as task_pool_module
+from app.logic.gamestate import GameState
+from app.logic.llm_core import DEFAULT_TASK_DESCRIPTION
+from app.logic.task_pool import TaskDescriptionPool
+from app.services import admin_service as admin_module
+from app.services.admin_service import AdminService
+
+INSTANCE = "task-pool-test"
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    calls = []
+
+    async def fake_generate(user_profile, config=None):
+        calls.append(user_profile)
+        await asyncio.sleep(0)
+        return f"{user_profile['status_level']} task {len(calls)}"
+
+    monkeypatch.setattr(task_pool_module.llm_service, "generate_task_description", fake_generate)
+    return calls
+
+
+async def _settle(pool):
+    await asyncio.gather(*pool._refills.values())
+
+
+async def test_refill_fills_every_level_to_depth(generated):
+    pool = TaskDescriptionPool(depth=2)
+    pool.schedule_refill()
+    await _settle(pool)
+    assert all(pool.size(level) == 2 for level in StatusLevel)
+    assert len(generated) == 8
+
+
+async def test_take_pops_pooled_description_and_refills(generated):
+    pool = TaskDescriptionPool(depth=1)
+    pool.schedule_refill(StatusLevel.HIGH)
+    await _settle(pool)
+
+    description = await pool.take(StatusLevel.HIGH, {"username": "user1", "status_level": "high"})
+    assert description == "high task 1"
+    await _settle(pool)
+    assert pool.size("high") == 1
+
+
+async def test_empty_pool_generates_inline_for_the_user(generated):
+    pool = TaskDescriptionPool(depth=0)
+    description = await pool.take("mid", {"username": "user7", "status_level": "mid"})
+    assert description == "mid task 1"
+    assert generated[0]["username"] == "user7"
+    assert pool._refills == {}
+
+
+@pytest.mark.parametrize("reply", [
+    DEFAULT_TASK_DESCRIPTION, "[MOCK OPENROUTER] Evaluated input: ...", "[SYSTEM ERROR: timeout]",
+])
+async def test_failed_generation_is_not_pooled(monkeypatch, reply):
+    async def failing(user_profile, config=None):
+        return reply
+
+    monkeypatch.setattr(task_pool_module.llm_service, "generate_task_description", failing)
+    pool = TaskDescriptionPool(depth=3)
+    pool.schedule_refill("low")
+    await _settle(pool)
+    assert pool.size("low") == 0
+
+
+async def test_concurrent_approval_keeps_the_first(monkeypatch, test_engine):
+    Session = sessionmaker(bind=test_engine)
+    monkeypatch.setattr(admin_module, "SessionLocal", Session)
+    release = asyncio.Event()
+
+    async def slow_take(level, user_profile):
+        await release.wait()
+        return "pooled"
+
+    monkeypatch.setattr(admin_module.task_pool, "take", slow_take)
+    db = Session()
+    last_log = db.query(SystemLog.id).order_by(SystemLog.id.desc()).limit(1).scalar() or 0
+    user = User(username="pool_approve_user", role=UserRole.USER, instance_id=INSTANCE)
+    db.add(user)
+    db.commit()
+    task = Task(user_id=user.id, status=TaskStatus.PENDING_APPROVAL)
+    db.add(task)
+    db.commit()
+    task_id, user_id = task.id, user.id
+    db.close()
+
+    service = AdminService()
+    bulk_db, single_db = Session(), Session()
+    try:
+        bulk = asyncio.create_task(service.approve_task(bulk_db, task_id))
+        await asyncio.sleep(0)  # Bulk approval is waiting for its description
+        await service.approve_task(single_db, task_id, reward=77, prompt_content="manual")
+        release.set()
+        with pytest.raises(ValueError):
+            await bulk
+        with pytest.raises(ValueError):
+            await service.approve_task(single_db, task_id)
+        stored = single_db.get(Task, task_id)
+        single_db.refresh(stored)
+        assert (stored.status, stored.reward_offered, stored.prompt_desc) == (TaskStatus.ACTIVE, 77, "manual")
+    finally:
+        bulk_db.close()
+        single_db.close()
+        routing._managers.pop(INSTANCE, None)
+        GameState._instances.pop(INSTANCE, None)
+        # Approvals commit: remove the rows again so later tests do not see them
+        db = Session()
+        db.query(Task).filter(Task.id == task_id).delete()
+        db.query(User).filter(User.id == user_id).delete()
+        db.query(SystemLog).filter(SystemLog.id > last_log).delete()
+        db.commit()
+        db.close()
@@ -0,0 +1,67 @@
+import json
+import pytest
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.dependencies import get_current_user
+from app.logic.gamestate import gamestate
+from app.translations import (
+    clear_cache, flatten_translations, get_bundle, get_flat_translations,
+    get_translation, load_translations, merge_translations, _get_nested_value,
+)
+
+
+@pytest.fixture
+def client():
+    gamestate.language_mode = "cz"
+    gamestate.custom_labels = {}
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(instance_id="default")
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_current_user, None)
+    gamestate.custom_labels = {}
+    clear_cache()
+
+
+def test_flatten_keeps_only_string_leaves():
+    data = {"login": {"username_label": "ID", "nested": {"deep": "x"}}, "count": 3}
+    assert flatten_translations(data) == {"login.username_label": "ID", "login.nested.deep": "x"}
+
+
+def test_flat_bundle_matches_nested_merge():
+    merged = merge_translations(load_translations("czech"), load_translations("iris"))
+    flat = get_flat_translations("czech-iris")
+    for key, value in flat.items():
+        assert _get_nested_value(merged, key) == value
+
+
+def test_english_falls_back_to_czech():
+    czech = get_flat_translations("cz")
+    english = get_flat_translations("en")
+    assert set(czech) <= set(english)
+    assert get_translation("missing.key.path", "en") == "missing.key.path"
+
+
+def test_bundle_version_changes_with_labels():
+    plain = get_bundle("cz", {})
+    assert get_bundle("cz", {}) is plain
+    labelled = get_bundle("cz", {"login.username_label": "ID"})
+    assert labelled.version != plain.version
+    body = json.loads(labelled.body)
+    assert body["translations"]["login.username_label"] == "ID"
+    assert body["version"] == labelled.version
+
+
+def test_endpoint_serves_etag_and_304(client):
+    first = client.get("/api/translations/")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.json()["flat"] is True
+
+    cached = client.get("/api/translations/", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    gamestate.custom_labels["login.username_label"] = "ID"
+    changed = client.get("/api/translations/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
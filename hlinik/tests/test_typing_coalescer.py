@@ -0,0 +1,72 @@
+import asyncio
+
+from app.logic.typing_coalescer import TypingCoalescer, coalescer_for, discard_coalescer, typing_stats_snapshot
+
+
+class Recorder:
+    def __init__(self, delay=0.0):
+        self.sent = []
+        self.delay = delay
+
+    async def __call__(self, value):
+        await asyncio.sleep(self.delay)
+        self.sent.append(value)
+
+
+async def _drain(lane):
+    while lane.task and not lane.task.done():
+        await asyncio.sleep(0.01)
+
+
+async def test_keystroke_burst_sends_first_and_last_value():
+    coalescer = TypingCoalescer(sync_window=0.05, indicator_interval=0.05)
+    send = Recorder()
+    for text in ("h", "he", "hel", "hell", "hello"):
+        coalescer.typing_sync(text, send)
+        await asyncio.sleep(0)
+    await _drain(coalescer.sync)
+
+    assert send.sent == ["h", "hello"]
+    assert coalescer.stats["received"] == 5
+    assert coalescer.stats["forwarded"] == 2
+    assert coalescer.stats["coalesced"] == 3
+
+
+async def test_slow_recipient_drops_stale_frames():
+    coalescer = TypingCoalescer(sync_window=0, indicator_interval=0)
+    send = Recorder(delay=0.05)
+    coalescer.typing_sync("a", send)
+    await asyncio.sleep(0.01)  # "a" in flight
+    for text in ("ab", "abc", "abcd"):
+        coalescer.typing_sync(text, send)
+    await _drain(coalescer.sync)
+
+    assert send.sent == ["a", "abcd"]
+    assert coalescer.stats["dropped"] == 2
+
+
+async def test_indicator_flip_within_interval_cancels_out():
+    coalescer = TypingCoalescer(sync_window=0.05, indicator_interval=0.05)
+    send = Recorder()
+    coalescer.typing_indicator("typing_start", send)
+    await asyncio.sleep(0)
+    coalescer.typing_indicator("typing_stop", send)
+    coalescer.typing_indicator("typing_start", send)
+    coalescer.typing_indicator("typing_start", send)
+    await _drain(coalescer.indicator)
+
+    assert send.sent == ["typing_start"]
+    assert coalescer.stats["received"] == 4
+    assert coalescer.stats["duplicate"] == 2
+    suppressed = coalescer.stats["coalesced"] + coalescer.stats["dropped"] + coalescer.stats["duplicate"]
+    assert coalescer.stats["forwarded"] + suppressed == 4
+
+
+async def test_registry_is_per_connection():
+    ws_a, ws_b = object.__new__(Recorder), object.__new__(Recorder)
+    assert coalescer_for(ws_a) is coalescer_for(ws_a)
+    assert coalescer_for(ws_a) is not coalescer_for(ws_b)
+    discard_coalescer(ws_a)
+    discard_coalescer(ws_b)
+    stats = typing_stats_snapshot()
+    assert stats["suppressed"] == stats["coalesced"] + stats["dropped"] + stats["duplicate"]
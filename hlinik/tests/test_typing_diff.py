@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from app.database import UserRole
+from app.logic import routing
+from app.logic.typing_coalescer import coalescer_for, discard_coalescer
+from app.logic.typing_diff import CHECKPOINT_EVERY, TypingStream, apply_ops, diff_ops
+
+INSTANCE = "typing-diff-test"
+
+
+@pytest.mark.parametrize("old,new", [
+    ("", "hello"), ("hello", ""), ("hello", "help"), ("abc", "aXbc"), ("žluťoučký", "žlutý kůň"), ("same", "same"),
+])
+def test_diff_round_trip(old, new):
+    assert apply_ops(old, diff_ops(old, new)) == new
+
+
+def test_apply_ops_rejects_ops_outside_text():
+    with pytest.raises(ValueError):
+        apply_ops("abc", [[2, 5, ""]])
+    with pytest.raises(ValueError):
+        apply_ops("abc", [["x"]])
+
+
+def test_receive_ignores_gaps_until_checkpoint():
+    stream = TypingStream()
+    assert stream.receive({"seq": 1, "content": "hello"}) == "hello"
+    assert stream.receive({"seq": 2, "ops": [[5, 0, " world"]]}) == "hello world"
+    assert stream.receive({"seq": 4, "ops": [[0, 0, "!"]]}) is None  # seq 3 lost
+    assert stream.receive({"seq": 5, "content": "restart"}) == "restart"
+    assert stream.receive({"seq": 6, "ops": [[7, 0, "ed"]]}) == "restarted"
+
+
+def test_encode_sends_ops_between_checkpoints():
+    stream = TypingStream()
+    text = "a fairly long message being typed"
+    frames = [stream.encode(text)]
+    for i in range(CHECKPOINT_EVERY + 1):
+        text += "x"
+        frames.append(stream.encode(text))
+
+    assert frames[0]["checkpoint"] and frames[0]["content"].startswith("a fairly")
+    assert all("ops" in frame for frame in frames[1:CHECKPOINT_EVERY + 1])
+    assert frames[-1]["checkpoint"]
+    assert [frame["seq"] for frame in frames] == list(range(1, CHECKPOINT_EVERY + 3))
+
+    stream.checkpoint_requested = True
+    assert stream.encode(text + "y")["checkpoint"]
+
+
+async def test_each_tab_gets_the_protocol_it_negotiated(fake_socket):
+    manager = routing.get_routing(INSTANCE)
+    sender, legacy, diff = fake_socket(), fake_socket(), fake_socket()
+    manager.agent_connections[7] = [sender, legacy, diff]
+    manager.enable_typing_diff(diff)
+    try:
+        await manager._local_send_typing_sync(UserRole.AGENT.value, 7, json.dumps({"content": "full"}),
+                                              json.dumps({"ops": []}), sender)
+        assert sender.sent == []
+        assert legacy.sent == [{"content": "full"}]
+        assert diff.sent == [{"ops": []}]
+
+        manager.disconnect(diff, UserRole.AGENT, 7)
+        assert not manager.has_typing_diff(diff)
+    finally:
+        routing._managers.pop(INSTANCE, None)
+
+
+async def test_resync_reaches_the_worker_holding_the_stream(monkeypatch, fake_socket):
+    manager = routing.get_routing(INSTANCE)
+    published = []
+    monkeypatch.setattr(routing.state_backend, "publish", lambda kind, payload=None: published.append(payload))
+    sender = fake_socket()
+    stream = coalescer_for(sender).stream
+    try:
+        assert isinstance(stream.src, str) and stream.src != TypingStream().src
+
+        await manager.request_typing_checkpoint(stream.src)
+        assert stream.checkpoint_requested and published == []
+
+        await manager.request_typing_checkpoint("elsewhere")  # Stream of another worker
+        assert published == [{"instance": INSTANCE, "method": "request_typing_checkpoint", "args": ["elsewhere"]}]
+    finally:
+        discard_coalescer(sender)
+        routing._managers.pop(INSTANCE, None)
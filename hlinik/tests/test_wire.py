@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from app.logic import wire
+
+
+@pytest.mark.parametrize("payload", [
+    {"type": "gamestate_update", "temperature": 142.5, "shift": 3, "is_overloaded": False, "session_id": None},
+    {"type": "not_in_table", "custom_key": [1, -5, -200, 70000, 2 ** 40, -2 ** 40, 0.1, "ž" * 40]},
+    {"type": "task_update", "tasks": [{"id": i, "prompt": "x" * 300} for i in range(20)]},
+    [1, 2, {"3": "three"}],
+])
+def test_round_trip(payload):
+    assert wire.decode(wire.encode(payload)) == payload
+
+
+def test_known_keys_and_types_become_codes():
+    payload = {"type": "typing_sync", "sender": "agent5", "content": "abc"}
+    frame = wire.encode(payload)
+    assert b"typing_sync" not in frame and b"sender" not in frame
+    assert len(frame) < len(json.dumps(payload)) / 2
+
+
+async def test_compact_socket_sends_binary_frames():
+    class Socket:
+        def __init__(self):
+            self.frames = []
+            self.client_state = "CONNECTED"
+
+        async def send_text(self, data):
+            self.frames.append(data)
+
+        async def send_bytes(self, data):
+            self.frames.append(data)
+
+    raw = Socket()
+    socket = wire.CompactWebSocket(raw)
+    message = json.dumps({"type": "pong"})
+    await socket.send_text(message)
+    await socket.send_text("not json")
+
+    assert raw.frames == [wire.encode({"type": "pong"}), "not json"]
+    assert socket.client_state == "CONNECTED"
+    assert wire.encode_text(message) is wire.encode_text(message)
@@ -2,6 +2,17 @@ import requests
 
 BASE_URL = "http://localhost:8000"
 
+def fetch_all_users(s, headers):
+    """All pages of /api/admin/data/users ({users, next_cursor})."""
+    users, cursor = [], None
+    while True:
+        params = {} if cursor is None else {"cursor": cursor}
+        page = s.get(f"{BASE_URL}/api/admin/data/users", headers=headers, params=params).json()
+        users.extend(page["users"])
+        cursor = page.get("next_cursor")
+        if cursor is None:
+            return users
+
 def set_party_mode():
     s = requests.Session()
     
@@ -17,8 +28,7 @@ def set_party_mode():
     
     # 2. Get User ID for user1
     print("Fetching users...")
-    r_users = s.get(f"{BASE_URL}/api/admin/data/users", headers=headers)
-    users = r_users.json()
+    users = fetch_all_users(s, headers)
     user1 = next((u for u in users if u["username"] == "user1"), None)
     
     if not user1:
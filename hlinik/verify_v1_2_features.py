@@ -21,6 +21,19 @@ async def admin_approve_task(token, task_id):
                                 headers={"Authorization": f"Bearer {token}"})
         return res.json()
 
+async def fetch_all_tasks(client, token, **filters):
+    """All pages of /api/admin/tasks ({tasks, next_cursor, server_time})."""
+    tasks, cursor = [], None
+    while True:
+        params = dict(filters) if cursor is None else dict(filters, cursor=cursor)
+        res = await client.get(f"{BASE_URL}/api/admin/tasks", params=params,
+                               headers={"Authorization": f"Bearer {token}"})
+        page = res.json()
+        tasks.extend(page["tasks"])
+        cursor = page.get("next_cursor")
+        if cursor is None:
+            return tasks
+
 async def admin_global_bonus(token, amt):
     async with httpx.AsyncClient() as client:
         res = await client.post(f"{BASE_URL}/api/admin/economy/global_bonus", 
@@ -77,8 +90,7 @@ async def run_test():
         # But we need to drain admin socket or assume it arrived.
         # Let's verify via API that task exists.
         async with httpx.AsyncClient() as client:
-             res = await client.get(f"{BASE_URL}/api/admin/tasks", headers={"Authorization": f"Bearer {admin_token}"})
-             tasks = res.json()
+             tasks = await fetch_all_tasks(client, admin_token, status="pending_approval")
              target_task = next((t for t in tasks if t["user_id"] == 14 and t["status"] == "pending_approval"), None)
              # User1 ID depends on seed. Usually 14 if seeded last.
              # Actually let's just find ANY pending task.
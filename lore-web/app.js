@@ -127,7 +127,38 @@ document.addEventListener('DOMContentLoaded', async () => {
     renderLLMPrompts();
 });
 
+// Compiled lore bundle served by the IRIS backend (one request instead of ~10).
+// Returns null on static hosting without the backend.
+async function loadLoreBundle() {
+    try {
+        const res = await fetch('/api/lore-editor/bundle');
+        if (!res.ok) return null;
+        const bundle = await res.json();
+        return bundle && bundle.files ? bundle : null;
+    } catch (e) {
+        return null;
+    }
+}
+
+let loreBundle = null;
+
 async function loadData() {
+    loreBundle = await loadLoreBundle();
+    if (loreBundle) {
+        const files = loreBundle.files;
+        configData = files.config || { version: "4.2.0", phase: 38 };
+        usersData = files.users?.users || [];
+        rolesDefinitionData = files.roles?.roles || [];
+        abilitiesData = files.abilities?.abilities || [];
+        relationsV2Data = files.relations?.relations || [];
+        tasksData = files.tasks?.tasks || [];
+        storyNodesData = files.story_nodes?.nodes || [];
+        relationTypesData = files.relation_types?.types || [];
+        taskTypesData = files.task_types?.types || [];
+        console.log('Data loaded (bundle ' + loreBundle.version + '):', { users: usersData.length, relations: relationsV2Data.length });
+        return;
+    }
+
     try {
         // === CONFIG ===
         try {
@@ -4519,13 +4550,19 @@ function setNestedValue(obj, path, value) {
     current[parts[parts.length - 1]] = value;
 }
 
+// Server writes edits in the background; a failed earlier write comes back with the next answer
+function editorWriteWarning(result) {
+    if (!result || !result.write_error) return null;
+    return `⚠️ Změny jsou zatím jen v paměti serveru, zápis souboru selhal (zkouší se znovu): ${result.write_error}`;
+}
+
 // Save record
 async function editorSaveRecord() {
     const data = collectFormData();
 
     try {
-        await LoreEditorAPI.saveRecord(editorCurrentFile, editorCurrentRecordId, data);
-        alert('✅ Uloženo!');
+        const result = await LoreEditorAPI.saveRecord(editorCurrentFile, editorCurrentRecordId, data);
+        alert(editorWriteWarning(result) || '✅ Uloženo!');
 
         // Refresh record list in case label changed
         editorRecordsCache = await LoreEditorAPI.listRecords(editorCurrentFile);
@@ -4624,7 +4661,7 @@ async function editorAddRecord() {
 
     try {
         const result = await LoreEditorAPI.createRecord(editorCurrentFile, blank);
-        alert(`✅ Vytvořeno: ${result.record_id}`);
+        alert(editorWriteWarning(result) || `✅ Vytvořeno: ${result.record_id}`);
 
         editorRecordsCache = await LoreEditorAPI.listRecords(editorCurrentFile);
         renderEditorRecordList();